@@ -1,7 +1,28 @@
 '''pyfldigi package init
+
+The public classes are imported lazily, the first time they're accessed, so that 'import pyfldigi' stays cheap for
+short-lived scripts that only need (for example) the Client.
 '''
 
-from .client import Client
-from .appmonitor import ApplicationMonitor
-from .xmlconfig import XmlConfig
-from .xmlconfig import XmlMonitor
+import importlib
+
+_LAZY = {'Client': '.client',
+         'AsyncClient': '.client',
+         'ApplicationMonitor': '.appmonitor',
+         'XmlConfig': '.xmlconfig',
+         'XmlMonitor': '.xmlconfig',
+         'Simulator': '.simulator'}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value  # don't come back here next time
+    return value
+
+
+def __dir__():
+    return sorted(set(list(globals()) + __all__))
@@ -1,5 +1,20 @@
 '''
 '''
-from .client import Client
+import importlib
 
-__all__ = ['Client']
+_LAZY = {'Client': '.client',
+         'AsyncClient': '.asyncclient'}
+
+__all__ = ['Client', 'AsyncClient']
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value  # don't come back here next time
+    return value
+
+
+def __dir__():
+    return sorted(set(list(globals()) + __all__))
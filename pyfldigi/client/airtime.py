@@ -0,0 +1,160 @@
+'''Airtime model: learns how many characters per second each modem really sends, to estimate how long a transmission
+will take.
+'''
+
+import os
+import json
+import logging
+import threading
+from .txmonitor import estimate_char_rate
+
+
+class AirtimeModel(object):
+
+    '''Estimates how long text takes to transmit, from the character rates measured in past transmissions.
+
+    The TX Monitor feeds it every chunk of TX data it reads (the # of characters, and the seconds since the previous
+    chunk), tagged with the modem that was transmitting.  Per modem, it keeps the totals of the most recent 'memory'
+    seconds of TX, so the learned rate follows changes (e.g. a different Olivia submode behind the same name) without
+    jumping around on a single slow poll.  Modems it hasn't learned yet fall back to the rough figures in
+    :py:data:`pyfldigi.client.txmonitor.CHAR_RATES`.
+
+    :py:meth:`pyfldigi.client.main.Main.send` uses it to work out its timeout when none is given, and the
+    :py:class:`pyfldigi.client.txqueue.TxQueue` to size its keying cycles.
+
+    The learned rates can be saved to a JSON file, and loaded back in another run.  If the client was created with
+    'airtime_file', they're loaded from it on first use and saved back after every transmission.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` as 'airtime'.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client(airtime_file='airtime.json')
+    >>> fldigi.airtime.estimate('CQ CQ CQ de KM4YRI KM4YRI KM4YRI pse K', 'BPSK31')  # seconds
+    9.07
+    >>> fldigi.main.send('CQ CQ CQ de KM4YRI KM4YRI KM4YRI pse K')  # the timeout is worked out from the estimate
+    >>> fldigi.airtime.char_rate('BPSK31')  # learned from that transmission
+    4.04
+    '''
+
+    def __init__(self, clientObj=None, path=None):
+        self.clientObj = clientObj
+        self.logger = logging.getLogger('pyfldigi.client.airtime')
+        self.memory = 300.0  # seconds of TX per modem that the learned rate is based on
+        self.min_seconds = 2.0  # seconds of TX a modem needs before its learned rate is trusted
+        self.overhead = 3.0  # seconds.  Keying up, the first character, and un-keying after the last one.
+        self.margin = 0.25  # extra time allowed on top of the estimate by timeout(), as a fraction of it
+        self.unlearned_margin = 1.0  # the same, for modems that haven't been learned yet
+        self.mode = None  # the modem of the last transmission seen
+        self.path = path if path is not None else getattr(clientObj, 'airtime_file', None)
+        self._rates = {}  # modem name -> [characters, seconds]
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._saving = threading.Lock()  # one flush() at a time
+        if self.path is not None and os.path.exists(self.path):
+            self.load(self.path)
+
+    @staticmethod
+    def _key(mode):
+        return str(mode).upper()
+
+    def observe(self, mode, chars, seconds):
+        '''Records that `chars` characters went out in `seconds` seconds while transmitting in `mode`'''
+        if chars <= 0 or seconds <= 0:
+            return
+        key = self._key(mode)
+        with self._lock:
+            self.mode = key
+            totals = self._rates.setdefault(key, [0.0, 0.0])
+            totals[0] += chars
+            totals[1] += seconds
+            if totals[1] > self.memory:  # forget the oldest TX, in proportion
+                scale = self.memory / totals[1]
+                totals[0] *= scale
+                totals[1] *= scale
+            self._dirty = True
+
+    def learned(self, mode):
+        '''Returns True if the character rate for a modem comes from measurements rather than CHAR_RATES'''
+        totals = self._rates.get(self._key(mode))
+        return totals is not None and totals[1] >= self.min_seconds
+
+    def char_rate(self, mode=None):
+        '''Returns the characters per second for a modem (default: the modem of the last transmission)'''
+        mode = self.mode if mode is None else mode
+        if mode is None:
+            return estimate_char_rate('')
+        if self.learned(mode):
+            chars, seconds = self._rates[self._key(mode)]
+            return chars / seconds
+        return estimate_char_rate(mode)
+
+    def estimate(self, text, mode=None):
+        '''Returns the # of seconds it takes to transmit some text
+
+        :param text: The text (or its length, in bytes)
+        :type text: str, bytes or int
+        :param mode: The modem name (default: the modem of the last transmission)
+        :type mode: str
+        :rtype: float
+        '''
+        if isinstance(text, str):
+            text = text.encode('utf-8')  # the rates are learned from TX data, which is bytes
+        length = text if isinstance(text, int) else len(text)
+        return length / self.char_rate(mode)
+
+    def timeout(self, text, mode=None):
+        '''Returns a generous upper bound for the # of seconds a transmission of some text takes, from keying up to
+        un-keying: the estimate, plus 'margin' (or 'unlearned_margin'), plus 'overhead'.
+        '''
+        mode = self.mode if mode is None else mode
+        margin = self.margin if mode is not None and self.learned(mode) else self.unlearned_margin
+        return self.overhead + self.estimate(text, mode) * (1 + margin)
+
+    def to_dict(self):
+        '''Returns the learned rates: {modem name: {'char_rate': characters/second, 'seconds': seconds of TX}}'''
+        with self._lock:
+            return {mode: {'char_rate': chars / seconds, 'seconds': seconds}
+                    for mode, (chars, seconds) in self._rates.items() if seconds > 0}
+
+    def clear(self):
+        '''Forgets everything that's been learned'''
+        with self._lock:
+            self._rates = {}
+            self.mode = None
+            self._dirty = True
+
+    def load(self, path):
+        '''Loads learned rates from a JSON file written by :py:meth:`save`, on top of the ones learned so far'''
+        with open(path, 'r') as f:
+            rates = json.load(f)
+        with self._lock:
+            for mode, entry in rates.items():
+                if entry['seconds'] > 0:
+                    self._rates[self._key(mode)] = [entry['char_rate'] * entry['seconds'], float(entry['seconds'])]
+        self.logger.debug('Loaded the airtime of {} modems from {}'.format(len(rates), path))
+
+    def save(self, path=None):
+        '''Saves the learned rates to a JSON file (default: 'path').  The file is replaced atomically.'''
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError('no path to save the airtime model to')
+        rates = self.to_dict()
+        temp = '{}.tmp'.format(path)
+        with open(temp, 'w') as f:
+            json.dump(rates, f, indent=2, sort_keys=True)
+        os.replace(temp, path)
+        self._dirty = False
+
+    def flush(self):
+        '''Saves the learned rates to 'path', if there is one and anything has changed.  Called by the TX Monitor
+        at the end of every transmission (outside of its lock, since it writes to disk), and by a blocking
+        :py:meth:`pyfldigi.client.main.Main.send` before it returns.  If another thread is saving, it waits for it.
+        '''
+        with self._saving:
+            if self.path is not None and self._dirty is True:
+                try:
+                    self.save()
+                except OSError as e:
+                    self.logger.warning('Could not save the airtime model to {}: {}'.format(self.path, e))
@@ -0,0 +1,609 @@
+'''asyncio-native client for FLDIGI.
+
+The namespaces mirror the blocking :py:class:`pyfldigi.client.client.Client`.  Properties can't be assigned
+asynchronously, so every read-only property of the blocking client is an awaitable property here, and every
+property setter becomes a set_<name>() coroutine:
+
+>>> freq = fldigi.rig.frequency             # blocking client
+>>> freq = await afldigi.rig.frequency      # AsyncClient
+>>> fldigi.rig.frequency = 7070000          # blocking client
+>>> await afldigi.rig.set_frequency(7070000)  # AsyncClient
+'''
+
+import time
+import asyncio
+import logging
+from .asynctransport import AsyncTransport, AsyncServerProxy
+from .asynctxmonitor import AsyncTxMonitor
+from .airtime import AirtimeModel
+from .rxstream import AsyncRxStream
+
+
+async def _cast(awaitable, cast):
+    return cast(await awaitable)
+
+
+class AsyncClient(object):
+
+    '''An asyncio client that can read/write settings to FLDIGI via XML-RPC protocol
+
+    :param hostname: IP address of the xml-rpc FLDIGI interface (usually 127.0.0.1)
+    :type hostname: str
+    :param port: The port of the xml-rpc FLDIGI interface (usually 7362)
+    :type port: int
+    :param pool_size: The max # of keep-alive connections kept open to FLDIGI
+    :type pool_size: int
+    :param instrument: If True, record per XML-RPC method stats.  See :py:meth:`stats`
+    :type instrument: bool
+    :param airtime_file: A JSON file to keep the learned character rates in, across runs.  See
+                         :py:class:`pyfldigi.client.airtime.AirtimeModel`
+    :type airtime_file: str
+
+    :Example:
+
+    >>> import asyncio
+    >>> import pyfldigi
+    >>> async def main():
+    ...     async with pyfldigi.AsyncClient(hostname='127.0.0.1', port=7362) as fldigi:
+    ...         print(await fldigi.rig.frequency)
+    ...         await fldigi.main.send('CQ CQ CQ de KM4YRI')
+    >>> asyncio.get_event_loop().run_until_complete(main())
+    7070200.0
+
+    .. note::
+        The TX monitor runs as a task on the event loop rather than as a thread.  It is started when entering the
+        'async with' block, or on the first call to :py:meth:`AsyncMain.send`, :py:meth:`AsyncMain.tx` or
+        :py:meth:`AsyncMain.tune`, and stopped by :py:meth:`close`.
+    '''
+
+    def __init__(self, hostname='127.0.0.1', port=7362, pool_size=4, instrument=False, airtime_file=None):
+        self.logger = logging.getLogger('pyfldigi.AsyncClient')
+        self.airtime_file = airtime_file
+        self.ip_address = hostname
+        self.port = port
+        self.transport = AsyncTransport(hostname=hostname, port=port, pool_size=pool_size, instrument=instrument)
+        self.client = AsyncServerProxy(self.transport)
+        self.main = AsyncMain(clientObj=self)
+        self.modem = AsyncModem(clientObj=self)
+        self.rig = AsyncRig(clientObj=self)
+        self.log = AsyncLog(clientObj=self)
+        self.text = AsyncText(clientObj=self)
+        self.spot = AsyncSpot(clientObj=self)
+        self.flmsg = AsyncFlmsg(clientObj=self)
+        self.io = AsyncIo(clientObj=self)
+        self.txmonitor = AsyncTxMonitor(clientObj=self)
+        self.airtime = AirtimeModel(clientObj=self)
+
+    async def __aenter__(self):
+        self.txmonitor.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        '''Stops the TX monitor task and closes all connections to FLDIGI'''
+        await self.txmonitor.stop()
+        await self.transport.close()
+
+    def stats(self):
+        '''Returns per XML-RPC method statistics.  See :py:meth:`pyfldigi.client.client.Client.stats`'''
+        return self.transport.stats.snapshot()
+
+    def reset_stats(self):
+        '''Clears the per XML-RPC method statistics'''
+        self.transport.stats.reset()
+
+    @property
+    def methods(self):
+        '''Returns the list of methods in which fldigi can handle via the xml-rpc interface (awaitable)'''
+        return self.client.fldigi.list()
+
+    @property
+    def name(self):
+        '''Returns the program name and version (awaitable)'''
+        return self.client.fldigi.name()
+
+    @property
+    def version(self):
+        '''Returns the program version as a python dict (awaitable)'''
+        return self.client.fldigi.version_struct()
+
+    @property
+    def config_dir(self):
+        '''Returns the name of the configuration directory (awaitable)'''
+        return self.client.fldigi.config_dir()
+
+    async def terminate(self, save_options=True, save_log=True, save_macros=True):
+        '''Terminates fldigi. See :py:meth:`pyfldigi.client.client.Client.terminate`'''
+        bitmask = int('0b{}{}{}'.format(int(save_macros), int(save_log), int(save_options)), 0)
+        await self.client.fldigi.terminate(bitmask)
+
+    async def delay(self, milliseconds):
+        '''Non-blocking delay'''
+        await asyncio.sleep(milliseconds / 1000.0)
+
+
+class AsyncMain(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.main.Main`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+        self.logger = logging.getLogger('pyfldigi.client.asyncmain')
+
+    @property
+    def status1(self):
+        return self.client.main.get_status1()
+
+    @property
+    def status2(self):
+        return self.client.main.get_status2()
+
+    @property
+    def wf_sideband(self):
+        return self.client.main.get_wf_sideband()
+
+    async def set_wf_sideband(self, sideband):
+        if str(sideband) not in ['USB', 'LSB']:
+            raise ValueError('sideband must be USB or LSB')
+        await self.client.main.set_wf_sideband(str(sideband))
+
+    @property
+    def afc(self):
+        return _cast(self.client.main.get_afc(), bool)
+
+    async def set_afc(self, afc):
+        if not isinstance(afc, bool):
+            raise TypeError('afc must be a bool')
+        await self.client.main.set_afc(afc)
+
+    @property
+    def squelch(self):
+        return _cast(self.client.main.get_squelch(), bool)
+
+    async def set_squelch(self, squelch):
+        if not isinstance(squelch, bool):
+            raise TypeError('squelch state must be a bool')
+        await self.client.main.set_squelch(squelch)
+
+    @property
+    def squelch_level(self):
+        return self.client.main.get_squelch_level()
+
+    async def set_squelch_level(self, level):
+        if not 0 <= level <= 100:
+            raise ValueError('squelch level must be between 0 and 100')
+        await self.client.main.set_squelch_level(float(level))
+
+    @property
+    def reverse(self):
+        return _cast(self.client.main.get_reverse(), bool)
+
+    async def set_reverse(self, state):
+        await self.client.main.set_reverse(bool(state))
+
+    @property
+    def txlock(self):
+        return _cast(self.client.main.get_lock(), bool)
+
+    async def set_txlock(self, value=True):
+        await self.client.main.set_lock(bool(value))
+
+    @property
+    def rsid(self):
+        return _cast(self.client.main.get_rsid(), bool)
+
+    async def set_rsid(self, value):
+        await self.client.main.set_rsid(bool(value))
+
+    async def get_trx_state(self, suppress_errors=False):
+        '''Returns transmit/tune/receive status.  See :py:meth:`pyfldigi.client.main.Main.get_trx_state`'''
+        for tries in range(0, 3):  # retry up to 3 times.
+            try:
+                state = str(await self.client.main.get_trx_status()).upper()
+            except Exception as e:
+                if suppress_errors is False:
+                    raise
+                self.logger.debug('Exception @ get_trx_state() : {}'.format(e))
+                state = 'ERROR'
+            if state in ['TX', 'RX', 'TUNE']:
+                break
+            await asyncio.sleep(0.005)
+        return state
+
+    async def rx(self):
+        self.logger.debug('Setting FLDIGI to RX mode')
+        await self.client.main.rx()
+
+    async def tx(self):
+        self.logger.debug('Setting FLDIGI to TX mode')
+        self.clientObj.txmonitor.start()
+        await self.client.main.tx()
+        self.clientObj.txmonitor.wake()
+
+    async def tune(self):
+        self.logger.debug('Setting FLDIGI to TUNE mode')
+        self.clientObj.txmonitor.start()
+        await self.client.main.tune()
+        self.clientObj.txmonitor.wake()
+
+    async def abort(self):
+        await self.client.main.abort()
+
+    async def run_macro(self, macroNum):
+        ret = await self.client.main.run_macro(int(macroNum))
+        self.clientObj.txmonitor.wake()
+        return ret
+
+    async def get_max_macro_id(self):
+        return await self.client.main.get_max_macro_id()
+
+    async def send(self, data, block=True, timeout=None):
+        '''Sends a block of text.  See :py:meth:`pyfldigi.client.main.Main.send`
+
+        :raises TimeoutError: if the data wasn't transmitted within the timeout
+        '''
+        txmonitor = self.clientObj.txmonitor
+        state = await self.get_trx_state()
+        self.logger.debug('send(): state={}'.format(state))
+        if timeout is None:
+            timeout = self.clientObj.airtime.timeout(data, await self.clientObj.modem.name)
+
+        if state == 'TX':  # already chooching
+            tx_start = time.time()
+            polls = txmonitor.polls
+            await self.clientObj.text.add_tx(data)
+        elif state == 'RX':
+            await self.clientObj.text.clear_tx()
+            txmonitor.history.clear_txdata()
+            tx_start = time.time()
+            polls = txmonitor.polls
+            await self.tx()
+            await self.clientObj.text.add_tx(data)
+            try:
+                await txmonitor.wait_for(lambda: len(txmonitor.history.txdata) >= 1, timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError('Timeout while transmitting, waiting for first byte to go out')
+        else:
+            raise Exception('cannot transmit if FLDIGI state is \'{}\''.format(state))
+
+        if block is True:
+            try:
+                await txmonitor.wait_for(lambda: txmonitor.polls > polls + 1 and txmonitor.transmitting is False,
+                                        max(timeout - (time.time() - tx_start), 0))
+            except asyncio.TimeoutError:
+                raise TimeoutError('Timeout while transmitting, waiting for text to be transmitted')
+            self.logger.debug('Returning from blocking call to send()...')
+
+
+class AsyncModem(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.modem.Modem`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+        self.olivia = AsyncOlivia(clientObj)
+        self.wefax = AsyncWefax(clientObj)
+        self.navtex = AsyncNavtex(clientObj)
+
+    @property
+    def name(self):
+        return self.client.modem.get_name()
+
+    async def set_name(self, value):
+        await self.client.modem.set_by_name(str(value))
+
+    @property
+    def names(self):
+        return self.client.modem.get_names()
+
+    @property
+    def id(self):
+        return self.client.modem.get_id()
+
+    async def set_id(self, value):
+        await self.client.modem.set_by_id(int(value))
+
+    @property
+    def max_id(self):
+        return self.client.modem.get_max_id()
+
+    @property
+    def carrier(self):
+        return self.client.modem.get_carrier()
+
+    async def set_carrier(self, freq):
+        await self.client.modem.set_carrier(int(freq))
+
+    @property
+    def afc_search_range(self):
+        return self.client.modem.get_afc_search_range()
+
+    async def set_afc_search_range(self, range):
+        await self.client.modem.set_afc_search_range(int(range))
+
+    @property
+    def bandwidth(self):
+        return self.client.modem.get_bandwidth()
+
+    async def set_bandwidth(self, bandwidth):
+        await self.client.modem.set_bandwidth(int(bandwidth))
+
+    @property
+    def quality(self):
+        return self.client.modem.get_quality()
+
+    async def search_up(self):
+        await self.client.modem.search_up()
+
+    async def search_down(self):
+        await self.client.modem.search_down()
+
+
+class AsyncOlivia(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.modem.Olivia`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    @property
+    def bandwidth(self):
+        return self.client.modem.olivia.get_bandwidth()
+
+    async def set_bandwidth(self, bandwidth):
+        await self.client.modem.olivia.set_bandwidth(int(bandwidth))
+
+    @property
+    def tones(self):
+        return self.client.modem.olivia.get_tones()
+
+    async def set_tones(self, tones):
+        await self.client.modem.olivia.set_tones(int(tones))
+
+
+class AsyncWefax(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.modem.Wefax`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    async def get_engine_state(self):
+        return await self.client.wefax.state_string()
+
+    async def skip_apt(self):
+        return await self.client.wefax.skip_apt()
+
+    async def skip_phasing(self):
+        return await self.client.wefax.skip_phasing()
+
+    async def set_tx_abort_flag(self):
+        return await self.client.wefax.set_tx_abort_flag()
+
+    async def end_reception(self):
+        return await self.client.wefax.end_reception()
+
+    async def start_manual_reception(self):
+        return await self.client.wefax.start_manual_reception()
+
+    async def set_adif_log(self, logging):
+        return await self.client.wefax.set_adif_log(bool(logging))
+
+    async def set_max_lines(self, lines):
+        return await self.client.wefax.set_max_lines(int(lines))
+
+    async def get_received_file(self, timeout):
+        return await self.client.wefax.get_received_file(int(timeout))
+
+    async def send_file(self, filename, param):
+        with open(filename, mode='rb') as f:
+            img = f.read()
+        img = img.decode('iso-8859-1')  # must be sent out as a string
+        return await self.client.wefax.send_file(img, param)
+
+
+class AsyncNavtex(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.modem.Navtex`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    async def get_msg(self, timeout):
+        return await self.client.navtex.get_message(int(timeout))
+
+    async def send_msg(self, msg):
+        resp = await self.client.navtex.send_message(str(msg))
+        if resp != '':
+            raise Exception('Unable to send NAVTEX message.  Error message returned: {}'.format(resp))
+
+
+class AsyncRig(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.rig.Rig`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    @property
+    def name(self):
+        return self.client.rig.get_name()
+
+    async def set_name(self, name):
+        return await self.client.rig.set_name(str(name))
+
+    @property
+    def frequency(self):
+        return self.client.rig.get_frequency()
+
+    async def set_frequency(self, freq):
+        return await self.client.rig.set_frequency(float(freq))
+
+    @property
+    def modes(self):
+        return self.client.rig.get_modes()
+
+    async def set_modes(self, value):
+        await self.client.rig.set_modes(value)
+
+    @property
+    def mode(self):
+        return self.client.rig.get_mode()
+
+    async def set_mode(self, value):
+        await self.client.rig.set_mode(str(value))
+
+    @property
+    def bandwidths(self):
+        return self.client.rig.get_bandwidths()
+
+    async def set_bandwidths(self, bandwidths):
+        await self.client.rig.set_bandwidths(bandwidths)
+
+    @property
+    def bandwidth(self):
+        return self.client.rig.get_bandwidth()
+
+    async def set_bandwidth(self, bandwidth):
+        await self.client.rig.set_bandwidth(bandwidth)
+
+    async def take_control(self):
+        await self.client.rig.take_control()
+
+    async def release_control(self):
+        await self.client.rig.release_control()
+
+
+class AsyncLog(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.log.Log`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+
+class AsyncText(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.text.Text`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+        self.logger = logging.getLogger('pyfldigi.client.asynctext')
+
+    async def add_tx(self, value):
+        if isinstance(value, bytes):
+            self.logger.debug('add_tx({})'.format(value))
+            await self.client.text.add_tx_bytes(value)
+        elif isinstance(value, str):
+            self.logger.debug('add_tx(\'{}\')'.format(value))
+            await self.client.text.add_tx(value)
+        else:
+            raise TypeError('text must be in bytes or str format')
+        self.clientObj.txmonitor.wake()
+
+    async def clear_tx(self):
+        self.logger.debug('clear_tx()')
+        await self.client.text.clear_tx()
+
+    async def get_tx_data(self, suppress_errors=False):
+        try:
+            data = await self.client.tx.get_data()
+        except Exception as e:
+            if suppress_errors is True:
+                self.logger.debug('get_tx_data() : {}'.format(e))
+                return None
+            raise
+        self.logger.debug('get_tx_data() returned: {}'.format(data))
+        return data
+
+    async def get_rx_data(self):
+        data = await self.client.rx.get_data()
+        self.logger.debug('get_rx_data() returned: {}'.format(data))
+        return data
+
+    def aiter_rx(self, timeout=None, maxsize=64, min_interval=0.05, max_interval=2.0):
+        '''Returns an async iterator of the text FLDIGI receives.  See :py:meth:`pyfldigi.client.text.Text.iter_rx`
+
+        :Example:
+
+        >>> async for chunk in afldigi.text.aiter_rx():
+        ...     print(chunk.time, chunk.text)
+        '''
+        return AsyncRxStream(self, timeout=timeout, maxsize=maxsize, min_interval=min_interval,
+                             max_interval=max_interval)
+
+    async def clear_rx(self):
+        self.logger.debug('clear_rx()')
+        await self.client.text.clear_rx()
+
+
+class AsyncSpot(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.pskreporter.Spot`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    @property
+    def auto(self):
+        return self.client.spot.get_auto()
+
+    async def set_auto(self, state):
+        return await self.client.spot.set_auto(bool(state))
+
+    @property
+    def pskrep_count(self):
+        return self.client.spot.pskrep.get_count()
+
+
+class AsyncFlmsg(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.flmsg.Flmsg`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    @property
+    def online(self):
+        return _cast(self.client.main.flmsg_online(), bool)
+
+    @property
+    def available(self):
+        return _cast(self.client.main.flmsg_available(), bool)
+
+    async def transfer(self):
+        return await self.client.main.flmsg_transfer()
+
+    @property
+    def squelch(self):
+        return _cast(self.client.main.flmsg_squelch(), bool)
+
+
+class AsyncIo(object):
+
+    '''asyncio equivalent of :py:class:`pyfldigi.client.ioconfig.Io`'''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+    async def in_use(self):
+        return await self.client.io.in_use()
+
+    async def enable_kiss(self):
+        await self.client.io.enable_kiss()
+
+    async def enable_arq(self):
+        await self.client.io.enable_arq()
@@ -0,0 +1,212 @@
+'''A non-blocking XML-RPC transport for asyncio, built on asyncio streams.
+
+fldigi only speaks plain HTTP, so rather than pulling in a third party HTTP library, this module implements the
+small subset of HTTP/1.1 that XML-RPC needs (POST, Content-Length / chunked responses, keep-alive).
+'''
+
+import time
+import asyncio
+import logging
+import collections
+import xmlrpc.client
+from .stats import RpcStats
+
+
+class _AsyncMethod(object):
+
+    '''Allows the XML-RPC names to be chained, e.g. await proxy.rig.get_frequency(), the same as with ServerProxy'''
+
+    def __init__(self, transport, name):
+        self._transport = transport
+        self._name = name
+
+    def __getattr__(self, name):
+        return _AsyncMethod(self._transport, '{}.{}'.format(self._name, name))
+
+    def __call__(self, *args):
+        return self._transport.call(self._name, *args)
+
+
+class AsyncServerProxy(object):
+
+    '''The asyncio equivalent of xmlrpc.client.ServerProxy.  Every call returns a coroutine.
+
+    :Example:
+
+    >>> proxy = AsyncServerProxy(AsyncTransport('127.0.0.1', 7362))
+    >>> await proxy.fldigi.name()
+    'fldigi'
+    '''
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _AsyncMethod(self._transport, name)
+
+
+class AsyncTransport(object):
+
+    '''Sends XML-RPC requests to FLDIGI without blocking the event loop.
+
+    Up to pool_size keep-alive connections are kept open to FLDIGI, and shared between all of the coroutines that
+    use this transport.
+
+    :param hostname: IP address of the xml-rpc FLDIGI interface (usually 127.0.0.1)
+    :type hostname: str
+    :param port: The port of the xml-rpc FLDIGI interface (usually 7362)
+    :type port: int
+    :param pool_size: The max # of simultaneous connections to FLDIGI
+    :type pool_size: int
+    :param chunk_size: The max # of bytes read from the socket (and fed to the XML parser) at a time
+    :type chunk_size: int
+    :param instrument: If True, per-method stats are recorded in self.stats (:py:class:`pyfldigi.client.stats.RpcStats`)
+    :type instrument: bool
+    '''
+
+    user_agent = 'Python-xmlrpc with asyncio (pyfldigi)'
+
+    def __init__(self, hostname='127.0.0.1', port=7362, use_builtin_types=True, allow_none=True, pool_size=4, chunk_size=16384, encoding='utf-8', instrument=False):
+        self.logger = logging.getLogger('pyfldigi.client.asynctransport')
+        self.hostname = hostname
+        self.port = int(port)
+        self.use_builtin_types = use_builtin_types
+        self.allow_none = allow_none
+        self.pool_size = int(pool_size)
+        self.chunk_size = int(chunk_size)
+        self.encoding = encoding
+        self.url = 'http://{}:{}/'.format(self.hostname, self.port)
+        self._idle = collections.deque()  # idle (reader, writer) connections
+        self._semaphore = None  # created on first use, so that it is bound to the running event loop
+        self.stats = RpcStats(enabled=instrument)
+
+    async def call(self, methodname, *params):
+        '''Calls an XML-RPC method and returns its (unmarshalled) result
+
+        :raises xmlrpc.client.Fault: if FLDIGI returned a fault
+        :raises xmlrpc.client.ProtocolError: if FLDIGI returned an HTTP error
+        '''
+        body = xmlrpc.client.dumps(params, methodname, encoding=self.encoding, allow_none=self.allow_none)
+        body = body.encode(self.encoding, 'xmlcharrefreplace')
+        if self.stats.enabled is False:
+            return await self._call(body, None)
+        start = time.perf_counter()
+        received = [0]
+        error = True
+        try:
+            result = await self._call(body, received)
+            error = False
+            return result
+        finally:
+            self.stats.record(methodname, time.perf_counter() - start, len(body), received[0], error)
+
+    async def _call(self, body, received):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+        async with self._semaphore:
+            for attempt in range(0, 2):
+                reused = len(self._idle) > 0
+                reader, writer = await self._get_connection()
+                try:
+                    result, keep_alive = await self._request(reader, writer, body, received)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    writer.close()
+                    if reused is True and attempt == 0:
+                        # The server probably closed an idle keep-alive connection.  Try again with a new one.
+                        self.logger.debug('Stale connection ({}), reconnecting'.format(e))
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive is True:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                if isinstance(result, xmlrpc.client.Fault):
+                    raise result
+                if isinstance(result, tuple) and len(result) == 1:
+                    result = result[0]
+                return result
+
+    async def close(self):
+        '''Closes all of the idle connections'''
+        while len(self._idle) > 0:
+            reader, writer = self._idle.popleft()
+            writer.close()
+
+    async def _get_connection(self):
+        while len(self._idle) > 0:
+            reader, writer = self._idle.popleft()
+            if not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_connection(self.hostname, self.port)
+
+    async def _request(self, reader, writer, body, received=None):
+        header = ('POST / HTTP/1.1\r\n'
+                  'Host: {}:{}\r\n'
+                  'User-Agent: {}\r\n'
+                  'Content-Type: text/xml\r\n'
+                  'Content-Length: {}\r\n'
+                  'Connection: keep-alive\r\n\r\n').format(self.hostname, self.port, self.user_agent, len(body))
+        writer.write(header.encode('ascii') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[0:3]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        p, u = xmlrpc.client.getparser(use_builtin_types=self.use_builtin_types)
+        if status != '200':
+            feed = (lambda data: None)  # error bodies are read, then thrown away
+        elif received is not None:
+            def feed(data):
+                received[0] += len(data)
+                p.feed(data)
+        else:
+            feed = p.feed
+        keep_alive = (version == 'HTTP/1.1') and (headers.get('connection', '').lower() != 'close')
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass  # discard trailers
+                    break
+                feed(await reader.readexactly(size))
+                await reader.readexactly(2)  # CRLF after each chunk
+        elif 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, self.chunk_size))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                feed(chunk)
+                remaining -= len(chunk)
+        else:
+            keep_alive = False
+            while True:
+                chunk = await reader.read(self.chunk_size)
+                if not chunk:
+                    break
+                feed(chunk)
+
+        if status != '200':
+            raise xmlrpc.client.ProtocolError(self.url, int(status), reason, headers)
+        p.close()
+        try:
+            result = u.close()
+        except xmlrpc.client.Fault as e:
+            result = e  # raised by call(), once the (still usable) connection is back in the pool
+        return result, keep_alive
@@ -0,0 +1,210 @@
+'''asyncio version of the TX Monitor.  Runs as a task on the event loop instead of as a thread.
+'''
+
+import time
+import asyncio
+import logging
+from .events import EventBus
+from .txmonitor import _History, _PollRate, _Watchdog, _publish_state, _publish_txdata, _publish_duty_cycle
+
+
+class AsyncTxMonitor(object):
+
+    '''Monitors the TX state of FLDIGI, and puts it back into receive once all of the TX data has gone out.
+
+    This is the asyncio equivalent of :py:class:`pyfldigi.client.txmonitor.TxMonitor`.  It has the same modal
+    properties, but polls FLDIGI from a task on the event loop rather than from a daemon thread.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.asyncclient.AsyncClient` when it is constructed.
+    '''
+
+    def __init__(self, clientObj):
+        self.logger = logging.getLogger('pyfldigi.client.asynctxmonitor')
+        self.clientObj = clientObj
+        self.client = clientObj.client
+
+        # Modal properties
+        self.interval = 1  # The current interval, in seconds
+        self.tx_interval = 0.15  # seconds.  The max interval between polls while transmitting
+        self.rx_interval = 2.0  # seconds.  The max interval between polls while receiving (or paused)
+        self.transmitting = False
+        self.max_duty_cycle = 95  # percent
+        self.duty_cycle_period = 60  # seconds
+        self.max_xmit_time = 2 * 60  # seconds.  should be enough for a modicum amount of ragchewing
+        self.max_length = 10000   # characters
+        self.xmit_timeout = 1.5  # Timeout after last bit of transmitted data
+        self.adaptive = True  # pace the polls with _PollRate (see TxMonitor)
+
+        self.events = EventBus()  # See TxMonitor
+        self.published_state = None
+        self.duty_cycle_above = False
+
+        self.history = _History()
+        self.last_state = None
+        self.rate = _PollRate()
+        self.watchdog = _Watchdog()
+        self.paused = False
+        self.heartbeat = self.watchdog.heartbeat
+        self.polls = 0  # of completed polls
+        self.tx_mode = None  # the modem of the current (or last) transmission
+        self.task = None
+        self._condition = None  # created on start(), so that it is bound to the running event loop
+        self._wakeup = None
+
+    def start(self):
+        '''Starts the monitor task on the running event loop.  Does nothing if it's already running.'''
+        if self.is_running():
+            return
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+            self._wakeup = asyncio.Event()
+        self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        '''Cancels the monitor task and waits for it to finish'''
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    def is_running(self):
+        return self.task is not None and not self.task.done()
+
+    async def run(self):
+        self.logger.debug('TXMONITOR: Task started.')
+        while True:
+            self._wakeup.clear()  # before polling, so a wake() during the poll isn't lost
+            started = time.time()
+            if self.paused is True:
+                self.interval = self.rx_interval
+            else:
+                try:
+                    await self.poll()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.interval = self.watchdog.failed(e)
+                    self.logger.warning('TXMONITOR: Poll failed ({} in a row), retrying in {:.1f}s: {}'.format(
+                        self.watchdog.consecutive_errors, self.interval, e))
+                    self.events.publish('error', error=e, message=str(e))
+                else:
+                    if self.watchdog.succeeded():
+                        self.logger.info('TXMONITOR: Recovered')
+            self.watchdog.finished(started, self.interval)
+            self.heartbeat = self.watchdog.heartbeat
+            self.polls += 1
+            async with self._condition:
+                self._condition.notify_all()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self):
+        '''Polls FLDIGI once.  See :py:meth:`pyfldigi.client.txmonitor.TxMonitor.poll`'''
+        state = await self.clientObj.main.get_trx_state()
+        previous_state, self.last_state = self.last_state, state
+        self.history.update_state(state)
+        if state == 'TX' and previous_state != 'TX':
+            self.tx_mode = await self.clientObj.modem.name
+            self.rate.tx_started(self.tx_mode)
+
+        data = None
+        if state != 'RX' or previous_state != 'RX':  # TX data isn't needed while sitting in RX
+            data = await self.clientObj.text.get_tx_data(suppress_errors=True)
+            if data is not None:
+                if len(data) > 0:
+                    if self.logger.isEnabledFor(logging.DEBUG):  # don't format every chunk for nothing
+                        self.logger.debug('TXMONITOR: TX DATA: {}'.format(data))
+                    gap = self.history.get_last_txdata_time()
+                    self.history.append_txdata(data)
+                    if previous_state == 'TX' and gap is not None:
+                        self.rate.observe(len(data), gap)
+                        if gap <= self.get_xmit_timeout():  # a longer gap means the TX text ran dry
+                            self.clientObj.airtime.observe(self.tx_mode, len(data), gap)
+        _publish_state(self, state)
+        _publish_txdata(self, data)
+
+        xmit_timeout = self.get_xmit_timeout()
+        t = self.history.get_last_txdata_time()
+        if state == 'TX':
+            self.interval = self.tx_interval  # Speed up the task rate while transmitting
+            if t is None or t <= xmit_timeout:
+                self.transmitting = True
+            else:
+                await self.clientObj.main.rx()  # put the state back into receive
+                self.transmitting = False
+                state = 'RX'
+                self.rate.turnaround(t)
+                _publish_state(self, state)
+                self.logger.info('Changing state back to RX... (last transmitted byte was {} seconds ago'.format(t))
+        elif state == 'ERROR':
+            self.transmitting = False
+            raise RuntimeError('Could not read the TRX state from FLDIGI')
+        else:
+            self.interval = self.rx_interval
+            self.transmitting = False
+        if self.adaptive is True:
+            self.rate.tx_interval = self.tx_interval
+            self.rate.max_idle_interval = self.rx_interval
+            self.interval = self.rate.next(state, t, xmit_timeout)
+        _publish_duty_cycle(self)
+        if previous_state == 'TX' and state != 'TX':
+            # file I/O: in a worker thread, not on the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.clientObj.airtime.flush)
+
+    def pause(self):
+        '''See :py:meth:`pyfldigi.client.txmonitor.TxMonitor.pause`'''
+        self.paused = True
+
+    def resume(self):
+        '''See :py:meth:`pyfldigi.client.txmonitor.TxMonitor.resume`'''
+        self.paused = False
+        self.wake()
+
+    def wake(self):
+        '''Makes the monitor poll right away, instead of at the end of its current interval'''
+        self.rate.wake()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def get_xmit_timeout(self):
+        '''See :py:meth:`pyfldigi.client.txmonitor.TxMonitor.get_xmit_timeout`'''
+        if self.adaptive is True:
+            return self.rate.xmit_timeout(self.xmit_timeout)
+        return self.xmit_timeout
+
+    def metrics(self):
+        '''See :py:meth:`pyfldigi.client.txmonitor.TxMonitor.metrics`'''
+        metrics = self.rate.to_dict()
+        metrics['xmit_timeout'] = self.get_xmit_timeout()
+        metrics.update(self.watchdog.to_dict())
+        metrics['running'] = self.is_running()
+        metrics['paused'] = self.paused
+        return metrics
+
+    async def wait_for(self, predicate, timeout):
+        '''Waits (without blocking the event loop) until predicate() returns True.  predicate() is re-evaluated
+        every time the monitor has polled FLDIGI.
+
+        :raises asyncio.TimeoutError: if predicate() didn't become True within the timeout
+        '''
+        self.start()
+        async with self._condition:
+            await asyncio.wait_for(self._condition.wait_for(predicate), timeout)
+
+    def get_state(self):
+        return self.history.get_state()
+
+    def get_duty_cycle(self, sample_period=60):
+        return self.history.get_duty_cycle(sample_period)
+
+    def timeline(self):
+        return self.history.to_numpy()
+
+    def get_last_txdata_time(self):
+        return self.history.get_last_txdata_time()
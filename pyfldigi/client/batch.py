@@ -0,0 +1,193 @@
+'''Batching of several XML-RPC calls into a single round trip, using system.multicall
+'''
+
+import logging
+import xmlrpc.client
+
+
+# Casts applied to the raw XML-RPC return values, so that batched results come back with the same types as the
+# equivalent properties under Main, Modem, Rig, Flmsg, etc.
+CONVERTERS = {'main.get_trx_status': lambda state: str(state).upper(),
+              'main.get_afc': bool,
+              'main.get_squelch': bool,
+              'main.get_reverse': bool,
+              'main.get_lock': bool,
+              'main.get_rsid': bool,
+              'main.flmsg_online': bool,
+              'main.flmsg_available': bool,
+              'main.flmsg_squelch': bool}
+
+
+class BatchResult(object):
+
+    '''The result of a single call queued in a :py:class:`pyfldigi.client.batch.Batch`.
+
+    The value is only available after the batch has been executed.
+    '''
+
+    def __init__(self, method, params, convert=None):
+        self.method = method
+        self.params = params
+        self.convert = convert
+        self._done = False
+        self._value = None
+        self._fault = None
+
+    def done(self):
+        '''Returns True if the batch containing this call has been executed'''
+        return self._done
+
+    def set_value(self, value):
+        if self.convert is not None:
+            value = self.convert(value)
+        self._value = value
+        self._done = True
+
+    def set_fault(self, fault):
+        self._fault = fault
+        self._done = True
+
+    @property
+    def value(self):
+        '''The (typed) value returned by FLDIGI.
+
+        :raises RuntimeError: if the batch hasn't been executed yet.
+        :raises xmlrpc.client.Fault: if FLDIGI returned a fault for this particular call.
+        '''
+        if self._done is False:
+            raise RuntimeError('{}() has not been executed yet.  Call execute() on the batch first.'.format(self.method))
+        if self._fault is not None:
+            raise self._fault
+        return self._value
+
+    def __repr__(self):
+        if self._done is False:
+            return '<BatchResult {}() pending>'.format(self.method)
+        elif self._fault is not None:
+            return '<BatchResult {}() fault={}>'.format(self.method, self._fault.faultString)
+        return '<BatchResult {}() = {!r}>'.format(self.method, self._value)
+
+
+class _BatchMethod(object):
+
+    '''Allows the XML-RPC names to be chained, e.g. batch.rig.get_frequency(), the same as with ServerProxy'''
+
+    def __init__(self, batch, name):
+        self._batch = batch
+        self._name = name
+
+    def __getattr__(self, name):
+        return _BatchMethod(self._batch, '{}.{}'.format(self._name, name))
+
+    def __call__(self, *args):
+        return self._batch.call(self._name, *args)
+
+
+class Batch(object):
+
+    '''Queues up XML-RPC calls, and sends them to FLDIGI all at once as a single system.multicall request.
+
+    Calls are queued using the XML-RPC method names (the same names used by ServerProxy).  Each queued call
+    returns a :py:class:`pyfldigi.client.batch.BatchResult` whose value becomes available once the batch has been
+    executed.  When used as a context manager, the batch is executed when the 'with' block exits.
+
+    If FLDIGI does not support system.multicall, the calls are sent one after the other over the client's
+    keep-alive connection instead.
+
+    .. note:: Use :py:meth:`pyfldigi.client.client.Client.batch` to create an instance of this class.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> with fldigi.batch() as b:
+    ...     state = b.main.get_trx_status()
+    ...     afc = b.main.get_afc()
+    ...     freq = b.rig.get_frequency()
+    ...     modem = b.modem.get_name()
+    >>> state.value, afc.value, freq.value, modem.value
+    ('RX', True, 7070200.0, 'BPSK31')
+    '''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.client = clientObj.client
+        self.logger = logging.getLogger('pyfldigi.client.batch')
+        self.results = []
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _BatchMethod(self, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+    def __len__(self):
+        return len(self.results)
+
+    def call(self, method, *args, convert=None):
+        '''Queues an XML-RPC call
+
+        :param method: The XML-RPC method name, e.g. 'rig.get_frequency'
+        :type method: str
+        :param args: The parameters to pass to the XML-RPC method
+        :param convert: A callable to cast the returned value with.  If None, the default cast for the method (if
+                        any) is used.
+        :type convert: callable
+
+        :returns: A placeholder for the result
+        :rtype: :py:class:`pyfldigi.client.batch.BatchResult`
+        '''
+        if convert is None:
+            convert = CONVERTERS.get(method)
+        result = BatchResult(method, args, convert=convert)
+        self.results.append(result)
+        return result
+
+    def execute(self):
+        '''Sends all of the queued calls to FLDIGI and fills in their results.
+
+        :returns: The results, in the same order that the calls were queued
+        :rtype: list of :py:class:`pyfldigi.client.batch.BatchResult`
+        '''
+        pending = [r for r in self.results if not r.done()]
+        if len(pending) == 0:
+            return self.results
+        if self.clientObj.multicall_supported is not False:
+            try:
+                self._execute_multicall(pending)
+            except xmlrpc.client.Fault as e:
+                # The multicall itself was rejected, i.e. this version of FLDIGI doesn't support it.
+                self.logger.info('system.multicall is not supported by the server ({}).  Falling back to sequential calls.'.format(e.faultString))
+                self.clientObj.multicall_supported = False
+            else:
+                self.clientObj.multicall_supported = True
+                return self.results
+        self._execute_sequential(pending)
+        return self.results
+
+    def _execute_multicall(self, pending):
+        calls = [{'methodName': r.method, 'params': list(r.params)} for r in pending]
+        responses = self.client.system.multicall(calls)
+        if len(responses) != len(pending):
+            raise xmlrpc.client.ResponseError('system.multicall returned {} results for {} calls'.format(len(responses), len(pending)))
+        for result, response in zip(pending, responses):
+            if isinstance(response, dict):
+                result.set_fault(xmlrpc.client.Fault(response.get('faultCode'), response.get('faultString')))
+            else:
+                result.set_value(response[0])
+
+    def _execute_sequential(self, pending):
+        for result in pending:
+            method = self.client
+            for name in result.method.split('.'):
+                method = getattr(method, name)
+            try:
+                result.set_value(method(*result.params))
+            except xmlrpc.client.Fault as e:
+                result.set_fault(e)
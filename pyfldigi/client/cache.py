@@ -0,0 +1,134 @@
+'''Read-through cache for FLDIGI metadata that rarely (if ever) changes while FLDIGI is running.
+'''
+
+import time
+import logging
+import threading
+
+
+# Default time-to-live, in seconds, keyed by the XML-RPC method that fetches the value.
+DEFAULT_TTLS = {'fldigi.list': 3600,
+                'fldigi.version_struct': 3600,
+                'fldigi.config_dir': 3600,
+                'modem.get_names': 3600,
+                'modem.get_max_id': 3600,
+                'main.get_max_macro_id': 300,
+                'rig.get_modes': 300,
+                'rig.get_bandwidths': 300,
+                'rx.context': 1}  # what the RX pump tags each chunk with (see pyfldigi.client.rxstream.RxContext)
+
+# Cached values that go stale when a given XML-RPC setter is called.
+RELATED = {'rig.set_name': ['rig.get_modes', 'rig.get_bandwidths'],
+           'rig.set_modes': ['rig.get_modes'],
+           'rig.set_bandwidths': ['rig.get_bandwidths'],
+           'rig.set_frequency': ['rx.context'],
+           'rig.set_mode': ['rx.context'],
+           'modem.set_by_name': ['rx.context'],
+           'modem.set_by_id': ['rx.context'],
+           'modem.set_carrier': ['rx.context'],
+           'modem.search_up': ['rx.context'],
+           'modem.search_down': ['rx.context']}
+
+
+def _copy(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class MetadataCache(object):
+
+    '''Per-client read-through cache with a time-to-live per key.
+
+    Values are keyed by the XML-RPC method name that fetches them (e.g. 'rig.get_modes').  A value is fetched from
+    FLDIGI on the first read, then served from memory until its TTL runs out, it's invalidated explicitly, or a
+    related setter is called (e.g. setting :py:attr:`pyfldigi.client.rig.Rig.name` invalidates the rig modes and
+    bandwidths).  A value that was being fetched while its key was invalidated isn't cached, since it may be stale.
+
+    Lists and dicts are handed out as copies, so a caller changing one doesn't change it for everyone else.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` as 'cache'.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> fldigi.modem.names  # fetched from FLDIGI
+    ['NULL', 'CW', 'CTSTIA', ...]
+    >>> fldigi.modem.names  # served from the cache
+    ['NULL', 'CW', 'CTSTIA', ...]
+    >>> fldigi.cache.stats()
+    {'hits': 1, 'misses': 1, 'size': 1}
+    >>> fldigi.cache.ttls['rig.get_modes'] = 0  # never cache the rig modes
+    >>> fldigi.cache.invalidate('modem.get_names')  # force a re-read next time
+    '''
+
+    def __init__(self, ttls=None):
+        self.logger = logging.getLogger('pyfldigi.client.cache')
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls is not None:
+            self.ttls.update(ttls)
+        self.hits = 0
+        self.misses = 0
+        self._values = {}  # key -> (expiry time, value)
+        self._generations = {}  # key -> # of times it's been invalidated.  See get()
+        self._generation = 0  # # of times the whole cache has been cleared
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        '''Returns the cached value for key, or calls loader() to fetch (and cache) it.
+
+        :param key: The cache key, usually the XML-RPC method name
+        :type key: str
+        :param loader: Called with no arguments to fetch the value on a miss
+        :type loader: callable
+        '''
+        now = time.time()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return _copy(entry[1])
+            self.misses += 1
+            generation = (self._generation, self._generations.get(key, 0))
+        value = loader()
+        ttl = self.ttls.get(key, 0)
+        if ttl > 0:
+            with self._lock:
+                # Don't cache what was read before an invalidate() that happened while it was being read
+                if generation == (self._generation, self._generations.get(key, 0)):
+                    self._values[key] = (now + ttl, value)
+        return _copy(value)
+
+    def invalidate(self, *keys):
+        '''Drops the given keys from the cache.  If no keys are given, the whole cache is cleared.'''
+        with self._lock:
+            if len(keys) == 0:
+                self._values.clear()
+                self._generation += 1
+            for key in keys:
+                self._values.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def invalidate_related(self, setter):
+        '''Drops the cached values that the given XML-RPC setter affects (see RELATED)'''
+        keys = RELATED.get(setter)
+        if keys:
+            self.logger.debug('{}() invalidates {}'.format(setter, keys))
+            self.invalidate(*keys)
+
+    def stats(self):
+        '''Returns the hit/miss counters and the # of cached values
+
+        :rtype: dict
+        '''
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._values)}
+
+    def reset_stats(self):
+        '''Zeroes the hit/miss counters'''
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
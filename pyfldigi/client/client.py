@@ -4,18 +4,36 @@
 
 import time
 import logging
+import importlib
 import threading
 import xmlrpc.client
 from .transport import RequestsTransport
-from .txmonitor import TxMonitor
-from .main import Main
-from .modem import Modem
-from .rig import Rig
-from .log import Log
-from .text import Text
-from .ioconfig import Io
-from .flmsg import Flmsg
-from .pskreporter import Spot
+from .cache import MetadataCache
+
+
+class _Namespace(object):
+
+    '''Creates a namespace object (Main, Modem, ...) the first time it's accessed on a Client.
+
+    The module that defines it isn't even imported until then.  The instance is stored in the Client's __dict__,
+    which takes precedence over this (non-data) descriptor, so subsequent lookups cost nothing extra.
+    '''
+
+    def __init__(self, name, module, cls):
+        self.name = name
+        self.module = module
+        self.cls = cls
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        with obj._namespace_lock:
+            namespace = obj.__dict__.get(self.name)
+            if namespace is None:
+                cls = getattr(importlib.import_module(self.module, __package__), self.cls)
+                namespace = cls(clientObj=obj)
+                obj.__dict__[self.name] = namespace
+        return namespace
 
 
 class Client(object):
@@ -30,6 +48,36 @@ class Client(object):
     :param port: The port of the xml-rpc FLDIGI interfac (usually 7362)
     :type port: int
 
+    :param pool_size: The max # of keep-alive connections kept open to FLDIGI.  Calls made from the TX Monitor thread
+                      and user threads share these connections.
+    :type pool_size: int
+
+    :param monitor: When to start the TX Monitor thread.  'auto' starts it whenever this client keys the
+                    transmitter (main.tx(), main.tune(), main.send(), main.run_macro()) and it isn't running.  True
+                    starts it right away, and False never starts it (call txmonitor.start() yourself).
+    :type monitor: str or bool
+
+    :param instrument: If True, record per XML-RPC method call counts, errors, bytes in/out and latency histograms.
+                       See :py:meth:`stats`.  Can be toggled later with transport.stats.enabled.
+    :type instrument: bool
+
+    :param scheduler: If given, the TX Monitor is polled by this shared scheduler rather than by its own thread.
+                      See :py:class:`pyfldigi.client.pool.ClientPool`.
+    :type scheduler: :py:class:`pyfldigi.client.pool.MonitorScheduler`
+
+    :param airtime_file: A JSON file to keep the learned character rates in, across runs.  They're loaded from it on
+                         first use, and saved back after every transmission.  See
+                         :py:class:`pyfldigi.client.airtime.AirtimeModel`
+    :type airtime_file: str
+
+    :param lease: If True, this client takes a cross-process lease on the transmitter before keying it
+                  (main.send(), main.tx(), main.tune() and the TX queue), so that several processes can share one
+                  FLDIGI without clobbering each other's transmissions.  See :py:class:`pyfldigi.client.lease.TxLease`
+    :type lease: bool
+
+    :param lease_port: The local port the lease is arbitrated on (default: port + 1000)
+    :type lease_port: int
+
     :Example:
 
     >>> import pyfldigi
@@ -43,12 +91,13 @@ class Client(object):
         times.  It monitors Transmit duty cycle (%), max transmit time (seconds) aka Dead Man's Switch?, and max text
         length.  You can set these with getters and setters (TBD), but you should probably just leave them alone.
 
-        You get all of this functionality for free.  I don't see any use-case where it wouldn't be useful, so it can't
-        be disabled.  It uses a daemon thread which starts when Client() is instantiated (which calls Text()), and
-        ends when the program shuts down.
+        You get all of this functionality for free.  It uses a daemon thread which (by default) starts the first time
+        this client keys the transmitter, and ends when the program shuts down.  Scripts that only read settings never
+        start it.  See the 'monitor' parameter.
 
     .. note::
-        Instances of the following classes will be instantiated and added as properties to the Client() object:
+        Instances of the following classes will be instantiated (on first access) and added as properties to the
+        Client() object:
 
         * :py:class:`pyfldigi.client.modem.Modem` as 'modem'
         * :py:class:`pyfldigi.client.main.Main` as 'main'
@@ -58,26 +107,94 @@ class Client(object):
         * :py:class:`pyfldigi.client.pskreporter.Spot` as 'spot'
         * :py:class:`pyfldigi.client.flmsg.Flmsg` as 'flmsg'
         * :py:class:`pyfldigi.client.ioconfig.Io` as 'io'
+        * :py:class:`pyfldigi.client.txmonitor.TxMonitor` as 'txmonitor'
+        * :py:class:`pyfldigi.client.txqueue.TxQueue` as 'txqueue'
+        * :py:class:`pyfldigi.client.airtime.AirtimeModel` as 'airtime'
+        * :py:class:`pyfldigi.client.lease.TxLease` as 'lease'
+        * :py:class:`pyfldigi.client.rxstream.RxPump` as 'rxpump'
+        * :py:class:`pyfldigi.client.rxarchive.RxArchive` as 'rxarchive'
+        * :py:class:`pyfldigi.client.cache.MetadataCache` as 'cache'
 
         The purpose of pigeon-holing the functions into classes is to provide a convenient namespace, similar to
         the XML-RPC function names.  I've taken a bit of artistic liberty with naming and grouping!
     '''
 
-    def __init__(self, hostname='127.0.0.1', port=7362, reset=True, log=False):
+    main = _Namespace('main', '.main', 'Main')
+    modem = _Namespace('modem', '.modem', 'Modem')
+    rig = _Namespace('rig', '.rig', 'Rig')
+    log = _Namespace('log', '.log', 'Log')
+    text = _Namespace('text', '.text', 'Text')
+    spot = _Namespace('spot', '.pskreporter', 'Spot')
+    flmsg = _Namespace('flmsg', '.flmsg', 'Flmsg')
+    io = _Namespace('io', '.ioconfig', 'Io')
+    txmonitor = _Namespace('txmonitor', '.txmonitor', 'TxMonitor')
+    txqueue = _Namespace('txqueue', '.txqueue', 'TxQueue')
+    airtime = _Namespace('airtime', '.airtime', 'AirtimeModel')
+    lease = _Namespace('lease', '.lease', 'TxLease')
+    rxpump = _Namespace('rxpump', '.rxstream', 'RxPump')
+    rxarchive = _Namespace('rxarchive', '.rxarchive', 'RxArchive')
+
+    def __init__(self, hostname='127.0.0.1', port=7362, reset=True, log=False, pool_size=4, monitor='auto', instrument=False, scheduler=None, airtime_file=None, lease=False, lease_port=None):
         self.logger = logging.getLogger('pyfldigi.Client')
         self.ip_address = hostname
         self.port = port
         self.logger.debug('Attempting to connect to connect to fldigi at IP address={}, port={}, via XMP-RPC'.format(self.ip_address, self.port))
-        self.client = xmlrpc.client.ServerProxy('http://{}:{}/'.format(self.ip_address, self.port), transport=RequestsTransport(use_builtin_types=True), allow_none=True)
-        self.main = Main(clientObj=self)
-        self.modem = Modem(clientObj=self)
-        self.rig = Rig(clientObj=self)
-        self.log = Log(clientObj=self)
-        self.text = Text(clientObj=self)
-        self.spot = Spot(clientObj=self)
-        self.flmsg = Flmsg(clientObj=self)
-        self.io = Io(clientObj=self)
-        self.txmonitor = TxMonitor(clientObj=self)  # do this last
+        self.url = 'http://{}:{}/'.format(self.ip_address, self.port)
+        self.transport = RequestsTransport(use_builtin_types=True, pool_maxsize=pool_size, instrument=instrument)
+        self.client = xmlrpc.client.ServerProxy(self.url, transport=self.transport, allow_none=True)
+        self.multicall_supported = None  # Unknown until the first batch is executed
+        self.cache = MetadataCache()
+        self._namespace_lock = threading.RLock()
+        if monitor not in ['auto', True, False]:
+            raise ValueError('monitor must be \'auto\', True, or False')
+        self.monitor = monitor
+        self.scheduler = scheduler
+        self.airtime_file = airtime_file
+        self.use_lease = lease
+        self.lease_port = lease_port
+        if self.monitor is True:
+            self.ensure_txmonitor()
+
+    def ensure_txmonitor(self):
+        '''Starts the TX Monitor if it isn't running (and the 'monitor' setting allows it).
+
+        This gets called automatically right before this client keys the transmitter, so a monitor that was stopped
+        with txmonitor.stop() is started again rather than leaving the transmitter keyed.
+        '''
+        if self.monitor is False:
+            return
+        self.txmonitor.start()  # does nothing if it's running already
+
+    def acquire_lease(self, timeout=None):
+        '''Waits for the TX lease, if this client uses one (see the 'lease' parameter).  Called before this client
+        keys the transmitter.
+
+        :returns: True if this call acquired the lease, i.e. it's up to the caller to release it if it doesn't key
+                  the transmitter after all
+        :rtype: bool
+        :raises TimeoutError: if the lease wasn't granted within the timeout
+        '''
+        if self.use_lease is True:
+            return self.lease.acquire(timeout)
+        return False
+
+    def release_lease(self):
+        '''Releases the TX lease, if this client holds one.  Called when this client puts FLDIGI back into receive.'''
+        lease = self.__dict__.get('lease')
+        if lease is not None:
+            lease.release()
+
+    def holds_lease(self):
+        '''Returns True if this client may touch the transmitter: it holds the TX lease, or doesn't use one'''
+        return self.use_lease is False or self.lease.held is True
+
+    def wake_txmonitor(self):
+        '''Makes the TX Monitor poll right away (if it exists), so it notices a transmission without waiting out its
+        current interval.  Called after this client keys the transmitter or adds TX text.
+        '''
+        txmonitor = self.__dict__.get('txmonitor')
+        if txmonitor is not None:
+            txmonitor.wake()
 
     def startLogger(self, level=logging.INFO, filename=None):
         '''Call this method if you don't have a dedicated logger in your python script.'''
@@ -110,7 +227,7 @@ class Client(object):
         >>> fldigi.methods
         [{'name': fldigi.list, 'signature': 'A:n', 'help': 'Returns the list of methods.'}, ... ]
         '''
-        return self.client.fldigi.list()
+        return self.cache.get('fldigi.list', self.client.fldigi.list)
 
     @property
     def name(self):
@@ -128,6 +245,7 @@ class Client(object):
         '''
         name = self.client.fldigi.name()
         self.logger.debug('name returned {}'.format(name))
+        return name
 
     @property
     def version(self):
@@ -143,7 +261,7 @@ class Client(object):
         >>> fldigi.version
         {'major': 3, 'minor': 23, 'patch': '.17'}
         '''
-        return self.client.fldigi.version_struct()
+        return self.cache.get('fldigi.version_struct', self.client.fldigi.version_struct)
 
     @property
     def config_dir(self):
@@ -159,7 +277,49 @@ class Client(object):
         >>> fldigi.config_dir
         'C:/Users/jeff/fldigi.files/'
         '''
-        return self.client.fldigi.config_dir()
+        return self.cache.get('fldigi.config_dir', self.client.fldigi.config_dir)
+
+    def stats(self):
+        '''Returns per XML-RPC method statistics (only recorded if the client was created with instrument=True)
+
+        :returns: A dict keyed by XML-RPC method name.  See :py:meth:`pyfldigi.client.stats.RpcStats.snapshot`
+        :rtype: dict
+
+        :Example:
+
+        >>> import pyfldigi
+        >>> fldigi = pyfldigi.Client(instrument=True)
+        >>> fldigi.rig.frequency
+        7070200.0
+        >>> fldigi.stats()['rig.get_frequency']
+        {'calls': 1, 'errors': 0, 'bytes_out': 111, 'bytes_in': 152, 'mean': 0.0012, 'max': 0.0012,
+         'p50': 0.0011, 'p95': 0.0019, 'p99': 0.0020, 'histogram': [0, 0, 0, 1, 0, ...]}
+        '''
+        return self.transport.stats.snapshot()
+
+    def reset_stats(self):
+        '''Clears the per XML-RPC method statistics returned by :py:meth:`stats`'''
+        self.transport.stats.reset()
+
+    def batch(self):
+        '''Returns a new batch, which sends several XML-RPC calls to FLDIGI in a single round trip.
+
+        :returns: A new, empty batch.  Use it as a context manager, or call execute() when done queueing calls.
+        :rtype: :py:class:`pyfldigi.client.batch.Batch`
+
+        :Example:
+
+        >>> import pyfldigi
+        >>> fldigi = pyfldigi.Client()
+        >>> with fldigi.batch() as b:
+        ...     freq = b.rig.get_frequency()
+        ...     mode = b.rig.get_mode()
+        ...     squelch = b.main.get_squelch()
+        >>> freq.value, mode.value, squelch.value
+        (7070200.0, 'USB', False)
+        '''
+        from .batch import Batch
+        return Batch(clientObj=self)
 
     def terminate(self, save_options=True, save_log=True, save_macros=True):
         '''Terminates fldigi. Sent as a bitmask specifying data to save: 0=options; 1=log; 2=macros
@@ -181,6 +341,7 @@ class Client(object):
         '''
         bitmask = int('0b{}{}{}'.format(int(save_macros), int(save_log), int(save_options)), 0)
         self.client.fldigi.terminate(bitmask)
+        self.cache.invalidate()
 
     def delay(self, milliseconds):
         '''Simple delay / blocking call
@@ -0,0 +1,204 @@
+'''Publish/subscribe for TX Monitor events: state changes, TX data, duty cycle threshold crossings and errors.
+'''
+
+import time
+import queue
+import asyncio
+import logging
+import threading
+import collections
+
+# The kinds of events, and what's in their 'data' dict:
+#   'state'      : {'old': previous state, 'new': new state}  (states are 'TX', 'RX', 'TUNE' or 'ERROR')
+#   'txdata'     : {'data': the TX data that just went out (bytes or str)}
+#   'duty_cycle' : {'duty_cycle': %, 'threshold': %, 'sample_period': seconds, 'above': True if it went over}
+#   'error'      : {'error': the exception (or None), 'message': str}
+EVENTS = ['state', 'txdata', 'duty_cycle', 'error']
+
+Event = collections.namedtuple('Event', ['kind', 'time', 'data'])
+
+
+class Subscription(object):
+
+    '''Returned by :py:meth:`EventBus.subscribe`.  Call cancel() to stop receiving events.'''
+
+    def __init__(self, bus, callback, kinds):
+        self.bus = bus
+        self.callback = callback
+        self.kinds = kinds
+
+    def wants(self, event):
+        return self.kinds is None or event.kind in self.kinds
+
+    def deliver(self, event):
+        self.callback(event)
+
+    def cancel(self):
+        self.bus.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+
+    '''Returned by :py:meth:`EventBus.stream`: an async iterator of events, for use with 'async for'.
+
+    Events are handed over to the event loop it was created on.  If the consumer falls more than 'maxsize' events
+    behind, new events are dropped (and counted in 'dropped') rather than piling up.
+    '''
+
+    def __init__(self, bus, kinds, maxsize, loop):
+        super().__init__(bus, None, kinds)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # the event loop is closed
+            self.cancel()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    async def get(self, timeout=None):
+        '''Returns the next event
+
+        :raises asyncio.TimeoutError: if there wasn't one within the timeout
+        '''
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class EventBus(object):
+
+    '''Delivers TX Monitor events to subscribers, without ever holding up the monitor.
+
+    The monitor publishes into a bounded queue (an O(1), non-blocking put), and a dispatcher thread calls the
+    subscribers from there.  A slow subscriber therefore only delays other subscribers, never TX-off detection.
+    If the queue fills up anyway, the oldest event is dropped to make room and counted in 'dropped'.
+
+    Nothing is queued while there are no subscribers, and the dispatcher thread is only started by the first
+    subscription.
+
+    .. note:: An instance of this class is created under each TX Monitor as 'events'.
+
+    :param maxsize: The max # of events waiting to be dispatched
+    :type maxsize: int
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> sub = fldigi.txmonitor.events.subscribe(print, kinds=['state'])
+    >>> fldigi.main.send('CQ CQ CQ de KM4YRI')
+    Event(kind='state', time=1507307810.41, data={'old': 'RX', 'new': 'TX'})
+    Event(kind='state', time=1507307819.03, data={'old': 'TX', 'new': 'RX'})
+    >>> sub.cancel()
+
+    >>> async for event in fldigi.txmonitor.events.stream(['txdata']):  # asyncio
+    ...     print(event.data['data'])
+    '''
+
+    def __init__(self, maxsize=1024):
+        self.logger = logging.getLogger('pyfldigi.client.events')
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.published = 0
+        self._queue = queue.Queue(maxsize)
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def active(self):
+        '''True if anyone is subscribed (publishers can skip work that only matters to subscribers)'''
+        return len(self._subscriptions) > 0
+
+    def subscribe(self, callback, kinds=None):
+        '''Calls callback(event) for every event of the given kinds, from the dispatcher thread.
+
+        :param callback: Called with an :py:data:`Event`.  Exceptions it raises are logged and otherwise ignored.
+        :type callback: callable
+        :param kinds: The kinds of events to receive (see EVENTS).  None means all of them.
+        :type kinds: list
+        :rtype: Subscription
+        '''
+        return self._add(Subscription(self, callback, self._kinds(kinds)))
+
+    def stream(self, kinds=None, maxsize=256):
+        '''Returns an async iterator of events, for asyncio code.  Must be called from the event loop's thread.
+
+        :param kinds: The kinds of events to receive (see EVENTS).  None means all of them.
+        :type kinds: list
+        :param maxsize: The max # of undelivered events kept for this subscriber
+        :type maxsize: int
+        :rtype: AsyncSubscription
+        '''
+        return self._add(AsyncSubscription(self, self._kinds(kinds), maxsize, asyncio.get_running_loop()))
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def publish(self, kind, **data):
+        '''Queues an event for the subscribers.  Never blocks.'''
+        if len(self._subscriptions) == 0:
+            return
+        event = Event(kind, time.time(), data)
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self.published += 1
+
+    def stats(self):
+        '''Returns the # of subscribers, and of events published, waiting, and dropped
+
+        :rtype: dict
+        '''
+        return {'subscribers': len(self._subscriptions),
+                'published': self.published,
+                'pending': self._queue.qsize(),
+                'dropped': self.dropped}
+
+    @staticmethod
+    def _kinds(kinds):
+        if kinds is None:
+            return None
+        kinds = set(kinds)
+        unknown = kinds - set(EVENTS)
+        if len(unknown) > 0:
+            raise ValueError('unknown event kinds {}, must be in: {}'.format(sorted(unknown), EVENTS))
+        return kinds
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]  # copy on write, so dispatch needs no lock
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name='pyfldigi-events', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def _dispatch(self):
+        while True:
+            event = self._queue.get()
+            for subscription in self._subscriptions:
+                if subscription.wants(event):
+                    try:
+                        subscription.deliver(event)
+                    except Exception as e:
+                        self.logger.warning('Event subscriber {!r} failed on {}: {}'.format(subscription.callback, event, e))
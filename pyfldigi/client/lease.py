@@ -0,0 +1,342 @@
+'''Cross-process TX lease: lets several processes (or clients) share one FLDIGI, and the radio behind it, without
+clobbering each other's transmissions.
+'''
+
+import os
+import time
+import socket
+import logging
+import selectors
+import threading
+import collections
+
+LEASE_PORT_OFFSET = 1000  # the lease for FLDIGI on port 7362 is arbitrated on port 8362
+
+_arbiters = {}  # (hostname, port) -> _Arbiter running in this process
+_arbiters_lock = threading.Lock()
+
+
+class _Arbiter(object):
+
+    '''Grants the lease to one connection at a time, first come first served.
+
+    It runs in whichever process managed to bind the lease port first, as a daemon thread.  The protocol is one
+    line per message: a client sends 'ACQUIRE <ttl>' and waits for 'GRANTED'.  The holder sends 'HEARTBEAT' at least
+    every <ttl> seconds, or it's sent 'EXPIRED' and the lease goes to the next in line.  Closing the connection
+    releases the lease (or gives up the place in line), so a process that dies can't keep it.
+    '''
+
+    def __init__(self, server):
+        self.logger = logging.getLogger('pyfldigi.client.lease')
+        self.server = server
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(server, selectors.EVENT_READ)
+        self.buffers = {}  # connection -> partial line received
+        self.ttls = {}  # connection -> the ttl it asked for
+        self.waiting = collections.deque()
+        self.holder = None
+        self.expires = None
+        self.grants = 0
+        self.expired = 0
+        self._thread = threading.Thread(target=self._run, name='pyfldigi-lease-arbiter', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self._step()
+            except Exception as e:  # keep arbitrating: a dead arbiter would leave every client waiting forever
+                self.logger.exception('TX lease arbiter error: {}'.format(e))
+
+    def _step(self):
+        timeout = None if self.holder is None else max(0.0, self.expires - time.time())
+        for key, mask in self.selector.select(timeout):
+            if key.fileobj is self.server:
+                self._accept()
+            else:
+                try:
+                    self._read(key.fileobj)
+                except Exception:
+                    self._drop(key.fileobj)
+                    raise
+        if self.holder is not None and time.time() >= self.expires:
+            self.logger.warning('TX lease expired: the holder stopped sending heartbeats')
+            self.expired += 1
+            self._send(self.holder, b'EXPIRED\n')
+            self._drop(self.holder)
+        self._grant()
+
+    def _accept(self):
+        try:
+            conn, address = self.server.accept()
+        except OSError:
+            return
+        conn.setblocking(False)
+        self.buffers[conn] = b''
+        self.selector.register(conn, selectors.EVENT_READ)
+
+    def _read(self, conn):
+        try:
+            data = conn.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if len(data) == 0:
+            self._drop(conn)
+            return
+        lines = (self.buffers[conn] + data).split(b'\n')
+        self.buffers[conn] = lines.pop()
+        for line in lines:
+            if self._command(conn, line.split()) is False:
+                self.logger.warning('TX lease arbiter: dropping a connection that sent {!r}'.format(line[0:64]))
+                self._drop(conn)
+                return
+
+    def _command(self, conn, words):
+        '''Handles one line from a connection.  Returns False if the line isn't valid.'''
+        if len(words) == 0:
+            return True
+        if words[0] == b'ACQUIRE' and len(words) <= 2:
+            try:
+                ttl = float(words[1]) if len(words) > 1 else 10.0
+            except ValueError:
+                return False
+            if not 0 < ttl < float('inf'):
+                return False
+            if conn is not self.holder and conn not in self.waiting:
+                self.ttls[conn] = ttl
+                self.waiting.append(conn)
+            return True
+        if words[0] == b'HEARTBEAT' and len(words) == 1:
+            if conn is self.holder:
+                self.expires = time.time() + self.ttls[conn]
+            return True
+        return False
+
+    def _grant(self):
+        while self.holder is None and len(self.waiting) > 0:
+            conn = self.waiting.popleft()
+            if self._send(conn, b'GRANTED\n'):
+                self.holder = conn
+                self.expires = time.time() + self.ttls[conn]
+                self.grants += 1
+            else:
+                self._drop(conn)
+
+    def _send(self, conn, message):
+        try:
+            conn.sendall(message)
+            return True
+        except OSError:
+            return False
+
+    def _drop(self, conn):
+        if conn is self.holder:
+            self.holder = None
+        if conn in self.waiting:
+            self.waiting.remove(conn)
+        self.buffers.pop(conn, None)
+        self.ttls.pop(conn, None)
+        try:
+            self.selector.unregister(conn)
+        except (KeyError, ValueError):
+            pass
+        conn.close()
+
+
+def _start_arbiter(address):
+    '''Starts an arbiter for the address in this process, unless there's one already (here or elsewhere)'''
+    with _arbiters_lock:
+        if address in _arbiters:
+            return
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if os.name == 'posix':  # elsewhere, SO_REUSEADDR would let two arbiters bind the same port
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind(address)
+            server.listen(16)
+        except OSError:  # another process got there first
+            server.close()
+            return
+        server.setblocking(False)
+        _arbiters[address] = _Arbiter(server)
+
+
+class TxLease(object):
+
+    '''A lease on the transmitter, shared by every client (in any process on this machine) that talks to the same
+    FLDIGI with leasing enabled.
+
+    Only the holder keys the transmitter, adds TX text or puts FLDIGI back into receive.  Everyone else waits in
+    line, first come first served, blocked on a socket rather than retrying.  The lease is released when the
+    holder's transmission ends (the TX Monitor puts FLDIGI back into receive, or :py:meth:`pyfldigi.client.main.Main.rx`
+    / :py:meth:`pyfldigi.client.main.Main.abort` is called), or when its process exits.
+
+    The holder's TX Monitor renews the lease with a heartbeat as it polls.  If the monitor stalls for 'ttl'
+    seconds, the lease expires and goes to the next in line.
+
+    The line is kept by an arbiter thread, in whichever process first binds the lease port on 127.0.0.1 (by default,
+    FLDIGI's XML-RPC port + LEASE_PORT_OFFSET).  If that process exits, the others elect a new one.
+
+    While a client doesn't hold the lease, its TX Monitor leaves other clients' transmissions alone: it doesn't read
+    the TX data, doesn't put FLDIGI back into receive, and polls at its RX rate.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client`
+              as 'lease'.  It's only used if the client was created with lease=True.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client(lease=True)  # in each of the processes sharing FLDIGI
+    >>> fldigi.main.send('CQ CQ CQ de KM4YRI')  # waits for the lease if another process is transmitting
+    >>> with fldigi.lease:  # hold it across several operations
+    ...     fldigi.main.send('QST QST QST')
+    ...     fldigi.main.send('de KM4YRI')
+    '''
+
+    def __init__(self, clientObj=None, hostname='127.0.0.1', port=None, ttl=10.0):
+        self.clientObj = clientObj
+        self.logger = logging.getLogger('pyfldigi.client.lease')
+        if port is None:
+            port = getattr(clientObj, 'lease_port', None)
+        if port is None:
+            port = clientObj.port + LEASE_PORT_OFFSET
+        self.address = (hostname, port)
+        self.ttl = ttl  # seconds without a heartbeat before the lease expires
+        self.held = False
+        self.acquired_at = None
+        self.acquisitions = 0
+        self.lost = 0  # of times the lease expired while held
+        self.waited = 0.0  # total seconds spent waiting for the lease
+        self._depth = 0  # nesting of 'with' blocks
+        self._socket = None
+        self._last_heartbeat = None
+        self._waiting = threading.Lock()  # one thread in line at a time
+        self._lock = threading.RLock()  # guards the state, and is never held while waiting
+
+    def __enter__(self):
+        self.acquire()
+        with self._lock:
+            self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self._depth -= 1
+            if self._depth == 0:
+                self.release()
+
+    def _connect(self, timeout):
+        for attempt in range(0, 3):
+            try:
+                return socket.create_connection(self.address, timeout=timeout)
+            except ConnectionRefusedError:
+                _start_arbiter(self.address)
+        raise ConnectionError('could not reach or start the TX lease arbiter on {}:{}'.format(*self.address))
+
+    def acquire(self, timeout=None):
+        '''Waits for the lease.  Does nothing if this client holds it already.
+
+        :param timeout: The max # of seconds to wait (None waits as long as it takes)
+        :type timeout: float
+        :returns: True if this call acquired the lease, False if it was held already
+        :rtype: bool
+        :raises TimeoutError: if the lease wasn't granted within the timeout
+        '''
+        with self._waiting:
+            if self.held is True:
+                return False
+            start = time.time()
+            while True:
+                remaining = None if timeout is None else max(0.001, timeout - (time.time() - start))
+                sock = self._connect(1.0 if remaining is None else min(1.0, remaining))
+                try:
+                    sock.settimeout(remaining)
+                    sock.sendall('ACQUIRE {}\n'.format(self.ttl).encode('ascii'))
+                    reply = self._readline(sock)
+                except OSError:  # including socket.timeout
+                    reply = b''
+                if reply == b'GRANTED':
+                    break
+                sock.close()
+                if timeout is not None and time.time() - start >= timeout:
+                    self.waited += time.time() - start
+                    raise TimeoutError('Timeout while waiting for the TX lease')
+                # the arbiter went away: elect a new one, and get back in line
+            sock.settimeout(None)
+            with self._lock:
+                self._socket = sock
+                self.held = True
+                self.acquired_at = self._last_heartbeat = time.time()
+                self.acquisitions += 1
+                self.waited += self.acquired_at - start
+            self.logger.debug('Acquired the TX lease after {:.3f}s'.format(self.acquired_at - start))
+            return True
+
+    @staticmethod
+    def _readline(sock):
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(64)
+            if len(chunk) == 0:
+                return b''
+            data += chunk
+        return data.strip()
+
+    def release(self):
+        '''Gives the lease to the next in line.  Does nothing if this client doesn't hold it, or if it's held by a
+        'with' block.
+        '''
+        with self._lock:
+            if self.held is False or self._depth > 0:
+                return
+            self._close()
+            self.logger.debug('Released the TX lease')
+
+    def _close(self):
+        self.held = False
+        self.acquired_at = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def heartbeat(self):
+        '''Renews the lease (at most every ttl / 3 seconds), and checks that it hasn't expired.  Called by the TX
+        Monitor every time it polls.
+
+        :returns: True if this client still holds the lease
+        :rtype: bool
+        '''
+        with self._lock:
+            if self.held is False:
+                return False
+            now = time.time()
+            try:
+                self._socket.setblocking(False)
+                try:
+                    message = self._socket.recv(64)
+                except (BlockingIOError, InterruptedError):
+                    message = None
+                if message is not None:  # EXPIRED, or the arbiter went away
+                    raise ConnectionError(message)
+                if now - self._last_heartbeat >= self.ttl / 3:
+                    self._socket.sendall(b'HEARTBEAT\n')
+                    self._last_heartbeat = now
+            except OSError:
+                self.logger.warning('Lost the TX lease')
+                self.lost += 1
+                self._depth = 0
+                self._close()
+                return False
+            finally:
+                if self._socket is not None:
+                    self._socket.setblocking(True)
+            return True
+
+    def stats(self):
+        '''Returns whether the lease is held, and the # of acquisitions, leases lost, and seconds spent waiting
+
+        :rtype: dict
+        '''
+        return {'held': self.held, 'acquisitions': self.acquisitions, 'lost': self.lost, 'waited': self.waited}
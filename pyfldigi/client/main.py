@@ -10,12 +10,19 @@ class Main(object):
     '''All the commands under 'fldigi.main' in the XML-RPC spec for fldigi.
 
     .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` when it is constructed.
+
+    .. attribute:: get_trx_status
+
+        Prebuilt callable for the raw 'main.get_trx_status' XML-RPC call (see
+        :py:meth:`pyfldigi.client.transport.RequestsTransport.fast_method`).  Returns 'tx', 'rx', or 'tune'.
+        :py:meth:`get_trx_state` is built on top of this.
     '''
 
     def __init__(self, clientObj):
         self.clientObj = clientObj
         self.client = clientObj.client
         self.logger = logging.getLogger('pyfldigi.client.main')
+        self.get_trx_status = clientObj.transport.fast_method(clientObj.url, 'main.get_trx_status')
 
     @property
     def status1(self):
@@ -284,7 +291,7 @@ class Main(object):
         '''
         for tries in range(0, 3):  # retry up to 3 times.
             try:
-                state = str(self.client.main.get_trx_status()).upper()
+                state = str(self.get_trx_status()).upper()
             except Exception as e:
                 if suppress_errors is False:
                     raise
@@ -314,6 +321,7 @@ class Main(object):
         '''
         self.logger.debug('Setting FLDIGI to RX mode')
         self.client.main.rx()
+        self.clientObj.release_lease()
 
     def tx(self):
         '''Puts fldigi into transmit mode.  This will key the PTT or VOX via CAT control.
@@ -329,7 +337,10 @@ class Main(object):
         >>> fldigi.main.rx()  # Put flgidigi into receive mode
         '''
         self.logger.debug('Setting FLDIGI to TX mode')
+        self.clientObj.acquire_lease()
+        self.clientObj.ensure_txmonitor()
         self.client.main.tx()
+        self.clientObj.wake_txmonitor()
 
     def tune(self):
         '''Puts fldigi into tune mode.  I'm assuming that this allows antenna tuning via CAT/RIG control.
@@ -341,7 +352,10 @@ class Main(object):
         >>> fldigi.main.tune()  # Put flgidigi into tune mode
         '''
         self.logger.debug('Setting FLDIGI to TUNE mode')
+        self.clientObj.acquire_lease()
+        self.clientObj.ensure_txmonitor()
         self.client.main.tune()
+        self.clientObj.wake_txmonitor()
 
     def abort(self):
         '''Aborts a transmit or tune
@@ -355,6 +369,7 @@ class Main(object):
         >>> fldigi.main.abort()  # abort the transmit
         '''
         self.client.main.abort()
+        self.clientObj.release_lease()
 
     def run_macro(self, macroNum):
         '''Runs a macro
@@ -362,7 +377,10 @@ class Main(object):
         :param macroNum: The macro # to run.  Must be a valid #.
         :type macroNum: int
         '''
-        return self.client.main.run_macro(int(macroNum))
+        self.clientObj.ensure_txmonitor()  # macros can key the transmitter
+        ret = self.client.main.run_macro(int(macroNum))
+        self.clientObj.wake_txmonitor()
+        return ret
 
     def get_max_macro_id(self):
         '''Returns the maximum macro ID number
@@ -370,16 +388,17 @@ class Main(object):
         :returns: The maximum macro ID number
         :rtype: int
         '''
-        return self.client.main.get_max_macro_id()
+        return self.clientObj.cache.get('main.get_max_macro_id', self.client.main.get_max_macro_id)
 
-    def send(self, data, block=True, timeout=10):
+    def send(self, data, block=True, timeout=None):
         '''This is the preferred way of sending a block of text.
 
         :param data: The text or data to encode and transmit
         :type data: str or bytes
         :param block: if True, the function blocks until all data has been transmitted.  If False, this method returns immediately while the radio transmits.
         :type block: bool
-        :param timeout: The # of seconds to wait before returning a TimeoutError
+        :param timeout: The # of seconds to wait before returning a TimeoutError.  If None, it's worked out from how
+                        long the text should take in the current modem.  See :py:class:`pyfldigi.client.airtime.AirtimeModel`
         :type timeout: float or int
 
         .. warning::
@@ -396,32 +415,47 @@ class Main(object):
         >>> # Make sure to set up the modem and rig settings here!!!
         >>> c.main.send('Lorem ipsum dolor sit amet', timeout=50)
         '''
-        state = self.clientObj.main.get_trx_state()
-        self.logger.debug('send(): state={}'.format(state))
-
-        if state == 'TX':  # already chooching
-            tx_start = time.time()
-            self.clientObj.text.add_tx(data)
-        elif state == 'RX':
-            self.clientObj.text.clear_tx()
-            self.clientObj.txmonitor.history.txdata_history = []  # clear
-            tx_start = time.time()
-            self.clientObj.main.tx()
-            self.clientObj.text.add_tx(data)
-
+        if timeout is None:
+            timeout = self.clientObj.airtime.timeout(data, self.clientObj.modem.name)
+        deadline = time.time() + timeout  # for the whole call: waiting for the lease, then transmitting
+        # with a lease, wait for other clients' transmissions to finish
+        acquired = self.clientObj.acquire_lease(max(0, deadline - time.time()))
+        keyed = False
+        try:
+            self.clientObj.ensure_txmonitor()
+            txmonitor = self.clientObj.txmonitor
+            state = self.clientObj.main.get_trx_state()
+            self.logger.debug('send(): state={}'.format(state))
+
+            if state == 'TX':  # already chooching
+                polls = txmonitor.polls
+                self.clientObj.text.add_tx(data)
+                keyed = True
+            elif state == 'RX':
+                self.clientObj.text.clear_tx()
+                with txmonitor.condition:
+                    txmonitor.history.clear_txdata()
+                polls = txmonitor.polls
+                self.clientObj.main.tx()
+                keyed = True
+                self.clientObj.text.add_tx(data)
+            else:
+                raise Exception('cannot transmit if FLDIGI state is \'{}\''.format(state))
+        except BaseException:
+            if acquired is True and keyed is False:
+                self.clientObj.release_lease()  # nothing was transmitted, so the monitor won't release it
+            raise
+
+        if state == 'RX':
             # wait until the first character has been transmitted, even if non blocking
-            while(1):
-                if len(self.clientObj.txmonitor.history.txdata_history) >= 1:
-                    break
-                if time.time() - tx_start >= timeout:
-                    raise TimeoutError('Timeout while transmitting, waiting for first byte to go out')
-        else:
-            raise Exception('cannot transmit if FLDIGI state is \'{}\''.format(state))
+            if not txmonitor.wait_for(lambda: len(txmonitor.history.txdata) >= 1, max(0, deadline - time.time())):
+                raise TimeoutError('Timeout while transmitting, waiting for first byte to go out')
 
         if block is True:
-            while(1):
-                if self.clientObj.txmonitor.transmitting is False:
-                    self.logger.debug('Returning from blocking call to send()...')
-                    break
-                if time.time() - tx_start >= timeout:
-                    raise TimeoutError('Timeout while transmitting, waiting for text to be transmitted')
+            # Only trust 'transmitting' once a whole poll has run since the text was added (a poll that was already
+            # under way when it was added may have read the TX data just before)
+            remaining = max(deadline - time.time(), 0)
+            if not txmonitor.wait_for(lambda: txmonitor.polls > polls + 1 and txmonitor.transmitting is False, remaining):
+                raise TimeoutError('Timeout while transmitting, waiting for text to be transmitted')
+            self.clientObj.airtime.flush()  # so what was learned is saved by the time send() returns
+            self.logger.debug('Returning from blocking call to send()...')
@@ -46,6 +46,7 @@ class Modem(object):
         '''Sets the current modem.
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
         self.client.modem.set_by_name(str(value))
+        self.clientObj.cache.invalidate_related('modem.set_by_name')
 
     @property
     def names(self):
@@ -75,7 +76,7 @@ class Modem(object):
         'PSK800RC2', 'PSK1000RC2', 'FSQ', 'IFKP', 'SSB', 'WWV', 'ANALYSIS', 'FREQSCAN']
 
         '''
-        return self.client.modem.get_names()
+        return self.clientObj.cache.get('modem.get_names', self.client.modem.get_names)
 
     @property
     def id(self):
@@ -109,6 +110,7 @@ class Modem(object):
         '''Sets the current modem.
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
         self.client.modem.set_by_id(int(value))
+        self.clientObj.cache.invalidate_related('modem.set_by_id')
 
     @property
     def max_id(self):
@@ -123,7 +125,7 @@ class Modem(object):
         >>> fldigi.modem.max_id
         124
         '''
-        return self.client.modem.get_max_id()
+        return self.clientObj.cache.get('modem.get_max_id', self.client.modem.get_max_id)
 
     @property
     def carrier(self):
@@ -156,6 +158,7 @@ class Modem(object):
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property
         '''
         self.client.modem.set_carrier(int(freq))
+        self.clientObj.cache.invalidate_related('modem.set_carrier')
 
     @property
     def afc_search_range(self):
@@ -224,6 +227,7 @@ class Modem(object):
         >>> fldigi.modem.search_up()
         '''
         self.client.modem.search_up()
+        self.clientObj.cache.invalidate_related('modem.search_up')
 
     def search_down(self):
         '''Searches downward in frequency
@@ -235,6 +239,7 @@ class Modem(object):
         >>> fldigi.modem.search_up()
         '''
         self.client.modem.search_down()
+        self.clientObj.cache.invalidate_related('modem.search_down')
 
 
 class Olivia(object):
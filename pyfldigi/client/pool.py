@@ -0,0 +1,258 @@
+'''Drive several FLDIGI instances (e.g. one per radio / sound card) from one process.
+'''
+
+import time
+import heapq
+import logging
+import operator
+import itertools
+import threading
+import concurrent.futures
+from .client import Client
+
+
+class MonitorScheduler(object):
+
+    '''Polls many TX Monitors from a single scheduler thread, instead of running one thread per monitor.
+
+    Monitors are kept in a heap ordered by when they're next due.  When a monitor comes due, its
+    :py:meth:`pyfldigi.client.txmonitor.TxMonitor.poll` is run on the (bounded) executor, and the monitor is put
+    back in the heap using the interval poll() returned.  A monitor is never polled twice at the same time.
+
+    :param executor: Where the polls are run
+    :type executor: concurrent.futures.Executor
+    '''
+
+    def __init__(self, executor):
+        self.logger = logging.getLogger('pyfldigi.client.pool.MonitorScheduler')
+        self.executor = executor
+        self._heap = []  # (due time, sequence #, monitor, generation)
+        self._scheduled = {}  # id() -> generation, for every monitor that's added (in the heap or being polled)
+        self._inflight = {}  # id() -> future, for every poll that's running
+        self._woken = set()  # id() of monitors woken up while being polled
+        self._sequence = itertools.count()
+        self._generation = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='pyfldigi-monitor-scheduler', daemon=True)
+        self._thread.start()
+
+    def add(self, monitor):
+        '''Starts polling a monitor (right away).  Does nothing if it's already being polled.'''
+        with self._condition:
+            if id(monitor) in self._scheduled:
+                return
+            generation = next(self._generation)
+            self._scheduled[id(monitor)] = generation
+            if id(monitor) not in self._inflight:  # otherwise it's pushed once the poll that's running is done
+                self._push(monitor, time.time(), generation)
+
+    def remove(self, monitor):
+        '''Stops polling a monitor.  A poll that's running is allowed to finish.
+
+        :returns: The future of the monitor's poll that's running, or None if there isn't one
+        :rtype: concurrent.futures.Future
+        '''
+        with self._condition:
+            self._scheduled.pop(id(monitor), None)
+            self._woken.discard(id(monitor))
+            self._heap = [entry for entry in self._heap if entry[2] is not monitor]
+            heapq.heapify(self._heap)
+            return self._inflight.get(id(monitor))
+
+    def wake(self, monitor):
+        '''Polls a monitor right away, instead of when it's next due.  If it's being polled right now, it's polled
+        again as soon as that poll is done.
+        '''
+        with self._condition:
+            if id(monitor) not in self._scheduled:
+                return
+            for i, (due, sequence, entry, generation) in enumerate(self._heap):
+                if entry is monitor:
+                    self._heap[i] = (time.time(), sequence, monitor, generation)
+                    heapq.heapify(self._heap)
+                    self._condition.notify_all()
+                    return
+            self._woken.add(id(monitor))
+
+    def stop(self):
+        '''Stops the scheduler thread.  Polls that are already running are allowed to finish.'''
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _push(self, monitor, due, generation):
+        heapq.heappush(self._heap, (due, next(self._sequence), monitor, generation))
+        self._condition.notify_all()
+
+    def _run(self):
+        with self._condition:
+            while not self._stopped:
+                if len(self._heap) == 0:
+                    self._condition.wait()
+                    continue
+                due, sequence, monitor, generation = self._heap[0]
+                wait = due - time.time()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                future = self.executor.submit(monitor.poll)
+                self._inflight[id(monitor)] = future
+                future.add_done_callback(lambda f, monitor=monitor, generation=generation:
+                                         self._polled(monitor, generation, f))
+
+    def _polled(self, monitor, generation, future):
+        try:
+            interval = future.result()
+        except Exception as e:
+            self.logger.warning('TX Monitor poll failed: {}'.format(e))
+            interval = monitor.interval
+        with self._condition:
+            del self._inflight[id(monitor)]
+            current = self._scheduled.get(id(monitor))
+            if current is None:
+                return  # removed while it was being polled
+            if current != generation:
+                # removed and added again while it was being polled: start polling it again, right away
+                self._woken.discard(id(monitor))
+                self._push(monitor, time.time(), current)
+                return
+            if interval is None:
+                del self._scheduled[id(monitor)]
+                self._woken.discard(id(monitor))
+                return
+            if id(monitor) in self._woken:
+                self._woken.discard(id(monitor))
+                interval = 0
+            self._push(monitor, time.time() + interval, generation)
+
+
+class ClientPool(object):
+
+    '''Manages :py:class:`pyfldigi.client.client.Client` objects for many FLDIGI instances, and fans operations out
+    to all of them in parallel.
+
+    All of the clients share one bounded worker pool for fan-out operations, and one :py:class:`MonitorScheduler`
+    (with a small worker pool of its own) for their TX Monitors, so N instances don't mean N monitor threads.  The
+    monitors never wait behind fan-out calls: a pool.call('main.send', ...) that fills every worker still gets
+    its sends released by the monitors.
+
+    :param endpoints: The FLDIGI instances, as (hostname, port) tuples.  A bare port means ('127.0.0.1', port).
+    :type endpoints: list
+    :param max_workers: The max # of worker threads for fan-out operations
+    :type max_workers: int
+    :param monitor_workers: The max # of worker threads for TX Monitor polls
+    :type monitor_workers: int
+    :param client_kwargs: Passed on to each Client (e.g. pool_size, instrument)
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> from pyfldigi.client.pool import ClientPool
+    >>> with ClientPool([7362, 7363, ('192.168.1.20', 7362)]) as pool:
+    ...     pool.get('rig.frequency')
+    {('127.0.0.1', 7362): 7070200.0, ('127.0.0.1', 7363): 14070000.0, ('192.168.1.20', 7362): 3580000.0}
+    ...     pool.map(lambda client: client.main.send('CQ CQ CQ de KM4YRI'))
+    {('127.0.0.1', 7362): None, ('127.0.0.1', 7363): None, ('192.168.1.20', 7362): None}
+    >>> pool[7363].modem.name
+    'BPSK31'
+    '''
+
+    def __init__(self, endpoints, max_workers=8, monitor_workers=2, **client_kwargs):
+        self.logger = logging.getLogger('pyfldigi.client.pool')
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.monitor_executor = concurrent.futures.ThreadPoolExecutor(max_workers=monitor_workers)
+        self.scheduler = MonitorScheduler(self.monitor_executor)
+        self.client_kwargs = client_kwargs
+        self.clients = {}  # insertion ordered
+        for endpoint in endpoints:
+            self.add(endpoint)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getitem__(self, endpoint):
+        return self.clients[self._endpoint(endpoint)]
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def __len__(self):
+        return len(self.clients)
+
+    @staticmethod
+    def _endpoint(endpoint):
+        if isinstance(endpoint, int):
+            return ('127.0.0.1', endpoint)
+        hostname, port = endpoint
+        return (str(hostname), int(port))
+
+    def add(self, endpoint):
+        '''Adds an FLDIGI instance to the pool, and returns its client'''
+        endpoint = self._endpoint(endpoint)
+        if endpoint not in self.clients:
+            kwargs = dict(self.client_kwargs)
+            kwargs['scheduler'] = self.scheduler
+            self.clients[endpoint] = Client(hostname=endpoint[0], port=endpoint[1], **kwargs)
+        return self.clients[endpoint]
+
+    def remove(self, endpoint):
+        '''Removes an FLDIGI instance from the pool'''
+        client = self.clients.pop(self._endpoint(endpoint))
+        client.txmonitor.stop()
+        client.transport.close()
+
+    def map(self, func, return_exceptions=False, timeout=None):
+        '''Calls func(client) for every client in parallel.
+
+        :param func: Called with each Client
+        :type func: callable
+        :param return_exceptions: If True, an exception raised for one endpoint is returned as that endpoint's result.
+                                  If False, the first exception is raised (after all of the calls have finished).
+        :type return_exceptions: bool
+        :param timeout: The max # of seconds to wait for all of the results
+        :type timeout: float
+        :returns: The results, keyed by (hostname, port)
+        :rtype: dict
+        '''
+        futures = {endpoint: self.executor.submit(func, client) for endpoint, client in self.clients.items()}
+        concurrent.futures.wait(futures.values(), timeout=timeout)
+        results = {}
+        for endpoint, future in futures.items():
+            try:
+                results[endpoint] = future.result(timeout=0)
+            except Exception as e:
+                if return_exceptions is False:
+                    raise
+                results[endpoint] = e
+        return results
+
+    def get(self, attribute, return_exceptions=False, timeout=None):
+        '''Reads the same attribute from every client in parallel, e.g. pool.get('rig.frequency')
+
+        :returns: The values, keyed by (hostname, port)
+        :rtype: dict
+        '''
+        return self.map(operator.attrgetter(attribute), return_exceptions=return_exceptions, timeout=timeout)
+
+    def call(self, method, *args, return_exceptions=False, timeout=None):
+        '''Calls the same method on every client in parallel, e.g. pool.call('main.send', 'CQ CQ')
+
+        :returns: The return values, keyed by (hostname, port)
+        :rtype: dict
+        '''
+        getter = operator.attrgetter(method)
+        return self.map(lambda client: getter(client)(*args), return_exceptions=return_exceptions, timeout=timeout)
+
+    def close(self):
+        '''Stops TX monitoring, shuts down the worker threads, and closes all connections'''
+        self.scheduler.stop()
+        self.executor.shutdown(wait=True)
+        self.monitor_executor.shutdown(wait=True)
+        for client in self.clients.values():
+            client.transport.close()
@@ -38,7 +38,9 @@ class Rig(object):
     def name(self, name):
         '''Sets the rig name for xmlrpc rig
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
-        return self.client.rig.set_name(str(name))
+        ret = self.client.rig.set_name(str(name))
+        self.clientObj.cache.invalidate_related('rig.set_name')
+        return ret
 
     @property
     def frequency(self):
@@ -64,7 +66,9 @@ class Rig(object):
     def frequency(self, freq):
         '''Sets the RF carrier frequency. Returns the old value
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
-        return self.client.rig.set_frequency(float(freq))
+        ret = self.client.rig.set_frequency(float(freq))
+        self.clientObj.cache.invalidate_related('rig.set_frequency')
+        return ret
 
     @property
     def modes(self):
@@ -81,13 +85,14 @@ class Rig(object):
         >>> fldigi.rig.modes  # read to demonstrate its initial value
         ['NONE', 'AM', 'CW', 'USB', 'LSB', 'RTTY', 'FM', 'WFM', 'CWR', 'RTTYR', 'AMS', 'PKTLSB', 'PKTUSB', 'PKTFM']
         '''
-        return self.client.rig.get_modes()
+        return self.clientObj.cache.get('rig.get_modes', self.client.rig.get_modes)
 
     @modes.setter
     def modes(self, value):
         '''Sets the list of available rig modes
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
         self.client.rig.set_modes(value)
+        self.clientObj.cache.invalidate_related('rig.set_modes')
 
     @property
     def mode(self):
@@ -114,6 +119,7 @@ class Rig(object):
         '''Selects a mode previously added by rig.set_modes
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
         self.client.rig.set_mode(str(value))
+        self.clientObj.cache.invalidate_related('rig.set_mode')
 
     @property
     def bandwidths(self):
@@ -130,13 +136,14 @@ class Rig(object):
         >>> fldigi.rig.bandwidths
         ['  ']  # This is what my radio returns :-/
         '''
-        return self.client.rig.get_bandwidths()
+        return self.clientObj.cache.get('rig.get_bandwidths', self.client.rig.get_bandwidths)
 
     @bandwidths.setter
     def bandwidths(self, bandwidths):
         '''Sets the list of available rig bandwidths
         NOTE: sphinx ignores docstrings from setters, the documentation is above under the @property'''
         self.client.rig.set_bandwidths(bandwidths)
+        self.clientObj.cache.invalidate_related('rig.set_bandwidths')
 
     @property
     def bandwidth(self):
@@ -0,0 +1,314 @@
+'''RX archive: keeps the most recent received text in a fixed-size ring buffer, indexed by callsign and keyword as it
+arrives.
+'''
+
+import re
+import logging
+import threading
+import collections
+
+RxHit = collections.namedtuple('RxHit', ['time', 'offset', 'term'])
+RxHit.__doc__ = '''A callsign or keyword heard: when (as time.time()), where (the archive offset of its first byte), and
+what (upper case)'''
+
+CALLSIGN_PATTERN = rb'\b(?:[A-Z]{1,2}|[A-Z][0-9]|[0-9][A-Z])[0-9][A-Z]{1,4}(?:/[A-Z0-9]{1,4})?\b'
+_SEPARATOR = re.compile(rb'[^A-Z0-9/]')
+_MAX_WORD = 32  # bytes.  A longer run of callsign characters can't hold a callsign, and isn't carried over.
+
+
+def _upper(term):
+    '''Upper-cases a keyword or callsign the way the received text is (bytes.upper(), i.e. ASCII letters only), as
+    UTF-8 bytes
+    '''
+    return term.encode('utf-8').upper()
+
+
+class _KeywordAutomaton(object):
+
+    '''Aho-Corasick automaton over bytes, that matches every keyword in a single pass over the text.  It's fed text
+    as it arrives, and keeps its state from one chunk to the next, so keywords split across chunks still match.
+    '''
+
+    def __init__(self, keywords):
+        self.goto = [{}]  # state -> {byte: next state}
+        self.fail = [0]
+        self.output = [[]]  # state -> keywords that end here
+        for keyword in keywords:
+            self._add(keyword)
+        self._link()
+        self.state = 0
+
+    def _add(self, keyword):
+        state = 0
+        for byte in keyword:
+            if byte not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][byte] = len(self.goto) - 1
+            state = self.goto[state][byte]
+        self.output[state].append(keyword)
+
+    def _link(self):
+        level = collections.deque(self.goto[0].values())
+        while len(level) > 0:
+            state = level.popleft()
+            for byte, child in self.goto[state].items():
+                level.append(child)
+                fallback = self.fail[state]
+                while fallback != 0 and byte not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(byte, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def feed(self, data):
+        '''Yields (index of the last byte, keyword) for every keyword that ends in data'''
+        goto, fail, output = self.goto, self.fail, self.output
+        state = self.state
+        for i, byte in enumerate(data):
+            while state != 0 and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            for keyword in output[state]:
+                yield i, keyword
+        self.state = state
+
+
+class RxArchive(object):
+
+    '''Keeps the last `size` bytes of received text (UTF-8) in a ring buffer, and an index of the callsigns and
+    keywords in it.
+
+    Text is only scanned once, as it arrives: callsigns with a regex (:py:data:`CALLSIGN_PATTERN`), and keywords
+    with an Aho-Corasick automaton, both case-insensitive and both carrying their state from one chunk to the next.
+    Every hit goes into a per-term list, in order, and is forgotten when its text is overwritten in the ring buffer.
+    So queries like "when did we last hear K1ABC?" cost O(hits), however much text is archived.
+
+    Text is addressed by offset: the # of bytes received before it, since the archive was created.  Only offsets
+    from :py:attr:`oldest` on are still in the buffer.
+
+    :py:meth:`start` feeds it from the client's :py:class:`pyfldigi.client.rxstream.RxPump`, in a background thread.
+    It can also be fed by hand with :py:meth:`feed`.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` as 'rxarchive'.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> fldigi.rxarchive.add_keywords(['CQ', 'QRZ'])
+    >>> fldigi.rxarchive.start()
+    >>> hit = fldigi.rxarchive.last_heard('K1ABC')
+    >>> hit
+    RxHit(time=1507307810.41, offset=18234, term='K1ABC')
+    >>> fldigi.rxarchive.context(hit)
+    'CQ CQ de K1ABC K1ABC pse K'
+    >>> len(fldigi.rxarchive.hits('CQ'))
+    12
+    '''
+
+    def __init__(self, clientObj=None, size=1 << 20, keywords=()):
+        self.clientObj = clientObj
+        self.logger = logging.getLogger('pyfldigi.client.rxarchive')
+        self.size = size  # bytes
+        self.total = 0  # bytes received, ever.  The offset the next byte will get.
+        self.callsigns = re.compile(CALLSIGN_PATTERN)
+        self._buffer = bytearray(size)
+        self._keywords = set()
+        self._automaton = _KeywordAutomaton([])
+        self._pending = b''  # the end of the last chunk, that may be the start of a callsign (None: of a long word)
+        self._hits = {}  # term -> deque of RxHit, oldest first
+        self._order = collections.deque()  # every RxHit, oldest first, to forget them as the text is overwritten
+        self._lock = threading.RLock()
+        self._subscription = None
+        self._thread = None
+        self.add_keywords(keywords)
+
+    @property
+    def oldest(self):
+        '''The offset of the oldest byte still in the buffer'''
+        return max(0, self.total - self.size)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def keywords(self):
+        return sorted(k.decode('utf-8') for k in self._keywords)
+
+    def add_keywords(self, keywords):
+        '''Adds keywords to look for in the text received from now on.  The search ignores the case of ASCII letters.'''
+        with self._lock:
+            self._keywords.update(_upper(k) for k in keywords)
+            self._automaton = _KeywordAutomaton(sorted(self._keywords))  # a keyword split across this call is missed
+
+    def remove_keywords(self, keywords):
+        '''Stops looking for keywords.  Their hits so far stay in the index.'''
+        with self._lock:
+            self._keywords.difference_update(_upper(k) for k in keywords)
+            self._automaton = _KeywordAutomaton(sorted(self._keywords))
+
+    def feed(self, chunk):
+        '''Archives and indexes a chunk of received text
+
+        :param chunk: The text, and when it was received
+        :type chunk: :py:data:`pyfldigi.client.rxstream.RxChunk`
+        '''
+        data = chunk.text.encode('utf-8')
+        if len(data) == 0:
+            return
+        with self._lock:
+            start = self.total
+            self._write(data)
+            upper = data.upper()  # only changes ASCII letters, so the offsets still match
+            hits = [RxHit(chunk.time, start + end + 1 - len(keyword), keyword.decode('utf-8'))
+                    for end, keyword in self._automaton.feed(upper)]
+            hits.extend(self._scan_callsigns(upper, start, chunk.time))
+            for hit in sorted(hits, key=lambda hit: hit.offset):
+                self._add(hit)
+            self._forget()
+
+    def _write(self, data):
+        if len(data) > self.size:  # only the end of it fits
+            self.total += len(data) - self.size
+            data = data[-self.size:]
+        position = self.total % self.size
+        first = min(len(data), self.size - position)
+        self._buffer[position:position + first] = data[0:first]
+        self._buffer[0:len(data) - first] = data[first:]
+        self.total += len(data)
+
+    def _scan_callsigns(self, upper, start, t):
+        '''Returns the callsigns that end in this chunk (they can start in the previous ones)'''
+        if self._pending is None:  # in the middle of a word that's too long to be a callsign: skip the rest of it
+            separator = _SEPARATOR.search(upper)
+            if separator is None:
+                return []
+            upper, start, self._pending = upper[separator.start():], start + separator.start(), b''
+        text = self._pending + upper
+        base = start - len(self._pending)
+        separators = list(_SEPARATOR.finditer(text))
+        if len(separators) == 0:  # the word goes on
+            self._pending = text if len(text) <= _MAX_WORD else None
+            return []
+        cut = separators[-1].end()
+        self._pending = text[cut:] if len(text) - cut <= _MAX_WORD else None
+        return [RxHit(t, base + match.start(), match.group().decode('ascii'))
+                for match in self.callsigns.finditer(text, 0, cut)]
+
+    def _add(self, hit):
+        # A callsign can start before the keywords found in the previous chunks: insert it in order, from the end
+        hits = self._hits.setdefault(hit.term, collections.deque())
+        i = len(hits)
+        while i > 0 and hits[i - 1].offset > hit.offset:
+            i -= 1
+        if i > 0 and hits[i - 1].offset == hit.offset:  # both a keyword and a callsign
+            return
+        hits.insert(i, hit)
+        i = len(self._order)
+        while i > 0 and self._order[i - 1].offset > hit.offset:
+            i -= 1
+        self._order.insert(i, hit)
+
+    def _forget(self):
+        oldest = self.oldest
+        while len(self._order) > 0 and self._order[0].offset < oldest:
+            hit = self._order.popleft()
+            hits = self._hits[hit.term]
+            hits.popleft()
+            if len(hits) == 0:
+                del self._hits[hit.term]
+
+    def last_heard(self, term):
+        '''Returns the most recent hit for a callsign or keyword, or None if it isn't in the archive
+
+        :rtype: :py:data:`RxHit`
+        '''
+        with self._lock:
+            hits = self._hits.get(_upper(term).decode('utf-8'))
+            return hits[-1] if hits else None
+
+    def hits(self, term, since=None):
+        '''Returns the hits for a callsign or keyword still in the archive, newest first
+
+        :param since: Only the hits from this time (as time.time()) on
+        :type since: float
+        :rtype: list
+        '''
+        result = []
+        with self._lock:
+            for hit in reversed(self._hits.get(_upper(term).decode('utf-8'), ())):
+                if since is not None and hit.time < since:
+                    break
+                result.append(hit)
+        return result
+
+    def terms(self):
+        '''Returns {callsign or keyword: # of hits} for everything in the archive'''
+        with self._lock:
+            return {term: len(hits) for term, hits in self._hits.items()}
+
+    def text(self, start=None, end=None):
+        '''Returns the archived text between two offsets (default: all of it).  Offsets that have been overwritten
+        are skipped, and a character cut in two at either end is replaced with U+FFFD.
+
+        :rtype: str
+        '''
+        with self._lock:
+            start = self.oldest if start is None else min(max(start, self.oldest), self.total)
+            end = self.total if end is None else min(max(end, start), self.total)
+            first, last = start % self.size, end % self.size
+            if end - start == 0:
+                data = b''
+            elif first < last:
+                data = bytes(self._buffer[first:last])
+            else:
+                data = bytes(self._buffer[first:]) + bytes(self._buffer[0:last])
+        return data.decode('utf-8', errors='replace')
+
+    def context(self, hit, before=40, after=40):
+        '''Returns the text around a hit: up to `before` bytes before it, and `after` bytes after it'''
+        return self.text(hit.offset - before, hit.offset + len(hit.term.encode('utf-8')) + after)
+
+    def clear(self):
+        '''Forgets all of the archived text and hits.  Offsets carry on from where they were.'''
+        with self._lock:
+            self.total += self.size
+            self._pending = b''
+            self._automaton.state = 0
+            self._hits = {}
+            self._order.clear()
+
+    def start(self, maxsize=256):
+        '''Starts archiving everything received, from a subscription to the client's RX pump.  Does nothing if it's
+        already running.
+        '''
+        if self.running is True:
+            return
+        self._subscription = self.clientObj.rxpump.subscribe(maxsize=maxsize, policy='block')
+        self._thread = threading.Thread(target=self._run, args=(self._subscription,), name='pyfldigi-rxarchive',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        '''Stops archiving, and waits for the text already received to be indexed'''
+        if self._subscription is not None:
+            self._subscription.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, subscription):
+        for chunk in subscription:
+            try:
+                self.feed(chunk)
+            except Exception as e:
+                self.logger.exception('RX archive: could not archive {!r}: {}'.format(chunk.text, e))
+
+    def stats(self):
+        '''Returns the # of bytes received and archived, and the # of terms and hits in the index
+
+        :rtype: dict
+        '''
+        return {'total': self.total, 'archived': self.total - self.oldest, 'size': self.size,
+                'terms': len(self._hits), 'hits': len(self._order)}
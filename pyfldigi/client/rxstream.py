@@ -0,0 +1,600 @@
+'''Streams the text FLDIGI receives, polling rx.get_data at a rate that follows the traffic, and fans it out to any #
+of consumers.
+'''
+
+import time
+import queue
+import codecs
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import collections
+import xmlrpc.client
+
+RxChunk = collections.namedtuple('RxChunk', ['time', 'text', 'context'])
+RxChunk.__new__.__defaults__ = (None,)
+RxChunk.__doc__ = '''Received text, when it was read from FLDIGI (as time.time()), and what it was received on (an
+:py:data:`RxContext`, or None)'''
+
+RxContext = collections.namedtuple('RxContext', ['frequency', 'rig_mode', 'modem', 'carrier', 'quality', 'status1'])
+RxContext.__doc__ = '''The rig frequency (Hz) and mode, modem name, modem carrier (Hz), signal quality [0:100] and first
+status field (typically s/n) when some text was received.  A value FLDIGI couldn't return is None.'''
+
+# The XML-RPC method that fetches each field of RxContext
+CONTEXT_METHODS = collections.OrderedDict([('frequency', 'rig.get_frequency'),
+                                           ('rig_mode', 'rig.get_mode'),
+                                           ('modem', 'modem.get_name'),
+                                           ('carrier', 'modem.get_carrier'),
+                                           ('quality', 'modem.get_quality'),
+                                           ('status1', 'main.get_status1')])
+
+
+class _RxPollRate(object):
+
+    '''Paces the rx.get_data polls of an RX stream.
+
+    While text is arriving, the interval halves on every poll that returns some, down to `min_interval`.  While
+    nothing is, it backs off by `backoff` per poll, up to `max_interval`.  A quiet band costs a poll every couple of
+    seconds, and a busy one is read often enough that the chunks stay small and timely.
+    '''
+
+    def __init__(self, min_interval=0.05, max_interval=2.0, backoff=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+    def next(self, received):
+        '''Returns the # of seconds to wait before the next poll, given how many characters the last one returned'''
+        if received > 0:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return self.interval
+
+
+POLICIES = ['block', 'drop_oldest', 'drop_newest']
+
+
+class _RxSource(object):
+
+    '''What the pollers (the pump and the async stream) share: the pacing, the decoding, and the counters'''
+
+    def __init__(self, min_interval, max_interval):
+        self.logger = logging.getLogger('pyfldigi.client.rxstream')
+        self.rate = _RxPollRate(min_interval, max_interval)
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')  # a character may span two polls
+        self.polls = 0
+        self.chunks = 0
+        self.chars = 0
+        self.errors = 0
+        self.blocked = 0.0  # seconds spent waiting for consumers (backpressure)
+
+    def decode(self, data):
+        '''Returns the chunk for the data read by a poll, or None if there's no complete character in it yet'''
+        self.polls += 1
+        if data is None:
+            data = b''
+        if isinstance(data, str):
+            text = data
+        else:
+            text = self.decoder.decode(bytes(data))
+        if len(text) == 0:
+            return None
+        self.chunks += 1
+        self.chars += len(text)
+        return RxChunk(time.time(), text)
+
+    def failed(self, error):
+        '''Called when a poll fails: polling keeps going, at the slowest rate'''
+        self.errors += 1
+        self.logger.warning('RX stream: rx.get_data failed, retrying in {}s: {}'.format(self.rate.max_interval, error))
+        self.rate.interval = self.rate.max_interval
+        return self.rate.interval
+
+    def stats(self):
+        '''Returns the # of polls, chunks, characters and errors, the current poll interval, and the seconds spent
+        blocked on slow consumers
+
+        :rtype: dict
+        '''
+        return {'polls': self.polls, 'chunks': self.chunks, 'chars': self.chars, 'errors': self.errors,
+                'interval': self.rate.interval, 'blocked': self.blocked}
+
+
+class _Subscription(object):
+
+    '''What the sync and asyncio subscriptions share: the drop policy bookkeeping and the idle timeout'''
+
+    def __init__(self, pump, maxsize, policy, timeout):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of: {}'.format(POLICIES))
+        self.pump = pump
+        self.maxsize = maxsize
+        self.policy = policy
+        self.timeout = timeout
+        self.delivered = 0
+        self.dropped = 0
+        self.last_data = time.time()
+        self.closed = False
+
+    def timed_out(self):
+        return self.timeout is not None and time.time() - self.last_data > self.timeout
+
+    def stats(self):
+        '''Returns the # of chunks delivered to this subscriber, and dropped because it fell behind
+
+        :rtype: dict
+        '''
+        return {'delivered': self.delivered, 'dropped': self.dropped, 'policy': self.policy, 'maxsize': self.maxsize}
+
+
+class RxSubscription(_Subscription):
+
+    '''A subscriber's own bounded queue of :py:data:`RxChunk` objects from an :py:class:`RxPump`.  Iterate over it,
+    or call :py:meth:`get`.
+
+    When the queue holds `maxsize` chunks, the `policy` decides what happens to the next one:
+
+    * 'block': the pump waits for room.  It stops polling meanwhile, so the text waits in FLDIGI and none is lost,
+      but every other subscriber waits too.
+    * 'drop_oldest': the oldest chunk in the queue is dropped to make room.
+    * 'drop_newest': the new chunk is dropped.
+
+    Iteration ends when the subscription is closed, or after 'timeout' seconds without any text.
+    '''
+
+    def __init__(self, pump, maxsize=256, policy='block', timeout=None):
+        super().__init__(pump, maxsize, policy, timeout)
+        self.queue = queue.Queue(maxsize)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            try:
+                chunk = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.closed is True or self.timed_out():
+                    self.close()
+                    raise StopIteration
+                continue
+            if chunk is None:  # closed
+                raise StopIteration
+            return chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, timeout=None):
+        '''Returns the next chunk
+
+        :raises queue.Empty: if there wasn't one within the timeout
+        '''
+        chunk = self.queue.get(timeout=timeout)
+        if chunk is None:
+            raise queue.Empty()
+        return chunk
+
+    def close(self):
+        '''Unsubscribes.  Chunks still in the queue are dropped.'''
+        if self.closed is False:
+            self.closed = True
+            self.pump.unsubscribe(self)
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def offer(self, chunk):
+        '''Called from the pump thread with every chunk'''
+        self.last_data = chunk.time
+        if self.policy == 'block':
+            while self.closed is False:
+                try:
+                    self.queue.put(chunk, timeout=0.1)
+                    self.delivered += 1
+                    return
+                except queue.Full:
+                    pass
+            return
+        while True:
+            try:
+                self.queue.put_nowait(chunk)
+                self.delivered += 1
+                return
+            except queue.Full:
+                if self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class RxIterator(object):
+
+    '''What :py:meth:`pyfldigi.client.text.Text.iter_rx` returns: an :py:class:`RxSubscription` that's closed as soon
+    as nothing refers to it any more.  A 'block' subscription that's abandoned (e.g. by breaking out of a 'for' loop
+    over it) would otherwise fill up and stall the pump, and every other subscriber with it.
+
+    Everything but iteration and closing is passed through to the subscription.
+    '''
+
+    def __init__(self, subscription):
+        self.subscription = subscription
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.subscription)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getattr__(self, name):
+        if name == 'subscription':  # not set yet
+            raise AttributeError(name)
+        return getattr(self.subscription, name)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        '''Unsubscribes.  See :py:meth:`RxSubscription.close`'''
+        self.subscription.close()
+
+
+class AsyncRxSubscription(_Subscription):
+
+    '''The asyncio equivalent of :py:class:`RxSubscription`, for 'async for'.  Its queue is an asyncio.Queue on the
+    event loop it was created from.  With the 'block' policy, the pump thread waits for the event loop to make room.
+    '''
+
+    def __init__(self, pump, maxsize=256, policy='block', timeout=None, loop=None):
+        super().__init__(pump, maxsize, policy, timeout)
+        self.loop = asyncio.get_running_loop() if loop is None else loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                return await self.get(0.1)
+            except asyncio.TimeoutError:
+                if self.closed is True or self.timed_out():
+                    self.close()
+                    raise StopAsyncIteration
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def get(self, timeout=None):
+        '''Returns the next chunk
+
+        :raises asyncio.TimeoutError: if there wasn't one within the timeout
+        '''
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        '''Unsubscribes.  Chunks still in the queue are dropped.'''
+        if self.closed is False:
+            self.closed = True
+            self.pump.unsubscribe(self)
+
+    def offer(self, chunk):
+        '''Called from the pump thread with every chunk'''
+        self.last_data = chunk.time
+        if self.policy == 'block':
+            future = asyncio.run_coroutine_threadsafe(self.queue.put(chunk), self.loop)
+            while self.closed is False and self.loop.is_closed() is False:
+                try:
+                    future.result(0.1)
+                    self.delivered += 1
+                    return
+                except concurrent.futures.TimeoutError:
+                    pass
+            future.cancel()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put_nowait, chunk)
+        except RuntimeError:  # the event loop is closed
+            self.close()
+
+    def _put_nowait(self, chunk):
+        while True:
+            try:
+                self.queue.put_nowait(chunk)
+                self.delivered += 1
+                return
+            except asyncio.QueueFull:
+                if self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return
+                self.queue.get_nowait()
+                self.dropped += 1
+
+
+class RxPump(_RxSource):
+
+    '''Owns the rx.get_data poll for a client, and hands every chunk of received text to all of its subscribers.
+
+    rx.get_data only returns the text received since it was last called, so components that each call it see
+    random parts of the text.  With the pump, logging, keyword detection, a UI mirror, etc. each get their own
+    :py:class:`RxSubscription` (or :py:class:`AsyncRxSubscription`) with all of the text, for one RPC per poll.
+
+    The pump thread starts with the first subscription, and stops when the last one is closed.  Its polls are paced
+    by :py:class:`_RxPollRate` ('rate').
+
+    If 'annotate' is True (the default), every chunk carries the :py:data:`RxContext` it was received on.  The context
+    is fetched in a single batch, and kept in the client's :py:class:`pyfldigi.client.cache.MetadataCache` as
+    'rx.context' (1 second by default), so it costs no RPCs per chunk.  Changing the rig frequency or mode, or the
+    modem or its carrier, through this client drops it from the cache, so the next chunk gets the new values.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` as 'rxpump'.
+              Don't call :py:meth:`pyfldigi.client.text.Text.get_rx_data` while it's running.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> log = fldigi.rxpump.subscribe()  # every chunk, blocking the pump rather than losing any
+    >>> ui = fldigi.rxpump.subscribe(maxsize=16, policy='drop_oldest')  # the latest text; it's fine to miss some
+    >>> for chunk in log:
+    ...     print(chunk.time, chunk.context.frequency, chunk.context.carrier, chunk.text)
+    1507307810.41 7070000.0 1500 CQ CQ
+    >>> async for chunk in fldigi.rxpump.subscribe_async(policy='drop_oldest'):  # from asyncio code
+    ...     print(chunk.text)
+    '''
+
+    def __init__(self, clientObj, min_interval=0.05, max_interval=2.0):
+        super().__init__(min_interval, max_interval)
+        self.clientObj = clientObj
+        self.annotate = True
+        self._subscriptions = []
+        self._lock = threading.RLock()  # reentrant: an RxIterator may be garbage collected (and unsubscribe) anywhere
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def subscribe(self, maxsize=256, policy='block', timeout=None):
+        '''Returns a new subscription to the received text
+
+        :param maxsize: The max # of chunks waiting in the subscription's queue (its high-water mark)
+        :type maxsize: int
+        :param policy: What to do when the queue is full: 'block', 'drop_oldest' or 'drop_newest'.  See
+                       :py:class:`RxSubscription`
+        :type policy: str
+        :param timeout: Stop iterating after this many seconds without any text (None never stops)
+        :type timeout: float
+        :rtype: :py:class:`RxSubscription`
+        '''
+        return self._add(RxSubscription(self, maxsize, policy, timeout))
+
+    def subscribe_async(self, maxsize=256, policy='block', timeout=None):
+        '''Returns a new subscription for asyncio code.  Must be called from the event loop's thread.  See
+        :py:meth:`subscribe`.
+
+        :rtype: :py:class:`AsyncRxSubscription`
+        '''
+        return self._add(AsyncRxSubscription(self, maxsize, policy, timeout))
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        self._wakeup.set()
+
+    @property
+    def subscribers(self):
+        return len(self._subscriptions)
+
+    def context(self):
+        '''Returns what FLDIGI is receiving on now, from the cache if it's fresh enough.  None if it couldn't be read.
+
+        :rtype: :py:data:`RxContext`
+        '''
+        try:
+            return self.clientObj.cache.get('rx.context', self._fetch_context)
+        except Exception as e:
+            self.logger.warning('RX stream: could not read the RX context: {}'.format(e))
+            return None
+
+    def _fetch_context(self):
+        with self.clientObj.batch() as b:
+            results = [b.call(method) for method in CONTEXT_METHODS.values()]
+        values = []
+        for result in results:
+            try:
+                values.append(result.value)
+            except xmlrpc.client.Fault:  # e.g. no rig control
+                values.append(None)
+        return RxContext(*values)
+
+    def stats(self):
+        '''Returns the pump's counters (see :py:meth:`_RxSource.stats`) and the # of subscribers
+
+        :rtype: dict
+        '''
+        stats = super().stats()
+        stats['subscribers'] = len(self._subscriptions)
+        return stats
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]  # copy on write, so _run needs no lock
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pyfldigi-rxpump', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()  # before polling, so a wake() during the poll isn't lost
+            with self._lock:
+                if len(self._subscriptions) == 0:
+                    self._thread = None
+                    return
+            try:
+                chunk = self.decode(self.clientObj.text.get_rx_data())
+            except Exception as e:
+                interval = self.failed(e)
+            else:
+                if chunk is not None:
+                    if self.annotate is True:
+                        chunk = chunk._replace(context=self.context())
+                    started = time.time()
+                    for subscription in self._subscriptions:
+                        subscription.offer(chunk)
+                    self.blocked += time.time() - started
+                interval = self.rate.next(0 if chunk is None else len(chunk.text))
+            self._wakeup.wait(interval)
+
+
+class RxByteReader(object):
+
+    '''Reads received data as bytes, for binary payloads (e.g. compressed files sent over MFSK or 8PSK).  Used by
+    :py:meth:`pyfldigi.client.text.Text.read_rx_bytes`.
+
+    Nothing is decoded: each poll's bytes are copied once, through a memoryview, into a buffer the caller's full size
+    allocated up front.  What a poll returns beyond the size asked for stays in a memoryview over that poll's data
+    (not a copy) until the next read.  Polls are paced like the :py:class:`RxPump`'s.
+    '''
+
+    def __init__(self, text, min_interval=0.05, max_interval=2.0):
+        self.text = text
+        self.rate = _RxPollRate(min_interval, max_interval)
+        self.polls = 0
+        self.received = 0  # bytes
+        self._pending = memoryview(b'')
+
+    def read(self, size, timeout=None):
+        '''Returns the next `size` bytes, or fewer if they didn't all arrive within the timeout
+
+        :rtype: bytearray
+        '''
+        deadline = None if timeout is None else time.time() + timeout
+        data = bytearray(size)
+        view = memoryview(data)
+        n = 0
+        while n < size:
+            if len(self._pending) == 0:
+                received = self.text.get_rx_bytes()
+                self.polls += 1
+                self.received += len(received)
+                interval = self.rate.next(len(received))
+                self._pending = memoryview(received)
+                if len(received) == 0:
+                    if deadline is not None:
+                        interval = min(interval, deadline - time.time())
+                        if interval <= 0:
+                            break
+                    time.sleep(interval)
+                    continue
+            take = min(len(self._pending), size - n)
+            view[n:n + take] = self._pending[0:take]
+            self._pending = self._pending[take:]
+            n += take
+        view.release()
+        if n < size:
+            del data[n:]
+        return data
+
+    def stats(self):
+        '''Returns the # of polls, the # of bytes received, and the # waiting for the next read
+
+        :rtype: dict
+        '''
+        return {'polls': self.polls, 'received': self.received, 'pending': len(self._pending),
+                'interval': self.rate.interval}
+
+
+class AsyncRxStream(_RxSource):
+
+    '''A poller of its own for :py:class:`pyfldigi.client.asyncclient.AsyncClient`, for 'async for'.  Returned by
+    :py:meth:`pyfldigi.client.asyncclient.AsyncText.aiter_rx`.
+
+    The polls (paced like :py:class:`RxPump`'s) run as a task on the event loop, started by the first 'async for'
+    step.  The chunks go through a bounded asyncio.Queue, and the task stops polling while it's full, so a slow
+    consumer delays the text but never loses any.  Iteration ends when the stream is closed, or after 'timeout'
+    seconds without any text.
+    '''
+
+    def __init__(self, text, timeout=None, maxsize=64, min_interval=0.05, max_interval=2.0):
+        super().__init__(min_interval, max_interval)
+        self.text = text
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.last_data = time.time()
+        self.closed = False
+        self._queue = None
+        self._task = None
+
+    def timed_out(self):
+        return self.timeout is not None and time.time() - self.last_data > self.timeout
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._task is None:
+            if self.closed is True:
+                raise StopAsyncIteration
+            self._queue = asyncio.Queue(self.maxsize)
+            self._task = asyncio.ensure_future(self._run())
+        while True:
+            try:
+                chunk = await asyncio.wait_for(self._queue.get(), 0.1)
+            except asyncio.TimeoutError:
+                if self.closed is True or self.timed_out():
+                    await self.aclose()
+                    raise StopAsyncIteration
+                continue
+            return chunk
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        '''Stops polling.  Text already in the buffer is dropped.'''
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while self.closed is False:
+            try:
+                chunk = self.decode(await self.text.get_rx_data())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                interval = self.failed(e)
+            else:
+                if chunk is not None:
+                    self.last_data = chunk.time
+                    started = time.time()
+                    await self._queue.put(chunk)  # backpressure: waits while the consumer is behind
+                    self.blocked += time.time() - started
+                interval = self.rate.next(0 if chunk is None else len(chunk.text))
+            await asyncio.sleep(interval)
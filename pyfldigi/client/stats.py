@@ -0,0 +1,126 @@
+'''Per XML-RPC method call statistics: call/error counts, bytes in/out, and latency histograms.
+'''
+
+import bisect
+import threading
+
+# Upper bounds (in seconds) of the latency histogram buckets.  Anything slower lands in the last (overflow) bucket.
+BUCKETS = (0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+class _MethodStats(object):
+
+    __slots__ = ('calls', 'errors', 'bytes_out', 'bytes_in', 'total_time', 'max_time', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def percentile(self, q):
+        '''Estimates the q'th percentile latency by interpolating within the histogram bucket it falls in'''
+        if self.calls == 0:
+            return None
+        target = q / 100.0 * self.calls
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            if count > 0 and seen + count >= target:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = min(BUCKETS[i], self.max_time) if i < len(BUCKETS) else self.max_time
+                return lower + (upper - lower) * ((target - seen) / count)
+            seen += count
+        return self.max_time
+
+    def to_dict(self):
+        return {'calls': self.calls,
+                'errors': self.errors,
+                'bytes_out': self.bytes_out,
+                'bytes_in': self.bytes_in,
+                'mean': self.total_time / self.calls if self.calls else None,
+                'max': self.max_time,
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99),
+                'histogram': list(self.histogram)}
+
+
+class RpcStats(object):
+
+    '''Collects statistics for every XML-RPC call made through a transport.
+
+    Each method gets a handful of counters and a fixed-bucket latency histogram (see BUCKETS), so recording a call
+    is O(1) and memory doesn't grow with the # of calls.  Percentiles are estimated from the histogram.
+
+    When disabled, the transports skip timing and recording altogether; the only cost is checking the 'enabled'
+    attribute once per call.
+
+    .. note:: Read these via :py:meth:`pyfldigi.client.client.Client.stats`
+
+    :param enabled: Whether or not to record stats
+    :type enabled: bool
+    '''
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, elapsed, bytes_out, bytes_in, error=False):
+        '''Records one call
+
+        :param method: The XML-RPC method name
+        :type method: str
+        :param elapsed: The round trip time, in seconds
+        :type elapsed: float
+        :param bytes_out: The size of the request body, in bytes
+        :type bytes_out: int
+        :param bytes_in: The size of the response body, in bytes
+        :type bytes_in: int
+        :param error: True if the call raised an exception (fault, HTTP error, connection error, etc)
+        :type error: bool
+        '''
+        bucket = bisect.bisect_left(BUCKETS, elapsed)
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = _MethodStats()
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            stats.histogram[bucket] += 1
+
+    def snapshot(self):
+        '''Returns the stats collected so far
+
+        :returns: A dict keyed by XML-RPC method name.  Each value is a dict with the keys 'calls', 'errors',
+                  'bytes_out', 'bytes_in', 'mean', 'max', 'p50', 'p95', 'p99' (latencies in seconds), and
+                  'histogram' (call counts per bucket, see BUCKETS).
+        :rtype: dict
+        '''
+        with self._lock:
+            return {method: stats.to_dict() for method, stats in self._methods.items()}
+
+    def reset(self):
+        '''Clears all of the stats collected so far'''
+        with self._lock:
+            self._methods = {}
+
+
+def method_name(request_body):
+    '''Pulls the method name out of a marshalled XML-RPC request body (bytes or str)'''
+    if isinstance(request_body, str):
+        request_body = request_body.encode('utf-8')
+    start = request_body.find(b'<methodName>')
+    if start < 0:
+        return '?'
+    start += len(b'<methodName>')
+    end = request_body.find(b'</methodName>', start)
+    return request_body[start:end].decode('utf-8', 'replace')
@@ -1,4 +1,5 @@
 import logging
+from .rxstream import RxByteReader, RxIterator
 
 
 class Text(object):
@@ -6,26 +7,45 @@ class Text(object):
     '''Read the demodulated and decoded text received by FLDIGI.  Send text to FLDIGI to be encoded, modulated, and transmitted
 
     .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` when it is constructed.
+
+    .. attribute:: tx_get_data
+    .. attribute:: rx_get_data
+
+        Prebuilt callables for the raw 'tx.get_data' and 'rx.get_data' XML-RPC calls (see
+        :py:meth:`pyfldigi.client.transport.RequestsTransport.fast_method`).
+        :py:meth:`get_tx_data` and :py:meth:`get_rx_data` are built on top of these.
+
+    .. attribute:: add_tx_bytes
+
+        Prebuilt callable for the 'text.add_tx_bytes' XML-RPC call, that takes any bytes-like object (see
+        :py:meth:`pyfldigi.client.transport.RequestsTransport.bytes_method`).
     '''
 
     def __init__(self, clientObj):
         self.clientObj = clientObj
         self.client = clientObj.client
         self.logger = logging.getLogger('pyfldigi.client.text')
+        self.tx_get_data = clientObj.transport.fast_method(clientObj.url, 'tx.get_data')
+        self.rx_get_data = clientObj.transport.fast_method(clientObj.url, 'rx.get_data')
+        self.add_tx_bytes = clientObj.transport.bytes_method(clientObj.url, 'text.add_tx_bytes')
+        self._rx_reader = None
 
     def add_tx(self, value):
         '''
-        :param value: The data to be sent to FLDIGI's TX text widget
-        :type value: bytes or str
+        :param value: The data to be sent to FLDIGI's TX text widget.  Bytes-like data (e.g. a compressed payload
+                      for MFSK or 8PSK) is sent as is, with text.add_tx_bytes.
+        :type value: str, or bytes, bytearray or memoryview
         '''
-        if isinstance(value, bytes):
-            self.logger.debug('add_tx({})'.format(value))
-            self.client.text.add_tx_bytes(value)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            if self.logger.isEnabledFor(logging.DEBUG):  # binary payloads can be big: don't format them for nothing
+                self.logger.debug('add_tx({} bytes)'.format(len(value)))
+            self.add_tx_bytes(value)
         elif isinstance(value, str):
             self.logger.debug('add_tx(\'{}\')'.format(value))
             self.client.text.add_tx(value)
         else:
             raise TypeError('text must be in bytes or str format')
+        self.clientObj.wake_txmonitor()
 
     def clear_tx(self):
         '''Clears the TX text widget
@@ -43,29 +63,117 @@ class Text(object):
         :rtype: str (or None if no data since last query)
         '''
         try:
-            data = self.client.tx.get_data()
+            data = self.tx_get_data()
         except Exception as e:
-            print(e)
+            self.logger.warning('get_tx_data() failed: {}'.format(e))
             if suppress_errors is True:
                 return None
             else:
                 raise e
         else:
-            self.logger.debug('get_tx_data() returned: {}'.format(data))
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug('get_tx_data() returned: {}'.format(data))
             return data
 
+    def get_tx_bytes(self):
+        '''Returns all TX data transmitted since last query, as bytes, whatever the modem
+
+        :rtype: bytes (empty if no data since last query)
+        '''
+        return _as_bytes(self.tx_get_data())
+
     def get_rx_data(self):
         '''Returns all RX data received since last query.
 
         :returns: RX data received since last query
         :rtype: str
         '''
-        data = self.client.rx.get_data()
-        self.logger.debug('get_rx_data() returned: {}'.format(data))
+        data = self.rx_get_data()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('get_rx_data() returned: {}'.format(data))
         return data
 
+    def get_rx_bytes(self):
+        '''Returns all RX data received since last query, as bytes, whatever the modem
+
+        :rtype: bytes (empty if no data since last query)
+        '''
+        return _as_bytes(self.rx_get_data())
+
+    def read_rx_bytes(self, size, timeout=None):
+        '''Reads `size` bytes of received data, e.g. a binary payload, polling rx.get_data until they've all arrived.
+
+        The data goes straight from each poll into a bytearray of the full size, allocated up front, through a
+        memoryview.  It's never decoded into a str, and large transfers aren't copied again and again as they grow.
+        Whatever a poll returns beyond `size` is kept for the next read.
+
+        .. note:: Don't mix this with :py:meth:`get_rx_data`, :py:meth:`iter_rx` or the RX pump, which would each get
+                  some of the data.
+
+        :param size: The # of bytes to read
+        :type size: int
+        :param timeout: The max # of seconds to wait for them (None waits as long as it takes)
+        :type timeout: float
+        :returns: The data.  Shorter than `size` if the timeout ran out first.
+        :rtype: bytearray
+
+        :Example:
+
+        >>> import zlib
+        >>> import pyfldigi
+        >>> fldigi = pyfldigi.Client()
+        >>> header = fldigi.text.read_rx_bytes(4)  # e.g. the length of the payload that follows
+        >>> payload = zlib.decompress(fldigi.text.read_rx_bytes(int.from_bytes(header, 'big'), timeout=600))
+        '''
+        if self._rx_reader is None:
+            self._rx_reader = RxByteReader(self)
+        return self._rx_reader.read(size, timeout)
+
+    def iter_rx(self, timeout=None, maxsize=64):
+        '''Returns an iterator of the text FLDIGI receives, as it arrives.  Each item is an
+        :py:data:`pyfldigi.client.rxstream.RxChunk` (time, text).
+
+        It's a subscription to the client's :py:class:`pyfldigi.client.rxstream.RxPump`, which polls rx.get_data in a
+        background thread (often while text is arriving, backing off while it isn't), so any # of iterators can run
+        at once and each gets all of the text.  Up to `maxsize` chunks are buffered for the consumer; beyond that the
+        pump pauses until it catches up, and the text waits in FLDIGI, so none is lost.  The subscription is closed
+        when the iterator is, or as soon as nothing refers to it any more (e.g. after breaking out of a 'for' loop
+        over it), so an abandoned iterator doesn't hold the pump up.
+
+        .. note:: rx.get_data returns the text received since it was last called, by anyone.  Don't mix this with
+                  other calls to :py:meth:`get_rx_data`.
+
+        :param timeout: Stop after this many seconds without any received text (None never stops)
+        :type timeout: float
+        :param maxsize: The max # of chunks buffered for the consumer
+        :type maxsize: int
+        :rtype: :py:class:`pyfldigi.client.rxstream.RxIterator`
+
+        :Example:
+
+        >>> import pyfldigi
+        >>> fldigi = pyfldigi.Client()
+        >>> with fldigi.text.iter_rx() as rx:
+        ...     for chunk in rx:
+        ...         print(chunk.time, chunk.text)
+        1507307810.41 CQ CQ
+        1507307811.02  de KM
+        '''
+        return RxIterator(self.clientObj.rxpump.subscribe(maxsize=maxsize, policy='block', timeout=timeout))
+
     def clear_rx(self):
         '''Clears the RX text widget
         '''
         self.logger.debug('clear_rx()')
         self.client.text.clear_rx()
+
+
+def _as_bytes(data):
+    '''What rx.get_data and tx.get_data return (normally bytes, from base64) as bytes'''
+    if data is None:
+        return b''
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    return bytes(getattr(data, 'data', data))  # bytearray, or xmlrpc.client.Binary without use_builtin_types
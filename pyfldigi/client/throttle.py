@@ -0,0 +1,100 @@
+'''Duty cycle budgeting and message splitting, used by :py:class:`pyfldigi.client.txqueue.TxQueue` to throttle
+transmissions.
+'''
+
+import re
+import time
+
+
+def split_text(data, limit):
+    '''Splits data in two, at the last word boundary that keeps the first part within `limit` bytes.
+
+    Text (str) is measured in UTF-8 bytes, the same as the TX data FLDIGI reports, and is never cut in the middle of
+    a character.  A single word that's longer than the limit is cut at the limit.
+
+    :param data: The text
+    :type data: str or bytes
+    :param limit: The max length of the first part, in bytes
+    :type limit: int
+    :returns: (head, tail).  tail is empty if data fits within the limit.
+    :rtype: tuple
+    '''
+    limit = max(1, int(limit))
+    if isinstance(data, str):
+        encoded = data.encode('utf-8')
+        if len(encoded) <= limit:
+            return data, data[0:0]
+        # The # of whole characters within the limit (at least one, so the text always gets shorter)
+        limit = max(1, len(encoded[0:limit].decode('utf-8', 'ignore')))
+    elif len(data) <= limit:
+        return data, data[0:0]
+    whitespace = rb'\s+' if isinstance(data, bytes) else r'\s+'
+    boundaries = [m.end() for m in re.finditer(whitespace, data[0:limit + 1]) if m.end() <= limit]
+    cut = boundaries[-1] if len(boundaries) > 0 else limit
+    return data[0:cut], data[cut:]
+
+
+class DutyCycleBudget(object):
+
+    '''Works out how much can be transmitted, and when, without the duty cycle going over a limit.
+
+    The duty cycle is the % of a sliding window (the sample period) spent in TX, as recorded in the TX Monitor's
+    history.  While the transmitter is keyed, the TX time inside a window that ends 'now' can only grow or stay put
+    (at worst, old TX slides out as fast as new TX comes in), so a transmission keeps the duty cycle under the limit
+    throughout if and only if it does at its very end.  That makes both questions below simple bisections over the
+    history's TX time.
+
+    :param history: The TX Monitor's history
+    :type history: pyfldigi.client.txmonitor._History
+    :param max_duty_cycle: The limit, in %
+    :type max_duty_cycle: float
+    :param sample_period: The window the duty cycle is measured over, in seconds
+    :type sample_period: float
+    '''
+
+    def __init__(self, history, max_duty_cycle, sample_period):
+        self.history = history
+        self.max_tx_time = max_duty_cycle / 100.0 * sample_period  # max TX seconds per window
+        self.sample_period = sample_period
+
+    def _tx_time(self, start, now):
+        '''TX seconds recorded in [start, now]'''
+        if start >= now:
+            return 0.0
+        return self.history.get_tx_time(now) - self.history.get_tx_time(start)
+
+    def _fits(self, start, duration, now):
+        return self._tx_time(start + duration - self.sample_period, now) + duration <= self.max_tx_time
+
+    def airtime(self, start=None, now=None):
+        '''Returns the max # of seconds that can be transmitted from `start` (default: now) on'''
+        now = time.time() if now is None else now
+        start = now if start is None else max(start, now)
+        lo, hi = 0.0, self.max_tx_time
+        if self._fits(start, hi, now):
+            return hi
+        for i in range(0, 40):
+            mid = (lo + hi) / 2
+            if self._fits(start, mid, now):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    def earliest_start(self, duration, now=None):
+        '''Returns the earliest time (as time.time()) a transmission of `duration` seconds can start, or None if it
+        never can (it's longer than the duty cycle allows in one window)
+        '''
+        now = time.time() if now is None else now
+        if duration > self.max_tx_time:
+            return None
+        if self._fits(now, duration, now):
+            return now
+        lo, hi = now, now + self.sample_period
+        for i in range(0, 40):
+            mid = (lo + hi) / 2
+            if self._fits(mid, duration, now):
+                hi = mid
+            else:
+                lo = mid
+        return hi
@@ -10,9 +10,15 @@ https://github.com/astraw/stdeb/blob/master/stdeb/transport.py
 Oh, and I made it HTTP only because fldigi doesn't support HTTPS as far as I know.
 The file was originally released under the MIT license'''
 
+import time
+import base64
+import threading
 import xmlrpc
+import xmlrpc.client
 import requests
+import requests.adapters
 import requests.utils
+from .stats import RpcStats, method_name
 
 
 class RequestsTransport(xmlrpc.client.Transport):
@@ -20,6 +26,21 @@ class RequestsTransport(xmlrpc.client.Transport):
 
     Inherits xml.client.Transport and is meant to be passed directly to xmlrpc.ServerProxy constructor.
 
+    The transport owns a single :py:class:`requests.Session` with a bounded connection pool, so that consecutive
+    XML-RPC calls re-use the same keep-alive TCP connection(s) instead of opening (and leaving in TIME_WAIT) a new
+    socket per call.  The pool is safe to share between the TX Monitor thread and any number of user threads.
+
+    :param pool_maxsize: The maximum # of simultaneous keep-alive connections to the server.  Threads that make a
+                         call while all connections are busy will wait for one to be freed.
+    :type pool_maxsize: int
+    :param chunk_size: Responses are streamed from the socket straight into the XML parser, this many bytes at a
+                       time, rather than being decoded into one big string first.
+    :type chunk_size: int
+    :param instrument: If True, per-method call counts, errors, bytes in/out and latency histograms are recorded in
+                       self.stats (:py:class:`pyfldigi.client.stats.RpcStats`).  Can be toggled later with
+                       stats.enabled.
+    :type instrument: bool
+
     :example:
 
     >>> import xmlrpc.client
@@ -32,25 +53,232 @@ class RequestsTransport(xmlrpc.client.Transport):
     # change our user agent to reflect Requests
     user_agent = 'Python-xmlrpc with Requests (python-requests.org)'
 
+    def __init__(self, use_datetime=False, use_builtin_types=False, pool_maxsize=4, chunk_size=16384, instrument=False):
+        super().__init__(use_datetime=use_datetime, use_builtin_types=use_builtin_types)
+        self.pool_maxsize = int(pool_maxsize)
+        self.chunk_size = int(chunk_size)
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': self.user_agent, 'Content-Type': 'text/xml', 'Connection': 'keep-alive'})
+        self.adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, pool_block=True)
+        self.session.mount('http://', self.adapter)
+        self._lock = threading.Lock()
+        self._num_requests = 0
+        self._num_closed_connections = 0  # connections opened by pools that have since been closed
+        self.fast_methods = {}  # (url, methodname) -> FastMethod registry
+        self.stats = RpcStats(enabled=instrument)
+
     def request(self, host, handler, request_body, verbose):
         '''Make an xmlrpc request.'''
-        headers = {'User-Agent': self.user_agent, 'Content-Type': 'text/xml'}
         url = self._build_url(host, handler)
-        resp = requests.post(url, data=request_body, headers=headers)
+        return self._call(url, request_body, lambda: self.session.post(url, data=request_body, stream=True))
+
+    def fast_method(self, url, methodname):
+        '''Returns a callable for an argument-less XML-RPC method, with its request prepared ahead of time.
+
+        The request body, headers, and proxy settings are built once and cached in a registry, so calling the
+        returned object skips ServerProxy's attribute chaining, the marshalling step, and requests' per-call
+        request preparation.  Meant for methods that get polled in a tight loop, like main.get_trx_status.
+
+        :param url: The URL of the XML-RPC server, e.g. 'http://127.0.0.1:7362/'
+        :type url: str
+        :param methodname: The XML-RPC method name, e.g. 'main.get_trx_status'
+        :type methodname: str
+        :rtype: :py:class:`pyfldigi.client.transport.FastMethod`
+
+        :Example:
+
+        >>> get_trx_status = transport.fast_method('http://127.0.0.1:7362/', 'main.get_trx_status')
+        >>> get_trx_status()
+        'rx'
+        '''
+        key = (url, methodname)
+        with self._lock:
+            method = self.fast_methods.get(key)
+            if method is None:
+                body = xmlrpc.client.dumps((), methodname, encoding='utf-8').encode('utf-8')
+                request = self.session.prepare_request(requests.Request('POST', url, data=body))
+                proxies = requests.utils.resolve_proxies(request, self.session.proxies, self.session.trust_env)
+                method = FastMethod(self, methodname, request, proxies)
+                self.fast_methods[key] = method
+        return method
+
+    def bytes_method(self, url, methodname):
+        '''Returns a callable for an XML-RPC method that takes a single base64 parameter, like text.add_tx_bytes.
+
+        The request is prepared ahead of time, the same as with :py:meth:`fast_method`, and the body is put together
+        from the base64 of the data and the XML around it, with one join.  The data doesn't go through the
+        marshaller's line-wrapped base64, the str it's decoded into, or the encoding of the whole body back to bytes,
+        which is what makes the difference for large binary payloads.
+
+        :param url: The URL of the XML-RPC server, e.g. 'http://127.0.0.1:7362/'
+        :type url: str
+        :param methodname: The XML-RPC method name, e.g. 'text.add_tx_bytes'
+        :type methodname: str
+        :rtype: :py:class:`pyfldigi.client.transport.BytesMethod`
+
+        :Example:
+
+        >>> add_tx_bytes = transport.bytes_method('http://127.0.0.1:7362/', 'text.add_tx_bytes')
+        >>> add_tx_bytes(memoryview(payload)[0:4096])  # any bytes-like object
+        '''
+        key = (url, methodname, bytes)
+        with self._lock:
+            method = self.fast_methods.get(key)
+            if method is None:
+                body = xmlrpc.client.dumps((xmlrpc.client.Binary(b''),), methodname, encoding='utf-8').encode('utf-8')
+                prefix, suffix = body.split(b'<base64>\n</base64>')  # the marshaller wraps even an empty value
+                request = self.session.prepare_request(requests.Request('POST', url, data=body))
+                proxies = requests.utils.resolve_proxies(request, self.session.proxies, self.session.trust_env)
+                method = BytesMethod(self, methodname, request, proxies, prefix + b'<base64>', b'</base64>' + suffix)
+                self.fast_methods[key] = method
+        return method
+
+    def send_prepared(self, request, proxies):
+        '''Sends a request previously prepared by :py:meth:`fast_method` and returns the parsed response'''
+        return self._call(request.url, request.body, lambda: self.session.send(request, stream=True, proxies=proxies, allow_redirects=False))
+
+    def _call(self, url, request_body, send):
+        '''Sends the request with send(), parses the response, and records stats (if enabled)'''
+        with self._lock:
+            self._num_requests += 1
+        if self.stats.enabled is False:
+            return self._handle_response(url, send())
+        start = time.perf_counter()
+        received = [0]
+        error = True
+        try:
+            result = self._handle_response(url, send(), received)
+            error = False
+            return result
+        finally:
+            self.stats.record(method_name(request_body), time.perf_counter() - start, len(request_body), received[0], error)
+
+    def _handle_response(self, url, resp, received=None):
         try:
             resp.raise_for_status()
         except requests.RequestException as e:
+            resp.close()
             raise xmlrpc.client.ProtocolError(url, resp.status_code, str(e), resp.headers)
         else:
-            return self.parse_response(resp)
+            return self.parse_response(resp, received)
+
+    def parse_response(self, resp, received=None):
+        '''Parse the xmlrpc response.
 
-    def parse_response(self, resp):
-        '''Parse the xmlrpc response.'''
+        The raw body is fed to the (expat) parser chunk by chunk as it comes off the socket, so large responses
+        (fldigi.list, rx.get_data, wefax.get_received_file, etc) are never held in memory as a complete bytes
+        object *and* a decoded str.  The parser works out the encoding from the XML declaration.
+
+        If received is a list, the # of body bytes read gets added to received[0].'''
         p, u = self.getparser()  # returns (parser, target)
-        p.feed(resp.text)
+        try:
+            for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                if received is not None:
+                    received[0] += len(chunk)
+                p.feed(chunk)
+        finally:
+            resp.close()  # returns the connection to the pool
         p.close()
         return u.close()
 
+    def _count_connections(self):
+        '''Returns the # of connections opened by the pools that are currently alive'''
+        pools = self.adapter.poolmanager.pools
+        connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+        return connections
+
+    def connection_stats(self):
+        '''Returns statistics on how well the keep-alive connection pool is being re-used.
+
+        :returns: A dict with the keys:
+
+            * 'requests' : The # of XML-RPC requests made through this transport
+            * 'connections' : The # of TCP connections that had to be opened
+            * 'reused' : The # of requests that were sent over an already-open connection
+
+        :rtype: dict
+
+        :Example:
+
+        >>> import pyfldigi
+        >>> fldigi = pyfldigi.Client()
+        >>> fldigi.transport.connection_stats()
+        {'requests': 214, 'connections': 1, 'reused': 213}
+        '''
+        connections = self._count_connections()
+        with self._lock:
+            num_requests = self._num_requests
+            connections += self._num_closed_connections
+        return {'requests': num_requests, 'connections': connections, 'reused': max(num_requests - connections, 0)}
+
+    def close(self):
+        '''Closes all of the pooled connections.  A new connection will be opened on the next request.'''
+        with self._lock:
+            self._num_closed_connections += self._count_connections()
+            self.session.close()
+
     def _build_url(self, host, handler):
         '''Build a url for our request based on the host, handler and use_http property'''
         return 'http://{}/{}'.format(host, handler)
+
+
+class FastMethod(object):
+
+    '''An argument-less XML-RPC method whose request has been prepared ahead of time.
+
+    .. note:: Use :py:meth:`pyfldigi.client.transport.RequestsTransport.fast_method` to create these.
+
+    The prepared request is only ever read when it's sent, so one instance can be called from several threads.
+    '''
+
+    __slots__ = ('transport', 'methodname', 'request', 'proxies')
+
+    def __init__(self, transport, methodname, request, proxies):
+        self.transport = transport
+        self.methodname = methodname
+        self.request = request
+        self.proxies = proxies
+
+    def __call__(self):
+        result = self.transport.send_prepared(self.request, self.proxies)
+        if len(result) == 1:
+            result = result[0]
+        return result
+
+    def __repr__(self):
+        return '<FastMethod {}>'.format(self.methodname)
+
+
+class BytesMethod(object):
+
+    '''An XML-RPC method with a single base64 parameter, whose request has been prepared ahead of time.
+
+    .. note:: Use :py:meth:`pyfldigi.client.transport.RequestsTransport.bytes_method` to create these.
+    '''
+
+    __slots__ = ('transport', 'methodname', 'request', 'proxies', 'prefix', 'suffix')
+
+    def __init__(self, transport, methodname, request, proxies, prefix, suffix):
+        self.transport = transport
+        self.methodname = methodname
+        self.request = request
+        self.proxies = proxies
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def __call__(self, data):
+        body = b''.join((self.prefix, base64.b64encode(data), self.suffix))
+        request = self.request.copy()  # shares nothing mutable with the prepared one, so threads don't collide
+        request.body = body
+        request.headers['Content-Length'] = str(len(body))
+        result = self.transport.send_prepared(request, self.proxies)
+        if len(result) == 1:
+            result = result[0]
+        return result
+
+    def __repr__(self):
+        return '<BytesMethod {}>'.format(self.methodname)
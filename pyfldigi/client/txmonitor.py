@@ -1,15 +1,41 @@
 import http
 import time
+import concurrent.futures
 # import queue
 import logging
+import array
 import threading
+import collections
+from .events import EventBus
 
 
 STATES = ['TX', 'RX', 'TUNE', 'ERROR']
 
+# Rough characters per second for common modems, used to pace the monitor until it has measured the real rate.
+# Modem names that aren't listed are matched on their longest listed prefix (e.g. 'OLIVIA-8-250' -> 'OLIVIA').
+CHAR_RATES = {'CW': 2.5,
+              'BPSK31': 4.2, 'BPSK63': 8.4, 'BPSK125': 16.7, 'BPSK250': 33.0, 'BPSK500': 67.0, 'BPSK1000': 133.0,
+              'QPSK31': 4.2, 'QPSK63': 8.4, 'QPSK125': 16.7, 'QPSK250': 33.0, 'QPSK500': 67.0,
+              'PSK': 8.0, 'RTTY': 6.0, 'OLIVIA': 2.0, 'CONTESTIA': 4.0, 'MFSK': 5.0, 'MT63': 20.0,
+              'DOMX': 7.0, 'THOR': 5.0, 'THROB': 2.0, 'FSQ': 5.0, 'IFKP': 5.0, 'NAVTEX': 10.0, 'SITORB': 10.0}
+DEFAULT_CHAR_RATE = 4.0
+
+
+def estimate_char_rate(modem):
+    '''Returns the approximate # of characters per second a modem sends (see CHAR_RATES)'''
+    modem = str(modem).upper()
+    if modem in CHAR_RATES:
+        return CHAR_RATES[modem]
+    prefixes = [name for name in CHAR_RATES if modem.startswith(name)]
+    if len(prefixes) > 0:
+        return CHAR_RATES[max(prefixes, key=len)]
+    return DEFAULT_CHAR_RATE
+
 
 class _State(object):
 
+    __slots__ = ('_state', 'start_time', 'end_time')
+
     def __init__(self, state):
         self.state = state
         self.start()
@@ -49,166 +75,805 @@ class _State(object):
 
 class _TxData(object):
 
+    __slots__ = ('time', 'data')
+
     def __init__(self, data):
         self.time = time.time()
         self.data = data
 
     def __str__(self):
-        if isinstance(self.data, bytes):
-            data = self.data.decode('iso-8859-1')
-        else:
-            data = str(self.data)
+        data = self.data[0:25]  # only decode what's shown
+        if isinstance(data, bytes):
+            data = data.decode('iso-8859-1')
         if len(self.data) > 25:
-            data = '\'{}\'... (length={})'.format(data[0:25], len(data))
+            data = '\'{}\'... (length={})'.format(data, len(self.data))
         else:
             data = '\'{}\''.format(data)
         return 'T={:.3f}s: {}'.format(self.time, data)
 
 
+class _Ring(object):
+
+    '''A fixed capacity ring buffer made of parallel columns.  Appending is O(1), and once the ring is full each
+    append overwrites the oldest row, so memory stays constant no matter how long the monitor runs.
+
+    Columns are given as (name, typecode) pairs.  A typecode ('d', 'b', 'q'...) stores the column in a compact
+    array.array; None stores Python objects in a list.  Every value is written twice, at p and p + capacity, so
+    that the live rows are always one contiguous slice [head, head + len), which is what lets :py:meth:`to_numpy`
+    hand out views instead of copies.
+
+    Rows are addressed by logical index: 0 is the oldest, -1 the newest.
+    '''
+
+    def __init__(self, capacity, *columns):
+        self.capacity = capacity
+        self.columns = [name for name, typecode in columns]
+        self._data = {}
+        for name, typecode in columns:
+            if typecode is None:
+                self._data[name] = [None] * (2 * capacity)
+            else:
+                self._data[name] = array.array(typecode, bytes(2 * capacity * array.array(typecode).itemsize))
+        self._head = 0  # index of the oldest row
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def _index(self, i):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError('ring index out of range')
+        return self._head + i
+
+    def append(self, *values):
+        if self._len < self.capacity:
+            p = (self._head + self._len) % self.capacity
+            self._len += 1
+        else:
+            p = self._head
+            self._head = (self._head + 1) % self.capacity
+        for name, value in zip(self.columns, values):
+            column = self._data[name]
+            column[p] = value
+            column[p + self.capacity] = value
+
+    def get(self, column, i):
+        return self._data[column][self._index(i)]
+
+    def rows(self, start=0):
+        '''Yields the rows from logical index start on, as tuples, oldest first'''
+        columns = [self._data[name] for name in self.columns]
+        for i in range(self._head + start, self._head + self._len):
+            yield tuple(column[i] for column in columns)
+
+    def bisect_right(self, column, value):
+        '''Returns the # of rows whose value in `column` (which must be in ascending order) is <= value'''
+        data = self._data[column]
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if value < data[self._head + mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def clear(self):
+        self._head = 0
+        self._len = 0
+
+    def to_numpy(self, column):
+        '''Returns the live rows of an array-backed column as a NumPy array, oldest first, without copying.
+
+        .. note:: The result is a view onto the ring: later appends show through (and eventually overwrite it).
+                  Call .copy() on it to keep a snapshot.
+        '''
+        import numpy  # optional dependency, only needed for this
+        data = self._data[column]
+        return numpy.frombuffer(data, dtype=data.typecode)[self._head:self._head + self._len]
+
+
 class _History(object):
 
-    def __init__(self, initialState='RX', max_history=900):
-        self.logger = logging.getLogger('pyfldigi.client._History')
-        self.max_history = max_history
-        self.state_history = [_State(initialState)]  # Start the history with the initial state
-        self.txdata_history = []
+    '''TX state and TX data history, kept in bounded, array-backed ring buffers.
 
-    def __str__(self):
-        s = 'State History:\n{}\n'.format('\n'.join(['  {}'.format(str(i)) for i in self.state_history]))
-        s += 'TX data History:\n{}\n'.format('\n'.join(['  {}'.format(str(i)) for i in self.txdata_history]))
+    Every state change stores its start time and state code (the index into STATES) along with the total TX time
+    before it.  The total TX time up to any moment is then that running total plus the time spent in TX since the
+    last state change, so the duty cycle over any sliding window (1 minute, 10 minutes, 1 hour...) is the
+    difference of two such lookups: a binary search over at most `max_states` rows, whatever the window length.
+
+    Each chunk of TX data stores its arrival time and length (and the data itself, in a list column).  No object is
+    allocated per poll or per chunk, and the timeline can be exported to NumPy with :py:meth:`to_numpy`.
+    '''
+
+    def __init__(self, initialState='RX', max_states=4096, max_txdata=4096):
+        self.logger = logging.getLogger('pyfldigi.client._History')
+        self.states = _Ring(max_states, ('start', 'd'), ('state', 'b'), ('tx_before', 'd'))
+        self.txdata = _Ring(max_txdata, ('time', 'd'), ('length', 'q'), ('data', None))
+        self._tx_before = 0.0  # total TX time before the current state started
+        self.states.append(time.time(), STATES.index(initialState), 0.0)  # Start the history with the initial state
+
+    def __str__(self, last=20):
+        states = self.state_history[-last:]
+        txdata = self.txdata_history[-last:]
+        s = 'State History ({} states, last {} shown):\n{}\n'.format(len(self.states), len(states), '\n'.join(['  {}'.format(str(i)) for i in states]))
+        s += 'TX data History ({} chunks, last {} shown):\n{}\n'.format(len(self.txdata), len(txdata), '\n'.join(['  {}'.format(str(i)) for i in txdata]))
         s += 'Last TX time was: {}\n'.format(self.get_last_txdata_time())
         return s
 
     def __repr__(self):
         return str(self)
 
-    def chop(self):
-        t = time.time() - self.max_history
-        if len(self.txdata_history) > 0:
-            if self.state_history[0].end_time is not None:
-                if self.state_history[0].end_time <= t:
-                    h = []
-                    for i in self.state_history:
-                        if i.end_time is not None:
-                            if i.end_time >= t:
-                                h.append(i)
-                        else:
-                            h.append(i)
-                    self.state_history = h
-                    # self.state_history = [i for i in self.state_history if (i.end_time >= t)]
-
-        if len(self.txdata_history) > 0:
-            if self.txdata_history[0].time <= t:
-                self.txdata_history = [i for i in self.txdata_history if (i.time >= t)]
-
-    def update_state(self, new_state):
-        if not isinstance(new_state, _State):
-            raise TypeError('expected state type to be _State but got {}'.format(type(new_state)))
-        last_state = self.state_history[-1].state
-        if new_state.state != last_state:
-            self.logger.info('STATE CHANGE to {}'.format(new_state.state))
-            self.state_history[-1].end()
-            self.state_history.append(new_state)
-            self.chop()
+    @property
+    def state_history(self):
+        '''The retained states, oldest first, as a list of _State'''
+        rows = list(self.states.rows())
+        states = []
+        for i, (start, code, tx_before) in enumerate(rows):
+            s = _State(STATES[code])
+            s.start_time = start
+            s.end_time = rows[i + 1][0] if i + 1 < len(rows) else None
+            states.append(s)
+        return states
+
+    @property
+    def txdata_history(self):
+        '''The retained TX data, oldest first, as a list of _TxData'''
+        txdata = []
+        for t, length, data in self.txdata.rows():
+            d = _TxData(data)
+            d.time = t
+            txdata.append(d)
+        return txdata
+
+    def update_state(self, new_state, t=None):
+        '''Records the state, if it's changed
+
+        :param new_state: The state, as one of STATES or as a _State (whose start time is then used)
+        :param t: When the state was read (defaults to now).  Ignored if new_state is a _State.
+        '''
+        if isinstance(new_state, _State):
+            new_state, t = new_state.state, new_state.start_time
+        elif new_state not in STATES:
+            raise ValueError('value ({}) must be one of: {}'.format(new_state, STATES))
+        last_code = self.states.get('state', -1)
+        if new_state != STATES[last_code]:
+            self.logger.info('STATE CHANGE to {}'.format(new_state))
+            if t is None:
+                t = time.time()
+            if STATES[last_code] == 'TX':
+                self._tx_before += t - self.states.get('start', -1)
+            self.states.append(t, STATES.index(new_state), self._tx_before)
+
+    def get_tx_time(self, t):
+        '''Returns the total # of seconds spent in TX up to time t (since the oldest retained state)'''
+        k = self.states.bisect_right('start', t) - 1
+        if k < 0:
+            return self.states.get('tx_before', 0)
+        tx_time = self.states.get('tx_before', k)
+        if STATES[self.states.get('state', k)] == 'TX':
+            tx_time += t - self.states.get('start', k)
+        return tx_time
 
     def get_duty_cycle(self, sample_period=60):
-        '''Returns the duty cycle over a given sample period'''
-        on_time = sum([i.duration for i in self.state_history if (i.state == 'TX')])
-        off_time = sum([i.duration for i in self.state_history if (i.state != 'TX')])
-        # print('on_time: {}s'.format(on_time))
-        # print('off_time: {}s'.format(off_time))
-        return (on_time / (on_time + off_time)) * 100
+        '''Returns the duty cycle (% of the time spent in TX) over the last sample_period seconds.  If the history
+        doesn't go back that far, the duty cycle is over the time that it does cover.
+        '''
+        now = time.time()
+        start = max(now - sample_period, self.states.get('start', 0))
+        if now <= start:
+            return 100.0 if self.get_state() == 'TX' else 0.0
+        return (self.get_tx_time(now) - self.get_tx_time(start)) / (now - start) * 100
 
     def get_state(self):
         '''Returns the last state'''
-        return self.state_history[-1].state
+        return STATES[self.states.get('state', -1)]
+
+    def append_txdata(self, txdata, t=None):
+        '''Records a chunk of TX data
 
-    def append_txdata(self, txdata):
+        :param txdata: The data, as bytes/str or as a _TxData (whose time is then used)
+        :param t: When the data was read (defaults to now).  Ignored if txdata is a _TxData.
+        '''
         if txdata is None:
             return  # no data to append
-        if not isinstance(txdata, _TxData):
-            raise TypeError('expected type to be _TxData but got {}'.format(type(txdata)))
-        self.txdata_history.append(txdata)
-        self.chop()
+        if isinstance(txdata, _TxData):
+            txdata, t = txdata.data, txdata.time
+        elif not isinstance(txdata, (bytes, str)):
+            raise TypeError('expected type to be _TxData, bytes or str but got {}'.format(type(txdata)))
+        self.txdata.append(time.time() if t is None else t, len(txdata), txdata)
+
+    def clear_txdata(self):
+        self.txdata.clear()
 
     def get_last_txdata_time(self):
-        if len(self.txdata_history) > 0:
-            return time.time() - self.txdata_history[-1].time
+        if len(self.txdata) > 0:
+            return time.time() - self.txdata.get('time', -1)
         else:
             return None
 
-
-class TxMonitor(threading.Thread):
+    def to_numpy(self):
+        '''Exports the timeline as NumPy arrays (views, not copies -- see :py:meth:`_Ring.to_numpy`).  Requires numpy.
+
+        :returns: A dict with the keys:
+
+            * 'state_start': when each state started (float64, UNIX time)
+            * 'state': each state's code, the index into STATES (int8)
+            * 'tx_before': the total TX time before each state started (float64, seconds)
+            * 'txdata_time': when each chunk of TX data was read (float64, UNIX time)
+            * 'txdata_length': the length of each chunk (int64, characters)
+        :rtype: dict
+        '''
+        return {'state_start': self.states.to_numpy('start'),
+                'state': self.states.to_numpy('state'),
+                'tx_before': self.states.to_numpy('tx_before'),
+                'txdata_time': self.txdata.to_numpy('time'),
+                'txdata_length': self.txdata.to_numpy('length')}
+
+
+class _PollRate(object):
+
+    '''Decides how long the TX Monitor waits between polls, and keeps metrics on those decisions.
+
+    * While transmitting, the end of the transmission is declared 'xmit timeout' seconds after the last TX data was
+      seen.  That timeout is scaled to the modem's character rate (a gap of `timeout_chars` characters), bounded by
+      `min_xmit_timeout` and the monitor's own xmit_timeout.  The poll interval is a fraction of the timeout, and the
+      last poll is timed to land right when the timeout runs out, so the switch back to RX isn't late by an interval.
+    * While receiving, the interval backs off from `idle_interval` up to `max_idle_interval`.  The monitor is woken
+      up right away when this process keys the transmitter or adds TX text, so idle polls are only there to catch
+      transmissions started elsewhere (e.g. from the FLDIGI GUI).
+
+    The character rate starts out as an estimate for the current modem (see CHAR_RATES), then follows the rate that's
+    actually measured from the TX data.
+    '''
+
+    def __init__(self):
+        self.min_interval = 0.02
+        self.tx_interval = 0.15  # max interval while transmitting / tuning
+        self.idle_interval = 0.25  # first interval after going idle
+        self.max_idle_interval = 2.0
+        self.idle_backoff = 1.5
+        self.min_xmit_timeout = 0.5
+        self.timeout_chars = 6
+
+        self.interval = self.idle_interval
+        self.reason = 'start'
+        self.char_rate = DEFAULT_CHAR_RATE
+        self.measured = False  # True once char_rate comes from TX data rather than from CHAR_RATES
+        self.decisions = collections.Counter()  # reason -> # of times an interval was chosen for that reason
+        self.polls = 0
+        self.wakeups = 0
+        self.turnarounds = 0
+        self.last_turnaround = None  # seconds between the last TX data and the switch back to RX
+        self.total_turnaround = 0.0
+
+    def tx_started(self, modem):
+        '''Called when a transmission starts, with the current modem name'''
+        self.char_rate = estimate_char_rate(modem)
+        self.measured = False
+
+    def observe(self, chars, elapsed):
+        '''Updates the measured character rate with `chars` characters that went out `elapsed` seconds after the
+        previous TX data
+        '''
+        if chars <= 0 or elapsed <= 0:
+            return
+        rate = chars / elapsed
+        if self.measured is False:
+            self.char_rate = rate
+            self.measured = True
+        else:
+            self.char_rate += 0.3 * (rate - self.char_rate)
+
+    def xmit_timeout(self, max_timeout):
+        '''Returns the # of seconds without TX data after which a transmission is considered done'''
+        return min(max_timeout, max(self.min_xmit_timeout, self.timeout_chars / self.char_rate))
+
+    def wake(self):
+        self.wakeups += 1
+        self.interval = self.idle_interval
+
+    def turnaround(self, seconds):
+        self.turnarounds += 1
+        self.last_turnaround = seconds
+        self.total_turnaround += seconds
+
+    def next(self, state, last_txdata_age, xmit_timeout):
+        '''Returns the # of seconds to wait before the next poll'''
+        self.polls += 1
+        if state == 'TX' and last_txdata_age is not None:
+            remaining = xmit_timeout - last_txdata_age
+            interval = min(self.tx_interval, max(self.min_interval, xmit_timeout / 4))
+            if remaining < interval:
+                interval, reason = max(self.min_interval, remaining + 0.005), 'tx-deadline'
+            else:
+                reason = 'tx-active'
+        elif state in ['TX', 'TUNE']:
+            interval, reason = min(self.tx_interval, max(self.min_interval, 1 / self.char_rate)), 'tx-waiting'
+        else:
+            if self.reason == 'rx-idle':
+                interval = min(self.max_idle_interval, self.interval * self.idle_backoff)
+            else:
+                interval = self.idle_interval
+            reason = 'rx-idle'
+        self.interval = interval
+        self.reason = reason
+        self.decisions[reason] += 1
+        return interval
+
+    def to_dict(self):
+        return {'interval': self.interval,
+                'reason': self.reason,
+                'decisions': dict(self.decisions),
+                'char_rate': self.char_rate,
+                'char_rate_measured': self.measured,
+                'polls': self.polls,
+                'wakeups': self.wakeups,
+                'turnarounds': self.turnarounds,
+                'last_turnaround': self.last_turnaround,
+                'mean_turnaround': self.total_turnaround / self.turnarounds if self.turnarounds else None}
+
+
+class _Watchdog(object):
+
+    '''Keeps what a supervisor needs to tell whether a monitor is alive and keeping up, without making any RPCs:
+    when it last finished a poll (the heartbeat), how late it is for the next one (the lag), how long polls take,
+    and the errors it's recovering from.
+
+    After an error, the monitor retries after `error_interval` seconds, doubling up to `max_error_interval` for as
+    long as the errors continue.
+    '''
+
+    def __init__(self):
+        self.error_interval = 0.5
+        self.max_error_interval = 10.0
+
+        self.heartbeat = time.time()  # when the last poll finished
+        self.due = None  # when the next poll is due
+        self.loops = 0
+        self.last_duration = None
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.recoveries = 0
+        self.last_error = None
+        self.last_error_time = None
+
+    def finished(self, started, interval):
+        '''Called at the end of every poll, with when it started and the interval until the next one'''
+        now = time.time()
+        duration = now - started
+        self.loops += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.heartbeat = now
+        self.due = None if interval is None else now + interval
+
+    def failed(self, error):
+        '''Called when a poll fails.  Returns the # of seconds to wait before trying again.'''
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.last_error = error
+        self.last_error_time = time.time()
+        return min(self.max_error_interval, self.error_interval * 2 ** (self.consecutive_errors - 1))
+
+    def succeeded(self):
+        '''Called when a poll succeeds.  Returns True if that ends a run of errors.'''
+        if self.consecutive_errors == 0:
+            return False
+        self.consecutive_errors = 0
+        self.recoveries += 1
+        return True
+
+    def lag(self, now=None):
+        '''Returns how many seconds overdue the next poll is (0 if it isn't)'''
+        if self.due is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return max(0.0, now - self.due)
+
+    def to_dict(self):
+        now = time.time()
+        return {'heartbeat': self.heartbeat,
+                'heartbeat_age': now - self.heartbeat,
+                'heartbeat_lag': self.lag(now),
+                'loops': self.loops,
+                'last_loop_duration': self.last_duration,
+                'mean_loop_duration': self.total_duration / self.loops if self.loops else None,
+                'max_loop_duration': self.max_duration,
+                'errors': self.errors,
+                'consecutive_errors': self.consecutive_errors,
+                'recoveries': self.recoveries,
+                'last_error': None if self.last_error is None else repr(self.last_error),
+                'last_error_time': self.last_error_time}
+
+
+def _publish_state(monitor, state):
+    if state != monitor.published_state:
+        monitor.events.publish('state', old=monitor.published_state, new=state)
+        monitor.published_state = state
+
+
+def _publish_txdata(monitor, data):
+    if data is not None and len(data) > 0:
+        monitor.events.publish('txdata', data=data)
+
+
+def _publish_duty_cycle(monitor):
+    '''Publishes a 'duty_cycle' event when the duty cycle crosses max_duty_cycle (either way)'''
+    if monitor.events.active is False or monitor.max_duty_cycle is None:
+        return
+    duty_cycle = monitor.history.get_duty_cycle(monitor.duty_cycle_period)
+    above = duty_cycle > monitor.max_duty_cycle
+    if above != monitor.duty_cycle_above:
+        monitor.duty_cycle_above = above
+        monitor.events.publish('duty_cycle', duty_cycle=duty_cycle, threshold=monitor.max_duty_cycle,
+                               sample_period=monitor.duty_cycle_period, above=above)
+
+
+class TxMonitor(object):
+
+    '''Monitors the TX state of FLDIGI, and puts it back into receive once all of the TX data has gone out.
+
+    It polls FLDIGI from its own daemon thread, or from a shared :py:class:`pyfldigi.client.pool.MonitorScheduler`
+    if the client has one.  It can be stopped, started again, and paused:
+
+    * :py:meth:`start` starts polling (the client calls it before keying the transmitter, see the Client's
+      'monitor' parameter).  A stopped monitor can be started again.
+    * :py:meth:`stop` stops polling and waits for the thread to exit (on a scheduler, for the poll under way).
+    * :py:meth:`pause` keeps the monitor running, but skips the polls until :py:meth:`resume`.
+
+    A poll that fails (FLDIGI not responding, or reporting an 'ERROR' state) doesn't stop the monitor.  It retries
+    with an exponential backoff, and carries on as normal once FLDIGI answers again.  The heartbeat, lag, loop
+    durations and errors are in :py:meth:`metrics`, so a supervisor can spot a stalled monitor without any RPCs.
+
+    .. warning:: While stopped or paused, nothing puts FLDIGI back into receive when the TX text runs out.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` as 'txmonitor'.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> fldigi.txmonitor.tx_interval = 0.1  # poll at least every 100 ms while transmitting
+    >>> fldigi.txmonitor.start()
+    >>> fldigi.txmonitor.metrics()['heartbeat_lag']  # seconds overdue.  0.0 unless the monitor is stalled
+    0.0
+    >>> fldigi.txmonitor.stop()
+    '''
 
     def __init__(self, clientObj):
-        super().__init__()
         self.logger = logging.getLogger('pyfldigi.client.txmonitor')
         self.clientObj = clientObj
         self.client = clientObj.client
 
         # Modal properties
-        self.interval = 1  # Default interval is 1 second
+        self.interval = 1  # The current interval, in seconds
+        self.tx_interval = 0.15  # seconds.  The max interval between polls while transmitting
+        self.rx_interval = 2.0  # seconds.  The max interval between polls while receiving (or paused)
         self.transmitting = False
         self.max_duty_cycle = 95  # percent
+        self.duty_cycle_period = 60  # seconds.  The window max_duty_cycle is checked over, for 'duty_cycle' events
         self.max_xmit_time = 2 * 60  # seconds.  should be enough for a modicum amount of ragchewing
         self.max_length = 10000   # characters
         self.xmit_timeout = 1.5  # Timeout after last bit of transmitted data
 
+        self.adaptive = True  # pace the polls with _PollRate.  If False, poll every tx_interval / rx_interval seconds.
+
+        self.events = EventBus()  # state / txdata / duty_cycle / error events.  See pyfldigi.client.events
+        self.published_state = None
+        self.duty_cycle_above = False
+
         self.history = _History()
         self.last_state = None
+        self.rate = _PollRate()
+        self.watchdog = _Watchdog()
+        self.condition = threading.Condition()  # notified after every poll.  See wait_for()
+        self.polls = 0  # of completed polls
+        self.tx_chars = 0  # total # of characters transmitted (as reported by tx.get_data) since the monitor started
+        self.tx_mode = None  # the modem of the current (or last) transmission
+        self.tx_started_at = None  # when the current (or last) transmission was first seen
+        self.paused = False
+        self.heartbeat = self.watchdog.heartbeat
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._scheduled = False
+        self._thread = None
+        self._poll_thread = None  # the thread that's running poll(), if any
+        self._lifecycle = threading.RLock()
 
-        # Set up the thread
-        self.daemon = True
-        self.heartbeat = time.time()
-        self.start()
+    @property
+    def running(self):
+        '''True if the monitor is polling (or paused), from its thread or from the scheduler'''
+        return self._scheduled or (self._thread is not None and self._thread.is_alive())
+
+    def is_alive(self):
+        return self.running
+
+    @property
+    def ident(self):
+        '''The monitor thread's identifier, or None if it hasn't been started (or runs on a scheduler)'''
+        return None if self._thread is None else self._thread.ident
+
+    def start(self):
+        '''Starts monitoring, on the client's scheduler if it has one, or else in a new daemon thread.  Does nothing
+        if the monitor is already running.
+        '''
+        with self._lifecycle:
+            self._stopping = False
+            if self.running:
+                return
+            scheduler = self.clientObj.scheduler
+            if scheduler is not None:
+                self._scheduled = True
+                scheduler.add(self)
+                return
+            self.logger.debug('TXMONITOR: Starting the thread')
+            self._wakeup.clear()
+            self._thread = threading.Thread(target=self.run, name='pyfldigi-txmonitor', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        '''Stops monitoring, and waits (up to `timeout` seconds) for a poll that's under way to finish.  The monitor
+        can be started again with :py:meth:`start`.
+
+        On a scheduler, it waits for the monitor's poll that's running on the scheduler's executor, if any.
+
+        :returns: False if the thread (or the poll) was still running when the timeout ran out
+        :rtype: bool
+        '''
+        future = None
+        with self._lifecycle:
+            self._stopping = True
+            if self._scheduled is True:
+                self._scheduled = False
+                future = self.clientObj.scheduler.remove(self)
+            thread = self._thread
+            self._wakeup.set()
+        if future is not None and self._poll_thread is not threading.current_thread():
+            done, not_done = concurrent.futures.wait([future], timeout)
+            return len(not_done) == 0
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def pause(self):
+        '''Skips polling FLDIGI until :py:meth:`resume` is called.  The monitor keeps running (and its heartbeat
+        keeps going), but it won't put FLDIGI back into receive.
+        '''
+        self.paused = True
+
+    def resume(self):
+        '''Resumes polling after :py:meth:`pause`, right away'''
+        self.paused = False
+        self.wake()
 
     def run(self):
         self.logger.debug('TXMONITOR: Thread started.')
-        while(1):
-            try:
-                # Get TRX Status
-                state = self.clientObj.main.get_trx_state()
-                self.last_state = state
-                self.history.update_state(_State(state))
+        while self._stopping is False:
+            self._wakeup.clear()  # before polling, so a wake() during the poll isn't lost
+            interval = self.poll()
+            if interval is None:
+                break
+            self._wakeup.wait(interval)
+        self.logger.debug('TXMONITOR: Thread stopped.')
 
-                # Get TX Data
+    def wake(self):
+        '''Makes the monitor poll right away, instead of at the end of its current interval.  Called when this
+        process keys the transmitter or adds TX text.
+        '''
+        self.rate.wake()
+        scheduler = self.clientObj.scheduler
+        if scheduler is not None:
+            scheduler.wake(self)
+        self._wakeup.set()
+
+    def get_xmit_timeout(self):
+        '''Returns the # of seconds without TX data after which the transmission is considered done.  With
+        'adaptive' set, it's scaled to the modem's character rate, but never more than 'xmit_timeout'.
+        '''
+        if self.adaptive is True:
+            return self.rate.xmit_timeout(self.xmit_timeout)
+        return self.xmit_timeout
+
+    def metrics(self):
+        '''Returns the monitor's pacing decisions, turnaround times, and watchdog figures.  Makes no RPCs.
+
+        :returns: A dict with the keys 'interval' and 'reason' (the current interval and why it was chosen),
+                  'decisions' (# of intervals chosen per reason), 'char_rate' (characters/second, estimated from the
+                  modem or measured), 'char_rate_measured', 'xmit_timeout', 'polls', 'wakeups', 'turnarounds' (# of
+                  times the monitor switched FLDIGI back to RX), 'last_turnaround' and 'mean_turnaround' (seconds
+                  between the last TX data and the switch to RX).
+
+                  For supervision: 'running', 'paused', 'heartbeat' (when the last poll finished), 'heartbeat_age',
+                  'heartbeat_lag' (seconds the next poll is overdue: anything much above 0 means the monitor is
+                  stalled), 'loops', 'last_loop_duration', 'mean_loop_duration', 'max_loop_duration' (seconds per
+                  poll), 'errors', 'consecutive_errors', 'recoveries', 'last_error' and 'last_error_time'.
+        :rtype: dict
+        '''
+        metrics = self.rate.to_dict()
+        metrics['xmit_timeout'] = self.get_xmit_timeout()
+        metrics.update(self.watchdog.to_dict())
+        metrics['running'] = self.running
+        metrics['paused'] = self.paused
+        return metrics
+
+    def poll(self):
+        '''Polls FLDIGI once: reads the TRX state and TX data, and puts FLDIGI back into receive if all of the TX data
+        has gone out.
+
+        This is the body of the monitor thread's loop.  It can also be called from elsewhere (e.g. the shared
+        scheduler of a :py:class:`pyfldigi.client.pool.ClientPool`) instead of running this monitor as its own thread.
+
+        Errors don't propagate: they're logged, published as 'error' events, and the next poll is backed off (see
+        :py:class:`_Watchdog`).
+
+        :returns: The # of seconds to wait before polling again, or None if the monitor has been stopped.
+        :rtype: float or None
+        '''
+        self._poll_thread = threading.current_thread()
+        try:
+            return self._poll()
+        finally:
+            self._poll_thread = None
+
+    def _poll(self):
+        if self._stopping is True:
+            return None
+        started = time.time()
+        if self.paused is True:
+            self.interval = self.rx_interval
+            self.watchdog.finished(started, self.interval)
+            self.heartbeat = self.watchdog.heartbeat
+            return self.interval
+        try:
+            # With a TX lease, only the holder's monitor reads the TX data and puts FLDIGI back into receive
+            owned = True
+            if self.clientObj.use_lease is True:
+                owned = self.clientObj.lease.heartbeat()  # renews the lease, if this client holds it
+
+            # Get TRX Status
+            state = self.clientObj.main.get_trx_state()
+            previous_state = self.last_state
+            if state == 'TX' and previous_state != 'TX':
+                self.tx_started_at = time.time()
+                if owned is True:
+                    self.tx_mode = self.clientObj.modem.name
+                    self.rate.tx_started(self.tx_mode)
+
+            # Get TX Data (not needed while sitting in RX, or while another client's transmitting)
+            data = None
+            if owned is True and (state != 'RX' or previous_state != 'RX'):
                 data = self.clientObj.text.get_tx_data(suppress_errors=True)
+
+            # Update everything at once, so that waiters never see a half-updated monitor
+            with self.condition:
+                self.last_state = state
+                self.history.update_state(state)
                 if data is not None:
                     if len(data) > 0:
-                        self.logger.debug('TXMONITOR: TX DATA: {}'.format(data))
-                        self.history.append_txdata(_TxData(data))
-
-                if state == 'TX':
-                    self.interval = 0.15  # Speed up the thread rate while transmitting
-                    # Check transmitted bytes, see if it's time to change state to RX
-                    t = self.history.get_last_txdata_time()
-                    if t is None:
+                        if self.logger.isEnabledFor(logging.DEBUG):  # don't format every chunk for nothing
+                            self.logger.debug('TXMONITOR: TX DATA: {}'.format(data))
+                        gap = self.history.get_last_txdata_time()
+                        self.history.append_txdata(data)
+                        self.tx_chars += len(data)
+                        if previous_state == 'TX' and gap is not None:
+                            self.rate.observe(len(data), gap)
+                            if gap <= self.get_xmit_timeout():  # a longer gap means the TX text ran dry
+                                self.clientObj.airtime.observe(self.tx_mode, len(data), gap)
+                _publish_state(self, state)
+                _publish_txdata(self, data)
+
+                xmit_timeout = self.get_xmit_timeout()
+                t = self.history.get_last_txdata_time()
+                # Check transmitted bytes, see if it's time to change state to RX
+                unkey = state == 'TX' and owned is True and t is not None and t > xmit_timeout
+                tx_ended = previous_state == 'TX' and (state != 'TX' or unkey is True)
+
+            # RPCs: not while holding the condition, so waiters and the TX queue don't wait on the network
+            if unkey is True:
+                self.clientObj.main.rx()  # put the state back into receive
+            if tx_ended is True:
+                self._release_lease()
+
+            with self.condition:
+                if state == 'TX' and owned is False:
+                    self.interval = self.rx_interval  # another client's transmission: leave it to its monitor
+                    self.transmitting = False
+                elif state == 'TX':
+                    self.interval = self.tx_interval  # Speed up the thread rate while transmitting
+                    if unkey is False:
+                        # bytes are still being transmitted
                         self.transmitting = True
                     else:
-                        if t <= self.xmit_timeout:
-                            # bytes are still being transmitted
-                            self.transmitting = True
-                        else:
-                            self.clientObj.main.rx()  # put the state back into receive
-                            self.transmitting = False
-                            # print('txdata_time = {}'.format(t))
-                            self.logger.info('Changing state back to RX... (last transmitted byte was {} seconds ago'.format(t))
+                        self.transmitting = False
+                        state = 'RX'
+                        self.rate.turnaround(t)
+                        _publish_state(self, state)
+                        self.logger.info('Changing state back to RX... (last transmitted byte was {} seconds ago'.format(t))
                 elif state == 'ERROR':
-                    break
+                    raise RuntimeError('Could not read the TRX state from FLDIGI')
                 else:
-                    self.interval = 1  # Speed up the thread rate while transmitting
+                    self.interval = self.rx_interval
                     self.transmitting = False
-
-            except Exception as e:
-                raise
-                print('TXMONITOR: Exception: {}'.format(e))
-                pass  # Daemon threads might run after python starts shutting down.  Ignore errors.
-            self.heartbeat = time.time()
-            time.sleep(self.interval)
-        self.logger.debug('TXMONITOR: Thread stopped.')
+                if self.adaptive is True:
+                    self.rate.tx_interval = self.tx_interval
+                    self.rate.max_idle_interval = self.rx_interval
+                    self.interval = self.rate.next(state if owned is True else 'RX', t, xmit_timeout)
+                _publish_duty_cycle(self)
+                self.polls += 1
+                self.condition.notify_all()
+            if tx_ended is True:
+                self.clientObj.airtime.flush()  # file I/O: not while holding the condition
+
+        except Exception as e:
+            # Keep going: FLDIGI may be restarting, or busy.  Back off until it answers again.
+            self.interval = self.watchdog.failed(e)
+            self.logger.warning('TXMONITOR: Poll failed ({} in a row), retrying in {:.1f}s: {}'.format(
+                self.watchdog.consecutive_errors, self.interval, e))
+            self.events.publish('error', error=e, message=str(e))
+            with self.condition:
+                self.condition.notify_all()
+        else:
+            if self.watchdog.succeeded():
+                self.logger.info('TXMONITOR: Recovered')
+        self.watchdog.finished(started, self.interval)
+        self.heartbeat = self.watchdog.heartbeat
+        return self.interval
+
+    def _release_lease(self):
+        '''Releases the TX lease once the transmission it was taken for has ended (e.g. FLDIGI was put back into
+        receive by a macro, or from its GUI)
+        '''
+        lease = self.clientObj.__dict__.get('lease')
+        if lease is not None and lease.held is True and lease.acquired_at <= self.tx_started_at:
+            lease.release()
+
+    def wait_for(self, predicate, timeout=None):
+        '''Blocks until predicate() returns True, without spinning.  predicate() is evaluated right away, then again
+        every time the monitor has polled FLDIGI (every waiting thread is woken up after each poll).
+
+        Hold 'condition' while changing anything that predicate() looks at, so no update is missed.
+
+        :param predicate: Called (with the condition held) to check whether the wait is over
+        :type predicate: callable
+        :param timeout: The max # of seconds to wait (None waits forever)
+        :type timeout: float
+        :returns: The last value returned by predicate(), i.e. False if the wait timed out
+        :rtype: bool
+
+        :Example:
+
+        >>> fldigi.txmonitor.wait_for(lambda: fldigi.txmonitor.get_state() == 'TX', timeout=5)
+        True
+        '''
+        with self.condition:
+            return self.condition.wait_for(predicate, timeout)
 
     def get_state(self):
         return self.history.get_state()
 
+    def get_duty_cycle(self, sample_period=60):
+        '''Returns the % of the last sample_period seconds that FLDIGI spent transmitting'''
+        return self.history.get_duty_cycle(sample_period)
+
+    def timeline(self):
+        '''Returns the TX timeline as NumPy arrays, for analysis.  See :py:meth:`_History.to_numpy`
+
+        :Example:
+
+        >>> import numpy
+        >>> timeline = fldigi.txmonitor.timeline()
+        >>> transmitting = timeline['state'] == STATES.index('TX')
+        >>> numpy.diff(timeline['state_start'])[transmitting[:-1]]  # how long each transmission lasted
+        array([ 4.21,  9.87, 31.02])
+        '''
+        return self.history.to_numpy()
+
     def get_last_txdata_time(self):
         return self.history.get_last_txdata_time()
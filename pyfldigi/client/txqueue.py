@@ -0,0 +1,364 @@
+'''Transmit queue: sends many messages in one keying cycle, in priority order.
+'''
+
+import time
+import heapq
+import logging
+import itertools
+import threading
+import concurrent.futures
+from .throttle import split_text, DutyCycleBudget
+
+
+def _length(data):
+    return len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+
+
+class _Message(object):
+
+    __slots__ = ('data', 'length', 'priority', 'sequence', 'deadline', 'future', 'end', 'final', 'started')
+
+    def __init__(self, data, priority, sequence, deadline, future=None):
+        self.data = data
+        self.length = _length(data)
+        self.priority = priority
+        self.sequence = sequence
+        self.deadline = deadline
+        self.future = concurrent.futures.Future() if future is None else future
+        self.end = None  # TX character count (within the keying cycle) at which this message is completely sent
+        self.final = True  # False for all but the last segment of a message that was split
+        self.started = future is not None  # True for the remaining segments of a message that was split
+
+
+class TxQueue(object):
+
+    '''Queues messages for transmission, and sends them back to back in as few keying cycles as possible.
+
+    Calling :py:meth:`pyfldigi.client.main.Main.send` in a loop keys and un-keys the transmitter for every message,
+    paying the PTT switching and the TX Monitor's xmit timeout each time.  The queue instead keys once, and adds the
+    next message to FLDIGI's TX text shortly before the current one runs out (see 'lead_time'), so the text flows
+    without a gap.  The TX Monitor un-keys the transmitter once the queue has drained.
+
+    Messages with a higher priority go first.  Each message gets a Future that completes when its last character
+    has been transmitted (as reported by FLDIGI's tx.get_data).
+
+    With 'throttle' set (the default), the TX Monitor's limits are enforced too:
+
+    * A keying cycle never runs longer than max_xmit_time seconds, nor sends more than max_length characters.
+    * The duty cycle over the last duty_cycle_period seconds never goes over max_duty_cycle (see
+      :py:class:`pyfldigi.client.throttle.DutyCycleBudget`).  The tail the monitor keeps the transmitter keyed for
+      after the last character (its xmit timeout) is counted as TX time too.
+
+    Each cycle is sized to use all of the airtime the limits allow, based on the modem's characters per second.
+    A message that doesn't fit is split at a word boundary and the rest goes out in the next cycle, which starts as
+    soon as the duty cycle allows.
+
+    .. note:: An instance of this class automatically gets created under :py:class:`pyfldigi.client.client.Client` as 'txqueue'.
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> fldigi = pyfldigi.Client()
+    >>> first = fldigi.txqueue.put('CQ CQ CQ de KM4YRI KM4YRI ')
+    >>> urgent = fldigi.txqueue.put('QRL? ', priority=10)  # goes next, ahead of anything queued with a lower priority
+    >>> stale = fldigi.txqueue.put('73 ', deadline=time.time() + 5)  # dropped if it can't start within 5 seconds
+    >>> first.result(timeout=60)  # blocks until the message has been transmitted
+    >>> fldigi.txqueue.join()  # blocks until the queue is empty
+    '''
+
+    def __init__(self, clientObj):
+        self.clientObj = clientObj
+        self.logger = logging.getLogger('pyfldigi.client.txqueue')
+        self.lead_time = 1.0  # seconds of air time left in FLDIGI's TX text when the next message is added
+        self.stall_timeout = 30  # seconds without any TX progress before the messages in flight are failed
+        self.separator = ''  # added between consecutive messages within a keying cycle
+        self.throttle = True  # enforce the TX Monitor's max_duty_cycle, max_xmit_time and max_length
+        self.min_cycle_time = 5.0  # seconds.  When throttled, don't key up for less airtime than this (or the message)
+        self.cycles = 0  # of keying cycles started
+        self.sent = 0  # of messages sent
+        self.expired = 0  # of messages dropped because their deadline passed
+        self.failed = 0  # of messages that didn't make it out
+        self.waited = 0.0  # seconds spent waiting on the duty cycle
+        self._heap = []  # (-priority, sequence #, message)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._busy = False
+        self._cut = False  # True if the last keying cycle stopped on a limit
+        self._closed = False
+        self._thread = None
+
+    def __len__(self):
+        '''The # of messages waiting to be handed to FLDIGI'''
+        return len(self._heap)
+
+    def put(self, data, priority=0, deadline=None):
+        '''Queues a message for transmission
+
+        :param data: The text to send
+        :type data: str or bytes
+        :param priority: Messages with a higher priority are sent first.  Equal priorities go first in, first out.
+        :type priority: int
+        :param deadline: If given, the time (as time.time()) by which the message must have started transmitting.
+                         If it hasn't, it's dropped and its future fails with TimeoutError.
+        :type deadline: float
+        :returns: Completes (with None) once the last character of the message has been transmitted
+        :rtype: concurrent.futures.Future
+        '''
+        if not isinstance(data, (str, bytes)):
+            raise TypeError('text must be in bytes or str format')
+        with self._condition:
+            if self._closed is True:
+                raise RuntimeError('the TX queue is closed')
+            message = _Message(data, priority, next(self._sequence), deadline)
+            heapq.heappush(self._heap, (-priority, message.sequence, message))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='pyfldigi-txqueue', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return message.future
+
+    def join(self, timeout=None):
+        '''Blocks until every queued message has been sent (or has failed).  Returns False on timeout.'''
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self._heap) == 0 and self._busy is False, timeout)
+
+    def close(self):
+        '''Stops the queue.  Messages that haven't been handed to FLDIGI yet are cancelled.'''
+        with self._condition:
+            self._closed = True
+            for priority, sequence, message in self._heap:
+                message.future.cancel()
+            self._heap = []
+            self._condition.notify_all()
+
+    def stats(self):
+        '''Returns the # of queued messages, keying cycles, and messages sent / expired / failed
+
+        :rtype: dict
+        '''
+        return {'queued': len(self._heap), 'cycles': self.cycles, 'sent': self.sent, 'expired': self.expired,
+                'failed': self.failed, 'waited': self.waited}
+
+    def char_rate(self):
+        '''Returns the expected characters per second: the rate measured by the TX Monitor during the current
+        transmission, or else what the airtime model has learned for the current modem.
+        '''
+        rate = self.clientObj.txmonitor.rate
+        if rate.measured is True:
+            return rate.char_rate
+        return self.clientObj.airtime.char_rate(self.clientObj.modem.name)
+
+    def _peek(self):
+        with self._condition:
+            return self._heap[0][2] if len(self._heap) > 0 else None
+
+    def _requeue(self, message):
+        with self._condition:
+            heapq.heappush(self._heap, (-message.priority, message.sequence, message))  # keeps its place in line
+
+    def _wait(self, seconds):
+        '''Sleeps (interruptibly, by close()).  Returns False if the queue was closed.'''
+        self.waited += seconds
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed, seconds)
+            return self._closed is False
+
+    def _cycle_budget(self):
+        '''Waits until the limits allow a keying cycle, and returns how much it may send: (seconds, characters)'''
+        txmonitor = self.clientObj.txmonitor
+        if self.throttle is False:
+            return None, None
+        char_rate = self.char_rate()
+        tail = txmonitor.get_xmit_timeout()
+        budget = DutyCycleBudget(txmonitor.history, txmonitor.max_duty_cycle, txmonitor.duty_cycle_period)
+        room = budget.max_tx_time - tail  # the most a cycle can send in one window, once the tail is counted
+        if room < 1.0 / char_rate:
+            raise ValueError('max_duty_cycle allows {:.1f}s of TX per {}s, not enough for one character and the '
+                             '{:.1f}s xmit timeout'.format(budget.max_tx_time, txmonitor.duty_cycle_period, tail))
+        message = self._peek()
+        wanted = min(self.min_cycle_time, txmonitor.max_xmit_time, room)
+        if message is not None:
+            wanted = min(wanted, message.length / char_rate)
+        wanted = max(wanted, 1.0 / char_rate)
+        while True:
+            start = budget.earliest_start(wanted + tail)  # never None: wanted + tail fits in one window
+            if start > time.time():
+                self.logger.info('TX queue: waiting {:.1f}s for the duty cycle to come down'.format(start - time.time()))
+                if self._wait(start - time.time()) is False:
+                    return 0, 0
+            seconds = min(txmonitor.max_xmit_time, budget.airtime() - tail)
+            if seconds >= 1.0 / char_rate:  # never key up for just the tail
+                break
+            if self._wait(0.1) is False:
+                return 0, 0
+        return seconds, max(1, min(txmonitor.max_length, int(seconds * char_rate)))
+
+    def _next_message(self):
+        '''Pops the next message to send, dropping the expired and cancelled ones.  Returns None if there's none.'''
+        with self._condition:
+            while len(self._heap) > 0:
+                priority, sequence, message = heapq.heappop(self._heap)
+                if message.deadline is not None and time.time() > message.deadline:
+                    self.expired += 1
+                    message.future.set_exception(TimeoutError('The message\'s deadline passed before it could be sent'))
+                    continue
+                if message.started is True and message.future.done() is True:
+                    continue  # the rest of a message that's failed already
+                if message.started is True or message.future.set_running_or_notify_cancel():
+                    message.started = True
+                    return message
+            return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._heap) > 0 or self._closed)
+                if self._closed is True:
+                    return
+                self._busy = True
+            try:
+                self._cycle()
+            except Exception as e:
+                self.logger.warning('TX queue cycle failed: {}'.format(e))
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _cycle(self):
+        '''Keys the transmitter (unless it's keyed already) and feeds it messages until the queue is empty, or the
+        cycle has used up what the limits allow
+        '''
+        client = self.clientObj
+        txmonitor = client.txmonitor
+        client.ensure_txmonitor()
+        if self.throttle is True and self._cut is True:
+            # The last cycle stopped on a limit: let the transmitter un-key before starting the next one
+            txmonitor.wait_for(lambda: txmonitor.transmitting is False, self.stall_timeout)
+        try:
+            seconds, chars = self._cycle_budget()
+        except ValueError as e:  # the limits never allow the next message out
+            message = self._next_message()
+            if message is not None:
+                self._fail([message], str(e), e)
+            return
+        if chars == 0:
+            return
+        message = self._next_message()
+        if message is None:
+            return
+        taken = [message]  # every message this cycle pops from the queue
+        try:
+            self._transmit(message, chars, taken)
+        except Exception as e:
+            # Nothing else would ever complete the messages this cycle took
+            self._fail(taken, 'TX queue cycle failed: {}'.format(e), e)
+            raise
+
+    def _transmit(self, message, chars, taken):
+        '''The keying cycle itself: sends `message`, then more from the queue as the budget of `chars` characters
+        allows.  Every message it pops is added to `taken`.
+        '''
+        client = self.clientObj
+        txmonitor = client.txmonitor
+        # With a lease, wait for other clients' transmissions to finish.  Taken only now, so that it's never held by a
+        # cycle that doesn't key the transmitter (the monitor releases it once a transmission ends).
+        acquired = client.acquire_lease()
+        with txmonitor.condition:
+            base = txmonitor.tx_chars
+        fed = 0
+        inflight = []
+        self._cut = False
+
+        def feed(message):
+            '''Hands a message to FLDIGI, or as much of it as this cycle may still send'''
+            nonlocal fed
+            data = message.data
+            if fed > 0 and self.separator:
+                data = self.separator + data if isinstance(data, str) else self.separator.encode('utf-8') + data
+            if chars is not None and fed + _length(data) > chars:
+                data, rest = split_text(data, chars - fed)
+                if len(rest) > 0:
+                    remainder = _Message(rest, message.priority, message.sequence, None, message.future)
+                    self._requeue(remainder)
+                    message.final = False
+                    self._cut = True
+            client.text.add_tx(data)
+            fed += _length(data)
+            message.end = fed
+            inflight.append(message)
+
+        def key():
+            with txmonitor.condition:
+                txmonitor.history.clear_txdata()  # so the monitor doesn't time out on the previous transmission
+            client.main.tx()
+            return txmonitor.polls
+
+        keyed = False
+        try:
+            state = client.main.get_trx_state()
+            self.logger.debug('Starting a keying cycle (state={}, budget={} characters)'.format(state, chars))
+            self.cycles += 1
+            keyed_at = txmonitor.polls
+            if state == 'RX':
+                client.text.clear_tx()
+                keyed_at = key()
+                keyed = True
+            feed(message)
+            keyed = True
+        except BaseException:
+            if acquired is True and keyed is False:
+                client.release_lease()  # nothing was transmitted, so the monitor won't release it
+            raise
+        rekeyed = False
+        sent = 0
+        last_progress = time.time()
+
+        while len(inflight) > 0:
+            txmonitor.wait_for(lambda: txmonitor.tx_chars - base > sent, timeout=0.25)
+            with txmonitor.condition:
+                now_sent = txmonitor.tx_chars - base
+                unkeyed = txmonitor.polls > keyed_at + 1 and txmonitor.transmitting is False
+
+            if now_sent > sent:
+                sent = now_sent
+                last_progress = time.time()
+            while len(inflight) > 0 and inflight[0].end <= sent:
+                done = inflight.pop(0)
+                if done.final is True:
+                    self.sent += 1
+                    done.future.set_result(None)
+
+            # Top up FLDIGI's TX text before it runs dry (unless this cycle has used up its budget)
+            if chars is not None and fed >= chars:
+                self._cut = True
+            if self._cut is False:
+                if (fed - sent) / txmonitor.rate.char_rate <= self.lead_time:
+                    message = self._next_message()
+                    if message is not None:
+                        taken.append(message)
+                        feed(message)
+                        last_progress = time.time()
+
+            if len(inflight) > 0 and unkeyed:
+                if rekeyed is False:
+                    # The monitor un-keyed just as more text was added.  FLDIGI keeps that text, so key up again.
+                    self.logger.info('TX queue: re-keying, {} characters still to go'.format(fed - sent))
+                    rekeyed = True
+                    keyed_at = key()
+                    continue
+                self._fail(inflight, 'FLDIGI stopped transmitting before the message was sent')
+            elif len(inflight) > 0 and time.time() - last_progress > self.stall_timeout:
+                self._fail(inflight, 'No TX progress for {} seconds'.format(self.stall_timeout))
+
+    def _fail(self, inflight, reason, error=None):
+        '''Fails the futures of the messages that haven't completed (with `error`, or a RuntimeError)'''
+        futures = []
+        for message in inflight:
+            if message.future.done() is False and message.future not in futures:  # segments share their future
+                futures.append(message.future)
+        self.logger.warning('TX queue: {} ({} messages)'.format(reason, len(futures)))
+        for future in futures:
+            self.failed += 1
+            future.set_exception(RuntimeError(reason) if error is None else error)
+        del inflight[:]
@@ -0,0 +1,580 @@
+'''A stand-in for FLDIGI's XML-RPC server, for testing and benchmarking without a radio (or FLDIGI) attached.
+
+usage: python -m pyfldigi.simulator [--port PORT] [--baud BAUD] [--latency SECONDS] [--jitter SECONDS]
+'''
+
+import time
+import random
+import logging
+import argparse
+import threading
+import collections
+import socketserver
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+
+# Modem name -> symbol rate (baud).  Used to work out how fast characters drain from the TX buffer.
+MODEMS = collections.OrderedDict([('NULL', 0.0),
+                                  ('CW', 20.0),
+                                  ('BPSK31', 31.25),
+                                  ('BPSK63', 62.5),
+                                  ('BPSK125', 125.0),
+                                  ('BPSK250', 250.0),
+                                  ('QPSK31', 31.25),
+                                  ('QPSK63', 62.5),
+                                  ('RTTY', 45.45),
+                                  ('OLIVIA', 31.25),
+                                  ('MFSK16', 15.625),
+                                  ('DOMX22', 21.5),
+                                  ('THOR16', 15.625),
+                                  ('NAVTEX', 100.0),
+                                  ('WEFAX576', 0.0)])
+
+LOG_FIELDS = ['frequency', 'time_on', 'time_off', 'call', 'name', 'rst_in', 'rst_out', 'serial_number',
+              'serial_number_sent', 'exchange', 'state', 'province', 'country', 'qth', 'band', 'notes', 'locator', 'az']
+
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like FLDIGI
+    disable_nagle_algorithm = True
+    rpc_paths = ()  # accept any path
+
+    def log_message(self, format, *args):
+        self.server.simulator.logger.debug(format % args)
+
+
+class _Server(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+
+    daemon_threads = True
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        # One delay per HTTP request, so a system.multicall costs one round trip (as it does with FLDIGI)
+        self.simulator.delay()
+        with self.simulator._lock:
+            self.simulator.requests += 1
+        return super()._marshaled_dispatch(data, dispatch_method, path)
+
+    def _dispatch(self, method, params):
+        with self.simulator._lock:
+            self.simulator.calls[method] += 1
+        return super()._dispatch(method, params)
+
+
+class Simulator(object):
+
+    '''Serves (most of) FLDIGI's XML-RPC interface from a background thread, backed by in-memory state.
+
+    Transmitting is modelled too: text added to the TX buffer drains out at the modem's character rate while the
+    simulator is in TX (and shows up in tx.get_data), then the simulator stays in TX sending idle, just like FLDIGI
+    does, until it's told to go back to receive.  Received text can be injected with :py:meth:`inject_rx`.
+
+    :param hostname: The address to listen on
+    :type hostname: str
+    :param port: The port to listen on.  0 picks a free port (see the 'port' attribute once started).
+    :type port: int
+    :param baud: The symbol rate used for the TX drain.  If None, it follows the current modem (see MODEMS).
+    :type baud: float
+    :param bits_per_char: The average # of symbols per character (PSK31's varicode averages roughly 7.5)
+    :type bits_per_char: float
+    :param latency: A fixed delay added to every HTTP request, in seconds
+    :type latency: float
+    :param jitter: A random delay of up to this many seconds, added on top of the latency
+    :type jitter: float
+    :param multicall: Whether or not to serve system.multicall
+    :type multicall: bool
+    :param seed: Seeds the jitter, for repeatable runs
+    :type seed: int
+
+    :Example:
+
+    >>> import pyfldigi
+    >>> from pyfldigi.simulator import Simulator
+    >>> with Simulator(port=0, baud=250, latency=0.002) as sim:
+    ...     fldigi = pyfldigi.Client(port=sim.port)
+    ...     fldigi.modem.name
+    'BPSK31'
+    ...     fldigi.main.send('CQ CQ CQ de KM4YRI', block=True)
+    ...     sim.transmitted
+    b'CQ CQ CQ de KM4YRI'
+    '''
+
+    def __init__(self, hostname='127.0.0.1', port=7362, baud=None, bits_per_char=7.5, latency=0.0, jitter=0.0,
+                 multicall=True, seed=None):
+        self.logger = logging.getLogger('pyfldigi.simulator')
+        self.hostname = hostname
+        self.port = int(port)
+        self.baud = baud
+        self.bits_per_char = bits_per_char
+        self.latency = latency
+        self.jitter = jitter
+        self.multicall = multicall
+        self.random = random.Random(seed)
+        self.calls = collections.Counter()  # XML-RPC method name -> # of calls (including those inside a multicall)
+        self.requests = 0  # # of HTTP requests
+        self.server = None
+        self._thread = None
+        self._lock = threading.RLock()
+        self.reset()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(self.hostname, self.port)
+
+    def start(self):
+        '''Starts serving from a background thread'''
+        self.server = _Server((self.hostname, self.port), requestHandler=_RequestHandler, allow_none=True,
+                              logRequests=False, use_builtin_types=True)
+        self.server.simulator = self
+        self.port = self.server.server_address[1]
+        if self.multicall is True:
+            self.server.register_multicall_functions()
+        for name, (signature, help, function) in self._methods().items():
+            self.server.register_function(self._locked(function), name)
+        self._thread = threading.Thread(target=self.server.serve_forever, name='pyfldigi-simulator', daemon=True)
+        self._thread.start()
+        self.logger.info('Simulating FLDIGI at {}'.format(self.url))
+
+    def stop(self):
+        '''Stops serving'''
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self._thread.join()
+            self.server = None
+
+    def serve_forever(self):
+        '''Starts serving, and blocks until interrupted'''
+        self.start()
+        try:
+            while(1):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def reset(self):
+        '''Puts everything back to the state FLDIGI starts up in'''
+        with self._lock:
+            self.trx = 'RX'
+            self.rx_only = False
+            self.terminated = False
+            self.modem = 'BPSK31'
+            self.carrier = 1500
+            self.bandwidth = 31
+            self.afc_search_range = 100
+            self.quality = 50.0
+            self.olivia = {'bandwidth': 500, 'tones': 16}
+            self.settings = {'afc': True, 'squelch': False, 'squelch_level': 50.0, 'reverse': False, 'lock': False,
+                             'txid': False, 'rsid': False, 'spot_auto': False}
+            self.status1 = ''
+            self.status2 = ''
+            self.wf_sideband = 'USB'
+            self.rig = {'name': '', 'frequency': 7070000.0, 'modes': [], 'mode': '', 'bandwidths': [],
+                        'bandwidth': '', 'notch': 0, 'control': False}
+            self.log = {field: '' for field in LOG_FIELDS}
+            self.spot_count = 0
+            self.io = 'ARQ'
+            self.macros_run = []
+            self.tx_buffer = bytearray()  # waiting to be transmitted
+            self.transmitted = bytearray()  # everything transmitted since the last reset
+            self.rx_text = bytearray()  # the RX widget
+            self._tx_unread = bytearray()  # for tx.get_data
+            self._rx_unread = bytearray()  # for rx.get_data
+            self._rxtx_unread = bytearray()  # for rxtx.get_data
+            self._tx_clock = time.time()
+            self._tx_credit = 0.0  # fractional characters owed to the drain
+
+    @property
+    def char_rate(self):
+        '''The # of characters per second that drain from the TX buffer while transmitting'''
+        baud = self.baud if self.baud is not None else MODEMS.get(self.modem, 31.25)
+        return baud / self.bits_per_char
+
+    def delay(self):
+        '''Sleeps for the configured latency + jitter (called once per HTTP request)'''
+        delay = self.latency
+        if self.jitter > 0:
+            delay += self.random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def inject_rx(self, data):
+        '''Makes data show up as received text (in rx.get_data, rxtx.get_data and the RX widget)
+
+        :param data: The received text
+        :type data: str or bytes
+        '''
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._lock:
+            self.rx_text += data
+            self._rx_unread += data
+            self._rxtx_unread += data
+
+    def drain(self):
+        '''Moves characters from the TX buffer to the transmitted data, at the character rate, for the time that's
+        gone by since the last drain.  Called before every XML-RPC method is run.
+        '''
+        with self._lock:
+            now = time.time()
+            if self.trx == 'TX' and len(self.tx_buffer) > 0:
+                owed = self._tx_credit + (now - self._tx_clock) * self.char_rate
+                n = min(int(owed), len(self.tx_buffer))
+                if n > 0:
+                    data = bytes(self.tx_buffer[0:n])
+                    del self.tx_buffer[0:n]
+                    self.transmitted += data
+                    self._tx_unread += data
+                    self._rxtx_unread += data
+                self._tx_credit = owed - n if len(self.tx_buffer) > 0 else 0.0
+            self._tx_clock = now
+
+    def _locked(self, function):
+        def wrapper(*args):
+            with self._lock:
+                self.drain()
+                return function(*args)
+        return wrapper
+
+    def _set_trx(self, state):
+        self.drain()
+        if state != self.trx:
+            self._tx_clock = time.time()
+            self._tx_credit = 0.0
+        self.trx = state
+
+    @staticmethod
+    def _take(buffer):
+        data = bytes(buffer)
+        del buffer[:]
+        return data
+
+    def _fault(self, message):
+        raise xmlrpc.client.Fault(-1, message)
+
+    # ----- method families -----
+
+    def _get(self, key):
+        return lambda: self.settings[key]
+
+    def _set(self, key, cast):
+        def setter(value):
+            old = self.settings[key]
+            self.settings[key] = cast(value)
+            return old
+        return setter
+
+    def _toggle(self, key):
+        def toggle():
+            self.settings[key] = not self.settings[key]
+            return self.settings[key]
+        return toggle
+
+    def _inc(self, key):
+        def inc(value):
+            self.settings[key] += value
+            return self.settings[key]
+        return inc
+
+    def _log_get(self, field):
+        return lambda: self.log[field]
+
+    def _log_set(self, field):
+        def setter(value):
+            self.log[field] = str(value)
+        return setter
+
+    def _rig_set(self, key):
+        def setter(value):
+            self.rig[key] = value
+        return setter
+
+    # ----- main.* -----
+
+    def _tx(self):
+        if self.rx_only is False:
+            self._set_trx('TX')
+
+    def _tune(self):
+        if self.rx_only is False:
+            self._set_trx('TUNE')
+
+    def _abort(self):
+        self._set_trx('RX')
+        del self.tx_buffer[:]
+
+    def _set_rx_only(self):
+        self.rx_only = True
+        self._set_trx('RX')
+
+    def _clear_rx_only(self):
+        self.rx_only = False
+
+    def _run_macro(self, macro):
+        if not 0 <= macro <= 47:
+            self._fault('Invalid macro number')
+        self.macros_run.append(macro)
+
+    def _set_frequency(self, frequency):
+        old = self.rig['frequency']
+        self.rig['frequency'] = float(frequency)
+        return old
+
+    def _inc_frequency(self, frequency):
+        self.rig['frequency'] += frequency
+        return self.rig['frequency']
+
+    def _set_wf_sideband(self, sideband):
+        if sideband not in ['USB', 'LSB']:
+            self._fault('Invalid argument')
+        self.wf_sideband = sideband
+
+    # ----- modem.* -----
+
+    def _set_by_name(self, name):
+        if name not in MODEMS:
+            self._fault('No such modem')
+        old = self.modem
+        self.modem = name
+        return old
+
+    def _set_by_id(self, id):
+        names = list(MODEMS)
+        if not 0 <= id < len(names):
+            self._fault('Invalid modem ID')
+        old = names.index(self.modem)
+        self.modem = names[id]
+        return old
+
+    def _set_carrier(self, carrier):
+        old = self.carrier
+        self.carrier = int(carrier)
+        return old
+
+    def _inc_carrier(self, carrier):
+        self.carrier += int(carrier)
+        return self.carrier
+
+    def _set_bandwidth(self, bandwidth):
+        old = self.bandwidth
+        self.bandwidth = int(bandwidth)
+        return old
+
+    def _set_afc_search_range(self, value):
+        old = self.afc_search_range
+        self.afc_search_range = int(value)
+        return old
+
+    def _olivia_set(self, key):
+        def setter(value):
+            self.olivia[key] = int(value)
+        return setter
+
+    # ----- text.* -----
+
+    def _add_tx(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.tx_buffer += data
+
+    def _clear_rx(self):
+        del self.rx_text[:]
+
+    def _get_rx(self, start, length):
+        return bytes(self.rx_text[start:start + length])
+
+    # ----- rig.* -----
+
+    def _rig_set_name(self, name):
+        self.rig.update({'name': name, 'modes': [], 'mode': '', 'bandwidths': [], 'bandwidth': ''})
+
+    def _rig_set_control(self, control):
+        return lambda: self.rig.update({'control': control})
+
+    def _set_io(self, io):
+        return lambda: setattr(self, 'io', io)
+
+    def _terminate(self, save_options):
+        self.terminated = True
+
+    def _methods(self):
+        '''Returns {XML-RPC method name: (signature, help, function)}'''
+        methods = collections.OrderedDict()
+
+        def add(name, signature, help, function):
+            methods[name] = (signature, help, function)
+
+        add('fldigi.list', 'A:n', 'Returns the list of methods.',
+            lambda: [{'name': name, 'signature': m[0], 'help': m[1]} for name, m in methods.items()])
+        add('fldigi.name', 's:n', 'Returns the program name.', lambda: 'fldigi')
+        add('fldigi.version_struct', 'S:n', 'Returns the program version as a struct.',
+            lambda: {'major': 4, 'minor': 1, 'patch': '.20'})
+        add('fldigi.version', 's:n', 'Returns the program version as a string.', lambda: '4.1.20')
+        add('fldigi.name_version', 's:n', 'Returns the program name and version.', lambda: 'fldigi 4.1.20')
+        add('fldigi.config_dir', 's:n', 'Returns the name of the configuration directory.',
+            lambda: '/tmp/fldigi.files/')
+        add('fldigi.terminate', 'n:i', 'Terminates fldigi.', self._terminate)
+
+        add('modem.get_name', 's:n', 'Returns the name of the current modem.', lambda: self.modem)
+        add('modem.get_names', 'A:n', 'Returns all modem names.', lambda: list(MODEMS))
+        add('modem.get_id', 'i:n', 'Returns the ID of the current modem.', lambda: list(MODEMS).index(self.modem))
+        add('modem.get_max_id', 'i:n', 'Returns the maximum modem ID number.', lambda: len(MODEMS) - 1)
+        add('modem.set_by_name', 's:s', 'Sets the current modem. Returns old name.', self._set_by_name)
+        add('modem.set_by_id', 'i:i', 'Sets the current modem. Returns old ID.', self._set_by_id)
+        add('modem.set_carrier', 'i:i', 'Sets modem carrier. Returns old carrier.', self._set_carrier)
+        add('modem.inc_carrier', 'i:i', 'Increments the modem carrier frequency. Returns the new carrier.',
+            self._inc_carrier)
+        add('modem.get_carrier', 'i:n', 'Returns the modem carrier frequency.', lambda: self.carrier)
+        add('modem.get_afc_search_range', 'i:n', 'Returns the modem AFC search range.',
+            lambda: self.afc_search_range)
+        add('modem.set_afc_search_range', 'i:i', 'Sets the modem AFC search range. Returns the old value.',
+            self._set_afc_search_range)
+        add('modem.get_bandwidth', 'i:n', 'Returns the modem bandwidth.', lambda: self.bandwidth)
+        add('modem.set_bandwidth', 'i:i', 'Sets the modem bandwidth. Returns the old value.', self._set_bandwidth)
+        add('modem.get_quality', 'd:n', 'Returns the modem signal quality in the range [0:100].',
+            lambda: self.quality)
+        add('modem.search_up', 'n:n', 'Searches upward in frequency.', lambda: None)
+        add('modem.search_down', 'n:n', 'Searches downward in frequency.', lambda: None)
+        add('modem.olivia.set_bandwidth', 'n:i', 'Sets the Olivia bandwidth.', self._olivia_set('bandwidth'))
+        add('modem.olivia.get_bandwidth', 'i:n', 'Returns the Olivia bandwidth.', lambda: self.olivia['bandwidth'])
+        add('modem.olivia.set_tones', 'n:i', 'Sets the Olivia tones.', self._olivia_set('tones'))
+        add('modem.olivia.get_tones', 'i:n', 'Returns the Olivia tones.', lambda: self.olivia['tones'])
+
+        add('main.get_status1', 's:n', 'Returns the contents of the first status field (typically s/n).',
+            lambda: self.status1)
+        add('main.get_status2', 's:n', 'Returns the contents of the second status field.', lambda: self.status2)
+        add('main.get_wf_sideband', 's:n', 'Returns the current waterfall sideband.', lambda: self.wf_sideband)
+        add('main.set_wf_sideband', 'n:s', 'Sets the waterfall sideband to USB or LSB.', self._set_wf_sideband)
+        add('main.get_frequency', 'd:n', 'Returns the RF carrier frequency.', lambda: self.rig['frequency'])
+        add('main.set_frequency', 'd:d', 'Sets the RF carrier frequency. Returns the old value.',
+            self._set_frequency)
+        add('main.inc_frequency', 'd:d', 'Increments the RF carrier frequency. Returns the new value.',
+            self._inc_frequency)
+        for key, title in [('afc', 'AFC'), ('squelch', 'squelch'), ('reverse', 'Reverse Sideband'),
+                           ('lock', 'Transmit Lock'), ('txid', 'TXID'), ('rsid', 'RSID')]:
+            add('main.get_' + key, 'b:n', 'Returns the {} state.'.format(title), self._get(key))
+            add('main.set_' + key, 'b:b', 'Sets the {} state. Returns the old state.'.format(title),
+                self._set(key, bool))
+            add('main.toggle_' + key, 'b:n', 'Toggles the {} state. Returns the new state.'.format(title),
+                self._toggle(key))
+        add('main.get_squelch_level', 'd:n', 'Returns the squelch level.', self._get('squelch_level'))
+        add('main.set_squelch_level', 'd:d', 'Sets the squelch level. Returns the old level.',
+            self._set('squelch_level', float))
+        add('main.inc_squelch_level', 'd:d', 'Increments the squelch level. Returns the new level.',
+            self._inc('squelch_level'))
+        add('main.get_trx_status', 's:n', 'Returns transmit/tune/receive status.', lambda: self.trx.lower())
+        add('main.get_trx_state', 's:n', 'Returns T/R state.', lambda: 'RX' if self.trx == 'RX' else 'TX')
+        add('main.tx', 'n:n', 'Transmits.', self._tx)
+        add('main.tune', 'n:n', 'Tunes.', self._tune)
+        add('main.rx', 'n:n', 'Receives.', lambda: self._set_trx('RX'))
+        add('main.rx_tx', 'n:n', 'Sets normal Rx/Tx switching.', self._clear_rx_only)
+        add('main.rx_only', 'n:n', 'Disables Tx.', self._set_rx_only)
+        add('main.abort', 'n:n', 'Aborts a transmit or tune.', self._abort)
+        add('main.run_macro', 'n:i', 'Runs a macro.', self._run_macro)
+        add('main.get_max_macro_id', 'i:n', 'Returns the maximum macro ID number.', lambda: 47)
+        add('main.flmsg_online', 'n:n', 'flmsg online indication', lambda: None)
+        add('main.flmsg_available', 'n:n', 'flmsg data available', lambda: None)
+        add('main.flmsg_transfer', 'n:n', 'data transfer to flmsg', lambda: None)
+        add('main.flmsg_squelch', 'b:n', 'Returns the squelch state.', self._get('squelch'))
+
+        add('rig.set_name', 'n:s', 'Sets the rig name for xmlrpc rig', self._rig_set_name)
+        add('rig.get_name', 's:n', 'Returns the rig name previously set via rig.set_name', lambda: self.rig['name'])
+        add('rig.set_frequency', 'd:d', 'Sets the RF carrier frequency. Returns the old value.', self._set_frequency)
+        add('rig.get_frequency', 'd:n', 'Returns the RF carrier frequency.', lambda: self.rig['frequency'])
+        add('rig.set_smeter', 'n:i', 'Sets the smeter returns null.', lambda value: None)
+        add('rig.set_pwrmeter', 'n:i', 'Sets the power meter returns null.', lambda value: None)
+        for key, title in [('mode', 'mode'), ('bandwidth', 'bandwidth')]:
+            add('rig.set_{}s'.format(key), 'n:A', 'Sets the list of available rig {}s'.format(title),
+                self._rig_set(key + 's'))
+            add('rig.get_{}s'.format(key), 'A:n', 'Returns the list of available rig {}s'.format(title),
+                lambda key=key: self.rig[key + 's'])
+            add('rig.set_' + key, 'n:s', 'Selects a {} previously added by rig.set_{}s'.format(title, key),
+                self._rig_set(key))
+            add('rig.get_' + key, 's:n', 'Returns the name of the current transceiver {}'.format(title),
+                lambda key=key: self.rig[key])
+        add('rig.get_notch', 's:n', 'Reports a notch filter frequency based on WF action', lambda: self.rig['notch'])
+        add('rig.set_notch', 'n:i', 'Sets the notch filter position on WF', self._rig_set('notch'))
+        add('rig.take_control', 'n:n', 'Switches rig control to XML-RPC', self._rig_set_control(True))
+        add('rig.release_control', 'n:n', 'Switches rig control to previous setting', self._rig_set_control(False))
+
+        for field in LOG_FIELDS:
+            add('log.get_' + field, 's:n', 'Returns the {} field contents.'.format(field), self._log_get(field))
+        for field in ['call', 'name', 'qth', 'locator', 'rst_in', 'rst_out', 'serial_number', 'exchange']:
+            add('log.set_' + field, 'n:s', 'Sets the {} field contents.'.format(field), self._log_set(field))
+        add('log.clear', 'n:n', 'Clears the contents of the log fields.',
+            lambda: self.log.update({field: '' for field in LOG_FIELDS}))
+
+        add('io.in_use', 's:n', 'Returns the IO port in use (ARQ/KISS).', lambda: self.io)
+        add('io.enable_kiss', 'n:n', 'Switch to KISS I/O', self._set_io('KISS'))
+        add('io.enable_arq', 'n:n', 'Switch to ARQ I/O', self._set_io('ARQ'))
+
+        add('text.get_rx_length', 'i:n', 'Returns the number of characters in the RX widget.',
+            lambda: len(self.rx_text))
+        add('text.get_rx', '6:ii', 'Returns a range of characters (start, length) from the RX text widget.',
+            self._get_rx)
+        add('text.clear_rx', 'n:n', 'Clears the RX text widget.', self._clear_rx)
+        add('text.add_tx', 'n:s', 'Adds a string to the TX text widget.', self._add_tx)
+        add('text.add_tx_queu', 'n:s', 'Adds a string to the TX transmit queu.', self._add_tx)
+        add('text.add_tx_bytes', 'n:6', 'Adds a byte string to the TX text widget.', self._add_tx)
+        add('text.clear_tx', 'n:n', 'Clears the TX text widget.', lambda: self.tx_buffer.clear())
+        add('rxtx.get_data', '6:n', 'Returns all RXTX combined data since last query.',
+            lambda: self._take(self._rxtx_unread))
+        add('rx.get_data', '6:n', 'Returns all RX data received since last query.',
+            lambda: self._take(self._rx_unread))
+        add('tx.get_data', '6:n', 'Returns all TX data transmitted since last query.',
+            lambda: self._take(self._tx_unread))
+
+        add('spot.get_auto', 'b:n', 'Returns the autospotter state.', self._get('spot_auto'))
+        add('spot.set_auto', 'b:b', 'Sets the autospotter state. Returns the old state.', self._set('spot_auto', bool))
+        add('spot.toggle_auto', 'b:n', 'Toggles the autospotter state. Returns the new state.',
+            self._toggle('spot_auto'))
+        add('spot.pskrep.get_count', 'i:n', 'Returns the number of callsigns spotted in the current session.',
+            lambda: self.spot_count)
+
+        add('wefax.state_string', 's:n', 'Returns Wefax engine state (tx and rx) for information.',
+            lambda: 'Wefax idle')
+        for name, help in [('skip_apt', 'Skip APT during Wefax reception'),
+                           ('skip_phasing', 'Skip phasing during Wefax reception'),
+                           ('set_tx_abort_flag', 'Cancels Wefax image transmission'),
+                           ('end_reception', 'End Wefax image reception'),
+                           ('start_manual_reception', 'Starts fax image reception in manual mode')]:
+            add('wefax.' + name, 's:n', help, lambda: '')
+        add('wefax.set_adif_log', 's:b', 'Set/reset logging to received/transmit images to ADIF log file',
+            lambda value: '')
+        add('wefax.set_max_lines', 's:i', 'Set maximum lines for fax image reception', lambda value: '')
+        add('wefax.get_received_file', 's:i', 'Waits for next received fax file', lambda timeout: '')
+        add('wefax.send_file', 's:si', 'Send file. returns an empty string if OK otherwise an error message.',
+            lambda filename, param: '')
+        add('navtex.get_message', 's:i', 'Returns next Navtex/SitorB message with a max delay in seconds.',
+            lambda timeout: '')
+        add('navtex.send_message', 's:s', 'Send a Navtex/SitorB message. Returns an empty string if OK.',
+            lambda message: '')
+        return methods
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulates FLDIGI\'s XML-RPC server')
+    parser.add_argument('--hostname', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=7362, help='port to listen on')
+    parser.add_argument('--baud', type=float, default=None, help='TX symbol rate (default: follow the modem)')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay added to every request, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='max random delay added on top, in seconds')
+    parser.add_argument('--no-multicall', dest='multicall', action='store_false', help='don\'t serve system.multicall')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    Simulator(hostname=args.hostname, port=args.port, baud=args.baud, latency=args.latency, jitter=args.jitter,
+              multicall=args.multicall).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+'''Benchmark: large binary transfers, through the bytes pipeline vs. the str/marshaller paths it replaces.
+
+TX: text.add_tx_bytes through ServerProxy (line-wrapped base64, decoded into the str body, encoded back to bytes)
+vs. the prebuilt BytesMethod (one b64encode and one join).
+
+RX: reassembling a payload from rx.get_data polls by growing a bytes object and decoding every chunk to a str (for
+logging, as the text paths do) vs. RxByteReader, which copies each chunk once into a preallocated bytearray.
+
+The server runs in a child process, so that time.process_time() only measures the client side.
+
+usage: python scripts/bench_binary.py [-s SIZE_KB] [-c CHUNK_KB] [-n ITERATIONS]
+'''
+
+import os
+import time
+import argparse
+import statistics
+import tracemalloc
+import multiprocessing
+import xmlrpc.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyfldigi.client.transport import RequestsTransport
+from pyfldigi.client.rxstream import RxByteReader
+
+ADD_TX_RESPONSE = xmlrpc.client.dumps((None,), methodresponse=True, allow_none=True).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    rx_response = b''
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        response = self.rx_response if b'rx.get_data' in body[0:200] else ADD_TX_RESPONSE
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_queue, chunk):
+    _Handler.rx_response = xmlrpc.client.dumps((chunk,), methodresponse=True).encode('utf-8')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class _Text(object):
+
+    '''Just enough of pyfldigi.client.text.Text for RxByteReader'''
+
+    def __init__(self, get_rx_data):
+        self.get_rx_bytes = get_rx_data
+
+
+def str_rx(get_rx_data, size):
+    '''The path this replaces: grow a bytes object, and decode every chunk'''
+    data = b''
+    while len(data) < size:
+        chunk = get_rx_data()
+        '{}'.format(chunk.decode('iso-8859-1'))
+        data += chunk
+    return data[0:size]
+
+
+def measure(func, iterations):
+    func()  # warm up the connection
+    cpu, wall = [], []
+    for i in range(0, iterations):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        func()
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(cpu), statistics.median(wall), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Binary TX/RX pipeline benchmark')
+    parser.add_argument('-s', dest='size', type=int, default=4096, help='payload size, in kB')
+    parser.add_argument('-c', dest='chunk', type=int, default=16, help='bytes returned per rx.get_data poll, in kB')
+    parser.add_argument('-n', dest='iterations', type=int, default=5, help='# of transfers per measurement')
+    args = parser.parse_args()
+    size = args.size * 1024
+    payload = os.urandom(size)  # incompressible, like the payloads this is for
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, os.urandom(args.chunk * 1024)), daemon=True)
+    server.start()
+    url = 'http://127.0.0.1:{}/'.format(port_queue.get(timeout=10))
+
+    transport = RequestsTransport(use_builtin_types=True)
+    proxy = xmlrpc.client.ServerProxy(url, transport=transport, allow_none=True)
+    add_tx_bytes = transport.bytes_method(url, 'text.add_tx_bytes')
+    get_rx_data = transport.fast_method(url, 'rx.get_data')
+
+    results = [('TX ServerProxy', measure(lambda: proxy.text.add_tx_bytes(payload), args.iterations)),
+               ('TX BytesMethod', measure(lambda: add_tx_bytes(payload), args.iterations)),
+               ('RX bytes + str', measure(lambda: str_rx(get_rx_data, size), args.iterations)),
+               ('RX RxByteReader', measure(lambda: RxByteReader(_Text(get_rx_data), min_interval=0).read(size),
+                                           args.iterations))]
+    print('{} kB payload, {} kB per RX poll'.format(args.size, args.chunk))
+    print('{:<16} {:>10} {:>10} {:>12} {:>10}'.format('path', 'cpu ms', 'wall ms', 'peak kB', 'MB/s'))
+    for name, (cpu, wall, peak) in results:
+        print('{:<16} {:>10.1f} {:>10.1f} {:>12.0f} {:>10.1f}'.format(name, cpu * 1000, wall * 1000, peak / 1024,
+                                                                       size / wall / 1e6))
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+'''Micro-benchmark: client-side CPU per call for the hot TX Monitor RPCs, ServerProxy vs. prebuilt FastMethod.
+
+The server runs in a child process, so that time.process_time() only measures the Python work done on the client
+side (marshalling, request preparation, parsing) for each call.
+
+usage: python scripts/bench_fastpath.py [-n CALLS]
+'''
+
+import time
+import argparse
+import multiprocessing
+import xmlrpc.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyfldigi.client.transport import RequestsTransport
+
+RESPONSE = xmlrpc.client.dumps(('rx',), methodresponse=True).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port_queue):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def measure(func, calls):
+    func()  # warm up the connection
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(0, calls):
+        func()
+    return (time.process_time() - cpu_start) / calls, (time.perf_counter() - wall_start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FastMethod micro-benchmark')
+    parser.add_argument('-n', dest='calls', type=int, default=2000, help='# of calls per measurement')
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    url = 'http://127.0.0.1:{}/'.format(port_queue.get(timeout=10))
+
+    transport = RequestsTransport(use_builtin_types=True)
+    proxy = xmlrpc.client.ServerProxy(url, transport=transport, allow_none=True)
+    fast = transport.fast_method(url, 'main.get_trx_status')
+
+    proxy_cpu, proxy_wall = measure(lambda: proxy.main.get_trx_status(), args.calls)
+    fast_cpu, fast_wall = measure(fast, args.calls)
+    print('{:<14} {:>14} {:>14}'.format('path', 'cpu us/call', 'wall us/call'))
+    print('{:<14} {:>14.1f} {:>14.1f}'.format('ServerProxy', proxy_cpu * 1e6, proxy_wall * 1e6))
+    print('{:<14} {:>14.1f} {:>14.1f}'.format('FastMethod', fast_cpu * 1e6, fast_wall * 1e6))
+    print('CPU saved per call: {:.1f} us ({:.0f}%)'.format((proxy_cpu - fast_cpu) * 1e6, 100 * (proxy_cpu - fast_cpu) / proxy_cpu))
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
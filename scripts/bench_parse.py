@@ -0,0 +1,91 @@
+'''Benchmark: streaming XML-RPC response parsing vs. decoding the whole body into resp.text first.
+
+Serves canned FLDIGI-sized responses from a local HTTP server, then compares peak memory (tracemalloc) and latency
+of RequestsTransport against the previous resp.text based parse path.
+
+usage: python scripts/bench_parse.py [-n ITERATIONS] [-c CHUNK_SIZE]
+'''
+
+import time
+import argparse
+import statistics
+import threading
+import tracemalloc
+import xmlrpc.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyfldigi.client.transport import RequestsTransport
+
+
+def make_payloads():
+    methods = [{'name': 'method.number_{}'.format(i), 'signature': 's:n', 'help': 'Returns something rather useful. ' * 4} for i in range(0, 200)]
+    return {'fldigi.list (200 methods)': xmlrpc.client.dumps((methods,), methodresponse=True).encode('utf-8'),
+            'rx.get_data (256 kB)': xmlrpc.client.dumps((b'K1ABC de KM4YRI ' * 16384,), methodresponse=True).encode('utf-8'),
+            'wefax.get_received_file (4 MB)': xmlrpc.client.dumps((bytes(range(256)) * 16384,), methodresponse=True).encode('utf-8')}
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    payload = b''
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TextTransport(RequestsTransport):
+
+    '''The previous parse path: read the whole body, decode it to a str, and feed it to the parser in one go'''
+
+    def request(self, host, handler, request_body, verbose):
+        resp = self.session.post(self._build_url(host, handler), data=request_body)
+        p, u = self.getparser()
+        p.feed(resp.text)
+        p.close()
+        return u.close()
+
+
+def measure(transport, url, iterations):
+    proxy = xmlrpc.client.ServerProxy(url, transport=transport)
+    proxy.bench()  # warm up the connection
+    latencies = []
+    for i in range(0, iterations):
+        start = time.perf_counter()
+        proxy.bench()
+        latencies.append(time.perf_counter() - start)
+    tracemalloc.start()
+    proxy.bench()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(latencies), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='XML-RPC response parsing benchmark')
+    parser.add_argument('-n', dest='iterations', type=int, default=20, help='# of calls per payload')
+    parser.add_argument('-c', dest='chunk_size', type=int, default=16384, help='streaming chunk size, in bytes')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:{}/'.format(server.server_address[1])
+
+    print('{:<32} {:>10} {:>14} {:>14} {:>12} {:>12}'.format('payload', 'size', 'text peak', 'stream peak', 'text ms', 'stream ms'))
+    for name, payload in make_payloads().items():
+        _Handler.payload = payload
+        text_latency, text_peak = measure(TextTransport(use_builtin_types=True), url, args.iterations)
+        stream_latency, stream_peak = measure(RequestsTransport(use_builtin_types=True, chunk_size=args.chunk_size), url, args.iterations)
+        print('{:<32} {:>10} {:>14} {:>14} {:>12.2f} {:>12.2f}'.format(name, len(payload), text_peak, stream_peak, text_latency * 1000, stream_latency * 1000))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
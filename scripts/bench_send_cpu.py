@@ -0,0 +1,78 @@
+'''Benchmark: CPU used by a thread blocked in Main.send(block=True) while a long message goes out.
+
+Compares the previous busy-spinning wait loops against waiting on the TX Monitor's condition variable.  FLDIGI is
+simulated (pyfldigi.simulator) in a child process, so time.process_time() only measures this process: the sender,
+the TX Monitor thread and the HTTP client.
+
+usage: python scripts/bench_send_cpu.py [-l LENGTH] [-b BAUD]
+'''
+
+import time
+import argparse
+import multiprocessing
+import pyfldigi
+from pyfldigi.simulator import Simulator
+
+
+def serve(port_queue, baud):
+    simulator = Simulator(port=0, baud=baud)
+    simulator.start()
+    port_queue.put(simulator.port)
+    while(1):
+        time.sleep(1)
+
+
+def spin_send(fldigi, data, timeout):
+    '''The previous Main.send(block=True) wait loops'''
+    txmonitor = fldigi.txmonitor
+    fldigi.text.clear_tx()
+    txmonitor.history.clear_txdata()
+    tx_start = time.time()
+    fldigi.main.tx()
+    fldigi.text.add_tx(data)
+    while(1):
+        if len(txmonitor.history.txdata) >= 1:
+            break
+        if time.time() - tx_start >= timeout:
+            raise TimeoutError('Timeout while transmitting, waiting for first byte to go out')
+    while(1):
+        if txmonitor.transmitting is False:
+            break
+        if time.time() - tx_start >= timeout:
+            raise TimeoutError('Timeout while transmitting, waiting for text to be transmitted')
+
+
+def measure(port, send, data):
+    fldigi = pyfldigi.Client(port=port, monitor=True)
+    time.sleep(0.5)  # let the monitor settle into RX
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    send(fldigi, data, 600)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    fldigi.transport.close()
+    return cpu, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Main.send() CPU benchmark')
+    parser.add_argument('-l', dest='length', type=int, default=400, help='message length, in characters')
+    parser.add_argument('-b', dest='baud', type=float, default=250, help='simulated symbol rate')
+    args = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, args.baud), daemon=True)
+    server.start()
+    port = port_queue.get(timeout=10)
+    data = ('CQ CQ CQ de KM4YRI ' * (args.length // 19 + 1))[0:args.length]
+
+    print('{:<12} {:>10} {:>10} {:>8}'.format('wait', 'wall s', 'cpu s', 'cpu %'))
+    for name, send in [('spin', spin_send),
+                       ('condition', lambda fldigi, data, timeout: fldigi.main.send(data, block=True, timeout=timeout))]:
+        cpu, wall = measure(port, send, data)
+        print('{:<12} {:>10.2f} {:>10.2f} {:>8.1f}'.format(name, wall, cpu, 100 * cpu / wall))
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+'''Benchmark: package import and Client construction time, lazy vs. eager.
+
+Each measurement runs in a fresh interpreter, so nothing is cached between runs.  The 'eager' rows import every
+module and build every namespace up front, which is what pyfldigi used to do (minus starting the TX Monitor thread,
+which needs a running FLDIGI).
+
+usage: python scripts/bench_startup.py [-n RUNS]
+'''
+
+import sys
+import argparse
+import statistics
+import subprocess
+
+SNIPPETS = [('import (lazy)', 'import pyfldigi'),
+            ('import (eager)', 'import pyfldigi.client.client, pyfldigi.client.asyncclient, pyfldigi.appmonitor, pyfldigi.xmlconfig, '
+                               'pyfldigi.client.main, pyfldigi.client.modem, pyfldigi.client.rig, pyfldigi.client.log, pyfldigi.client.text, '
+                               'pyfldigi.client.pskreporter, pyfldigi.client.flmsg, pyfldigi.client.ioconfig, pyfldigi.client.txmonitor'),
+            ('import + Client() (lazy)', 'import pyfldigi; c = pyfldigi.Client()'),
+            ('import + Client() (eager)', 'import pyfldigi, pyfldigi.client.asyncclient, pyfldigi.appmonitor, pyfldigi.xmlconfig; '
+                                          'c = pyfldigi.Client(monitor=False); '
+                                          '[getattr(c, n) for n in (\'main\', \'modem\', \'rig\', \'log\', \'text\', \'spot\', \'flmsg\', \'io\', \'txmonitor\')]')]
+
+TIMER = 'import time; _start = time.perf_counter(); {}; print(time.perf_counter() - _start)'
+
+
+def measure(snippet, runs):
+    times = []
+    for i in range(0, runs):
+        out = subprocess.check_output([sys.executable, '-c', TIMER.format(snippet)])
+        times.append(float(out.decode().strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pyfldigi import / startup benchmark')
+    parser.add_argument('-n', dest='runs', type=int, default=15, help='# of fresh interpreters per measurement')
+    args = parser.parse_args()
+    print('{:<28} {:>10}'.format('case', 'median ms'))
+    for name, snippet in SNIPPETS:
+        print('{:<28} {:>10.1f}'.format(name, measure(snippet, args.runs) * 1000))
+
+
+if __name__ == '__main__':
+    main()
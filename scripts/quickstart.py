@@ -11,8 +11,11 @@ lorems = ["Lorem ipsum dolor sit amet,",
           "sed do eiusmod tempor incididunt",
           "ut labore et dolore magna aliqua."]
 
-for lorem in lorems:
-    c.main.send(lorem, block=True, timeout=100)
+# Queue the lines, so they all go out in one keying cycle (instead of keying up and down for every line)
+c.txqueue.separator = ' '
+futures = [c.txqueue.put(lorem) for lorem in lorems]
+for future in futures:
+    future.result(timeout=100)
 
 time.sleep(10)
 # c.main.tx()
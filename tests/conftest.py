@@ -0,0 +1,51 @@
+'''Shared pytest fixtures.
+
+Tests that need FLDIGI can use the 'fldigi' fixture, which points a Client at a local simulator instead, so they
+run anywhere.  The simulator can be configured per test with the 'simulator' marker, e.g.
+
+    @pytest.mark.simulator(baud=250, latency=0.002, jitter=0.001, seed=1)
+    def test_something(fldigi, fldigi_sim):
+        ...
+'''
+
+import pytest
+import socket
+import pyfldigi
+import concurrent.futures
+from pyfldigi.simulator import Simulator
+from pyfldigi.client.pool import MonitorScheduler
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'simulator(**kwargs): keyword arguments for the FLDIGI simulator')
+
+
+@pytest.fixture
+def lease_port():
+    '''A free local port, for a TX lease arbiter'''
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def fldigi_sim(request):
+    '''A running FLDIGI simulator on a free port'''
+    marker = request.node.get_closest_marker('simulator')
+    kwargs = dict(marker.kwargs) if marker is not None else {}
+    kwargs.setdefault('port', 0)
+    with Simulator(**kwargs) as sim:
+        yield sim
+
+
+@pytest.fixture
+def fldigi(fldigi_sim):
+    '''A Client connected to the simulator.  Its TX Monitor is polled by a scheduler that's stopped (before the
+    simulator) at the end of the test, so no monitor thread is left polling a dead server.'''
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    scheduler = MonitorScheduler(executor)
+    client = pyfldigi.Client(port=fldigi_sim.port, scheduler=scheduler)
+    yield client
+    scheduler.stop()
+    executor.shutdown(wait=True)
+    client.transport.close()
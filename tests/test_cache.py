@@ -0,0 +1,53 @@
+import time
+import unittest
+from pyfldigi.client.cache import MetadataCache
+
+
+class MetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        self.cache = MetadataCache(ttls={'rig.get_modes': 0.05})
+
+    def loader(self):
+        self.calls += 1
+        return ['USB', 'LSB']
+
+    def test_hit_after_miss(self):
+        self.cache.get('rig.get_modes', self.loader)
+        self.cache.get('rig.get_modes', self.loader)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_ttl_expiry(self):
+        self.cache.get('rig.get_modes', self.loader)
+        time.sleep(0.06)
+        self.cache.get('rig.get_modes', self.loader)
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidate_related(self):
+        self.cache.get('rig.get_modes', self.loader)
+        self.cache.invalidate_related('rig.set_name')
+        self.cache.get('rig.get_modes', self.loader)
+        self.assertEqual(self.calls, 2)
+
+    def test_invalidated_while_loading(self):
+        def loader():
+            self.cache.invalidate('rig.get_modes')  # e.g. rig.name set by another thread, mid-read
+            return self.loader()
+        self.cache.get('rig.get_modes', loader)
+        self.cache.get('rig.get_modes', self.loader)
+        self.assertEqual(self.calls, 2)
+
+    def test_returns_copies(self):
+        self.cache.get('rig.get_modes', self.loader).append('CW')
+        self.assertEqual(self.cache.get('rig.get_modes', self.loader), ['USB', 'LSB'])
+
+    def test_uncached_key(self):
+        self.cache.get('rig.get_frequency', self.loader)
+        self.cache.get('rig.get_frequency', self.loader)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,20 @@
 import unittest
 import pyfldigi
+from pyfldigi.simulator import Simulator
 
 
 class ClientTest(unittest.TestCase):
 
     @classmethod
     def setUpClass(self):
-        self.client = pyfldigi.Client()
+        self.simulator = Simulator(port=0)
+        self.simulator.start()
+        self.client = pyfldigi.Client(port=self.simulator.port)
+
+    @classmethod
+    def tearDownClass(self):
+        self.client.transport.close()
+        self.simulator.stop()
 
     def test_name(self):
         self.assertEqual(self.client.name, 'fldigi')
@@ -0,0 +1,90 @@
+import time
+import pytest
+import socket
+import threading
+import unittest
+from pyfldigi.client.lease import TxLease
+
+
+class TxLeaseTest(unittest.TestCase):
+
+    @pytest.fixture(autouse=True)
+    def _port(self, lease_port):
+        self.port = lease_port
+
+    def test_first_come_first_served(self):
+        holder = TxLease(port=self.port)
+        holder.acquire(timeout=5)
+        order = []
+
+        def wait_in_line(name):
+            lease = TxLease(port=self.port)
+            lease.acquire(timeout=10)
+            order.append(name)
+            time.sleep(0.05)
+            lease.release()
+
+        threads = []
+        for name in ['first', 'second', 'third']:
+            threads.append(threading.Thread(target=wait_in_line, args=(name,)))
+            threads[-1].start()
+            time.sleep(0.1)  # so they line up in order
+        self.assertEqual(order, [])
+        holder.release()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(order, ['first', 'second', 'third'])
+
+    def test_timeout_and_expiry(self):
+        holder = TxLease(port=self.port, ttl=0.3)
+        holder.acquire(timeout=5)
+        other = TxLease(port=self.port)
+        with self.assertRaises(TimeoutError):
+            other.acquire(timeout=0.1)
+        other.acquire(timeout=5)  # the holder never sent a heartbeat
+        self.assertTrue(other.held)
+        self.assertFalse(holder.heartbeat())
+        self.assertEqual(holder.stats()['lost'], 1)
+        other.release()
+
+    def test_timeout_when_arbiter_hangs_up(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', self.port))
+        server.listen(16)
+        stop = threading.Event()
+
+        def hang_up():
+            while not stop.is_set():
+                try:
+                    conn, address = server.accept()
+                except OSError:  # closed
+                    return
+                conn.close()
+
+        thread = threading.Thread(target=hang_up, daemon=True)
+        thread.start()
+        try:
+            start = time.time()
+            with self.assertRaises(TimeoutError):
+                TxLease(port=self.port).acquire(timeout=0.5)
+            self.assertLess(time.time() - start, 3)
+        finally:
+            stop.set()
+            server.close()
+
+    def test_malformed_commands(self):
+        holder = TxLease(port=self.port)
+        holder.acquire(timeout=5)
+        for line in [b'ACQUIRE abc\n', b'ACQUIRE nan\n', b'ACQUIRE -1\n', b'BOGUS\n', b'\xff\xfe\n']:
+            with socket.create_connection(('127.0.0.1', self.port), timeout=5) as sock:
+                sock.sendall(line)
+                self.assertEqual(sock.recv(64), b'')  # dropped by the arbiter
+        holder.release()
+        other = TxLease(port=self.port)
+        other.acquire(timeout=5)  # the arbiter is still answering
+        self.assertTrue(other.held)
+        other.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import time
+import threading
+import unittest
+import concurrent.futures
+from pyfldigi.simulator import Simulator
+from pyfldigi.client.pool import ClientPool, MonitorScheduler
+
+
+class _Monitor(object):
+
+    def __init__(self, duration):
+        self.interval = 0.2
+        self.duration = duration
+        self.polls = 0
+        self.running = threading.Event()
+
+    def poll(self):
+        self.running.set()
+        time.sleep(self.duration)
+        self.polls += 1
+        self.running.clear()
+        return self.interval
+
+
+class MonitorSchedulerTest(unittest.TestCase):
+
+    def test_readd_while_polling(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        scheduler = MonitorScheduler(executor)
+        monitor = _Monitor(0.1)
+        try:
+            scheduler.add(monitor)
+            self.assertTrue(monitor.running.wait(5))
+            scheduler.remove(monitor)
+            scheduler.add(monitor)  # while the first poll is still running
+            time.sleep(1.0)
+            self.assertEqual(len(scheduler._heap), 1)
+            self.assertLessEqual(monitor.polls, 5)  # ~1 poll every 0.3 s, not twice that
+        finally:
+            scheduler.stop()
+            executor.shutdown(wait=True)
+
+    def test_remove_returns_poll_in_progress(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        scheduler = MonitorScheduler(executor)
+        monitor = _Monitor(0.3)
+        try:
+            scheduler.add(monitor)
+            self.assertTrue(monitor.running.wait(5))
+            future = scheduler.remove(monitor)
+            self.assertFalse(future.done())
+            future.result(5)
+            self.assertEqual(monitor.polls, 1)
+        finally:
+            scheduler.stop()
+            executor.shutdown(wait=True)
+
+
+class ClientPoolTest(unittest.TestCase):
+
+    def test_send_with_more_endpoints_than_workers(self):
+        simulators = [Simulator(port=0, baud=750) for i in range(0, 3)]
+        for simulator in simulators:
+            simulator.start()
+        pool = ClientPool([simulator.port for simulator in simulators], max_workers=2)
+        try:
+            for client in pool.clients.values():
+                client.txmonitor.xmit_timeout = 0.3
+            results = pool.call('main.send', 'CQ de KM4YRI', timeout=20)
+            self.assertEqual(len(results), 3)
+            for simulator in simulators:
+                self.assertEqual(simulator.transmitted, b'CQ de KM4YRI')
+        finally:
+            pool.close()
+            for simulator in simulators:
+                simulator.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
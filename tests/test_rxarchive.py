@@ -0,0 +1,51 @@
+import unittest
+from pyfldigi.client.rxstream import RxChunk
+from pyfldigi.client.rxarchive import RxArchive
+
+
+class RxArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.archive = RxArchive(size=64, keywords=['cq', 'QRZ'])
+
+    def feed(self, t, text):
+        self.archive.feed(RxChunk(t, text))
+
+    def test_split_across_chunks(self):
+        self.feed(1, 'c')
+        self.feed(2, 'q cq de K1A')
+        self.feed(3, 'BC k1abc/p pse K ')
+        self.assertEqual([h.offset for h in self.archive.hits('cq')], [3, 0])
+        self.assertEqual(self.archive.last_heard('k1abc'), (3, 9, 'K1ABC'))
+        self.assertEqual(self.archive.last_heard('K1ABC/P').offset, 15)
+        self.assertEqual(self.archive.context(self.archive.last_heard('K1ABC'), 3, 1), 'de K1ABC ')
+        self.assertIsNone(self.archive.last_heard('QRZ'))
+        self.assertEqual(self.archive.hits('CQ', since=3), [])  # both ended in the second chunk
+
+    def test_overwritten(self):
+        self.feed(1, 'QRZ de KM4YRI ')
+        self.feed(2, 'x' * 60 + ' QRZ ')
+        self.assertEqual(self.archive.oldest, 15)
+        self.assertEqual(self.archive.text(), 'x' * 59 + ' QRZ ')
+        self.assertEqual(self.archive.hits('QRZ'), [(2, 75, 'QRZ')])
+        self.assertIsNone(self.archive.last_heard('KM4YRI'))
+        self.assertEqual(self.archive.terms(), {'QRZ': 1})
+
+    def test_long_word(self):
+        self.feed(1, 'X' * 40)
+        self.feed(2, 'K1ABC K2ABC ')  # the end of the long word, not a callsign
+        self.assertEqual(self.archive.terms(), {'K2ABC': 1})
+
+    def test_non_ascii_keyword(self):
+        self.archive.add_keywords(['café'])
+        self.feed(1, 'CAFé 73 ')
+        self.assertEqual(self.archive.terms(), {'CAFé': 1})
+        self.assertEqual(self.archive.last_heard('café').offset, 0)
+        self.assertEqual(len(self.archive.hits('Café')), 1)
+
+    def test_hits_in_order(self):
+        self.archive.add_keywords(['K1ABC', '1A'])
+        self.feed(1, 'de K1A')  # '1A' found
+        self.feed(2, 'BC cq ')  # K1ABC found as both a keyword and a callsign, before '1A'
+        self.assertEqual([(h.offset, h.term) for h in self.archive._order], [(3, 'K1ABC'), (4, '1A'), (9, 'CQ')])
+        self.assertEqual(self.archive.terms(), {'K1ABC': 1, '1A': 1, 'CQ': 1})
@@ -0,0 +1,294 @@
+import time
+import pytest
+import threading
+
+
+def test_tx_drains_at_char_rate(fldigi, fldigi_sim):
+    fldigi_sim.baud = 75  # 10 characters per second
+    fldigi.text.add_tx('0123456789' * 3)
+    fldigi.main.tx()
+    time.sleep(0.5)
+    fldigi_sim.drain()
+    sent = bytes(fldigi_sim.transmitted)
+    assert 3 <= len(sent) <= 7
+    assert sent == b'0123456789'[0:len(sent)]
+
+
+@pytest.mark.simulator(baud=750)
+def test_send_blocks_until_transmitted(fldigi, fldigi_sim):
+    fldigi.txmonitor.xmit_timeout = 0.3
+    fldigi.main.send('CQ CQ CQ de KM4YRI', block=True, timeout=10)
+    assert fldigi_sim.transmitted == b'CQ CQ CQ de KM4YRI'
+    assert fldigi.main.get_trx_state() == 'RX'
+
+
+@pytest.mark.simulator(latency=0.02)
+def test_batch_is_one_round_trip(fldigi, fldigi_sim):
+    with fldigi.batch() as batch:
+        carrier = batch.modem.get_carrier()
+        frequency = batch.rig.get_frequency()
+    assert (carrier.value, frequency.value) == (1500, 7070000.0)
+    assert fldigi_sim.requests == 1
+    assert fldigi_sim.calls['modem.get_carrier'] == 1
+
+
+@pytest.mark.simulator(baud=750)
+def test_fast_modem_turnaround(fldigi, fldigi_sim):
+    fldigi_sim.modem = 'BPSK250'
+    fldigi.main.send('CQ CQ CQ de KM4YRI', block=True, timeout=10)
+    metrics = fldigi.txmonitor.metrics()
+    assert metrics['turnarounds'] == 1
+    assert metrics['last_turnaround'] < fldigi.txmonitor.xmit_timeout
+
+
+@pytest.mark.simulator(baud=750)
+def test_state_and_txdata_events(fldigi, fldigi_sim):
+    received = []
+    done = threading.Event()
+
+    def on_event(event):
+        received.append(event)
+        if event.kind == 'state' and event.data['new'] == 'RX' and event.data['old'] == 'TX':
+            done.set()
+
+    fldigi.txmonitor.events.subscribe(on_event, kinds=['state', 'txdata'])
+    fldigi.main.send('CQ CQ CQ de KM4YRI', block=True, timeout=10)
+    assert done.wait(5)
+    states = [(e.data['old'], e.data['new']) for e in received if e.kind == 'state']
+    assert states[-2:] == [('RX', 'TX'), ('TX', 'RX')]
+    assert b''.join(e.data['data'] for e in received if e.kind == 'txdata') == b'CQ CQ CQ de KM4YRI'
+
+
+def test_event_stream_dropped_when_loop_closed():
+    import asyncio
+    from pyfldigi.client.events import EventBus
+    bus = EventBus()
+    received = threading.Event()
+    bus.subscribe(lambda event: received.set())
+
+    async def main():
+        return bus.stream()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main())
+    loop.close()
+    bus.publish('error', error=None, message='')
+    assert received.wait(5)  # the other subscribers still get it
+    deadline = time.time() + 5
+    while bus.stats()['subscribers'] > 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert bus.stats()['subscribers'] == 1
+
+
+@pytest.mark.simulator(baud=750)
+def test_txqueue_priorities_in_one_keying(fldigi, fldigi_sim):
+    fldigi.txqueue.lead_time = 0.05
+    first = fldigi.txqueue.put('first message is long enough to keep the others queued. ')
+    time.sleep(0.1)
+    low = fldigi.txqueue.put('low ')
+    high = fldigi.txqueue.put('high ', priority=1)
+    expired = fldigi.txqueue.put('expired ', deadline=time.time() - 1)
+    for future in [first, low, high]:
+        future.result(timeout=10)
+    with pytest.raises(TimeoutError):
+        expired.result(timeout=10)
+    assert fldigi_sim.transmitted.endswith(b'high low ')
+    assert fldigi_sim.calls['main.tx'] == 1
+
+
+def test_txqueue_cycle_error_fails_messages(fldigi, fldigi_sim):
+    def add_tx(data):
+        raise ConnectionError('FLDIGI went away')
+
+    fldigi.text.add_tx = add_tx
+    message = fldigi.txqueue.put('CQ CQ CQ de KM4YRI ')
+    with pytest.raises(ConnectionError):
+        message.result(timeout=10)
+    assert fldigi.txqueue.stats()['failed'] == 1
+    fldigi.txqueue.close()
+
+
+@pytest.mark.simulator(baud=750)
+def test_txqueue_splits_on_max_length(fldigi, fldigi_sim):
+    fldigi.txmonitor.max_length = 20
+    fldigi.txmonitor.xmit_timeout = 0.3
+    message = 'CQ CQ CQ de KM4YRI KM4YRI KM4YRI pse K '
+    fldigi.txqueue.put(message).result(timeout=20)
+    assert fldigi_sim.transmitted == message.encode('utf-8')
+    assert fldigi.txqueue.stats()['cycles'] == 2
+    assert fldigi_sim.calls['main.tx'] == 2  # 'CQ CQ CQ de KM4YRI ' + 'KM4YRI KM4YRI pse K '
+
+
+@pytest.mark.simulator(baud=150)
+def test_airtime_learned_and_saved(fldigi, fldigi_sim, tmp_path):
+    from pyfldigi.client.airtime import AirtimeModel
+    fldigi.airtime.path = str(tmp_path / 'airtime.json')
+    assert fldigi.airtime.learned('BPSK31') is False
+    fldigi.main.send('CQ CQ CQ de KM4YRI KM4YRI KM4YRI ' * 2)  # 20 characters/second, not BPSK31's usual 4
+    assert fldigi.airtime.learned('BPSK31') is True
+    assert fldigi.airtime.char_rate('BPSK31') == pytest.approx(fldigi_sim.char_rate, rel=0.25)
+    reloaded = AirtimeModel(path=fldigi.airtime.path)
+    assert reloaded.estimate('x' * 100, 'bpsk31') == pytest.approx(fldigi.airtime.estimate('x' * 100, 'BPSK31'))
+    assert reloaded.estimate('é' * 50, 'BPSK31') == pytest.approx(reloaded.estimate(b'x' * 100, 'BPSK31'))  # bytes
+
+
+def test_txmonitor_recovers_and_restarts(fldigi_sim):
+    import pyfldigi
+    client = pyfldigi.Client(port=fldigi_sim.port, monitor=True)
+    monitor = client.txmonitor
+    monitor.watchdog.error_interval = 0.05
+    try:
+        assert monitor.running is True
+        fldigi_sim.trx = 'BOGUS'  # read back as 'ERROR'
+        assert monitor.wait_for(lambda: monitor.watchdog.consecutive_errors >= 2, timeout=5)
+        assert monitor.running is True
+        fldigi_sim.trx = 'RX'
+        monitor.wake()
+        assert monitor.wait_for(lambda: monitor.watchdog.recoveries == 1, timeout=5)
+        metrics = monitor.metrics()
+        assert metrics['consecutive_errors'] == 0 and metrics['errors'] >= 2
+        assert metrics['heartbeat_lag'] < 1.0
+
+        assert monitor.stop(timeout=5) is True
+        assert monitor.running is False
+        polls = monitor.polls
+        client.main.tx()  # keying the transmitter starts it again
+        assert monitor.running is True
+        assert monitor.wait_for(lambda: monitor.polls > polls and monitor.transmitting is True, timeout=5)
+    finally:
+        client.main.rx()
+        monitor.stop(timeout=5)
+        client.transport.close()
+
+
+@pytest.mark.simulator(baud=750)
+def test_lease_serializes_clients(fldigi_sim, lease_port):
+    import pyfldigi
+    a = pyfldigi.Client(port=fldigi_sim.port, lease=True, lease_port=lease_port)
+    b = pyfldigi.Client(port=fldigi_sim.port, lease=True, lease_port=lease_port)
+    try:
+        a.main.tx()
+        sent = threading.Thread(target=b.main.send, args=('de KM4YRI ',))
+        sent.start()
+        time.sleep(0.5)
+        assert b.lease.held is False and fldigi_sim.transmitted == b''  # b waits for a's lease
+        assert a.main.get_trx_state() == 'TX'  # and b's monitor leaves a's transmission alone
+        a.main.rx()
+        sent.join(10)
+        assert fldigi_sim.transmitted == b'de KM4YRI '
+        assert a.lease.held is False and b.lease.held is False
+        a.main.tx()
+        start = time.time()
+        with pytest.raises(TimeoutError):
+            b.main.send('de KM4YRI ', timeout=0.5)  # one deadline for the lease wait and the transmission
+        assert time.time() - start < 2
+        a.main.rx()
+    finally:
+        for client in [a, b]:
+            client.txmonitor.stop(timeout=5)
+            client.transport.close()
+
+
+def test_lease_released_without_keying(fldigi_sim, lease_port):
+    import pyfldigi
+    a = pyfldigi.Client(port=fldigi_sim.port, lease=True, lease_port=lease_port)
+    b = pyfldigi.Client(port=fldigi_sim.port, lease=True, lease_port=lease_port)
+    try:
+        stale = a.txqueue.put('hello ', deadline=time.time() - 1)
+        with pytest.raises(TimeoutError):
+            stale.result(timeout=5)
+        assert a.txqueue.join(timeout=5) is True
+        assert a.lease.held is False
+        fldigi_sim.trx = 'TUNE'
+        with pytest.raises(Exception, match='TUNE'):
+            a.main.send('hello ')
+        assert a.lease.held is False
+        assert b.lease.acquire(timeout=2) is True
+        b.lease.release()
+    finally:
+        fldigi_sim.trx = 'RX'
+        for client in [a, b]:
+            client.txqueue.close()
+            client.txmonitor.stop(timeout=5)
+            client.transport.close()
+
+
+def test_iter_rx(fldigi, fldigi_sim):
+    with fldigi.text.iter_rx(timeout=1.0, maxsize=2) as rx:
+        fldigi_sim.inject_rx('CQ CQ de KM4YRI é'.encode('utf-8')[:-1])  # the last character split in two
+        time.sleep(0.2)
+        fldigi_sim.inject_rx('é'.encode('utf-8')[-1:] + b' K')
+        received = ''.join(chunk.text for chunk in rx)  # ends 1 second after the last text
+    assert received == 'CQ CQ de KM4YRI é K'
+    assert fldigi.rxpump.stats()['polls'] > fldigi.rxpump.stats()['chunks'] >= 2
+
+
+def test_abandoned_iter_rx(fldigi, fldigi_sim):
+    log = fldigi.rxpump.subscribe(timeout=0.5)
+    rx = fldigi.text.iter_rx(maxsize=1)
+    fldigi_sim.inject_rx(b'QRZ? ')
+    for chunk in rx:
+        break
+    del rx  # abandoned without closing it
+    assert fldigi.rxpump.subscribers == 1
+    for text in [b'CQ ', b'CQ ', b'de KM4YRI']:
+        fldigi_sim.inject_rx(text)
+        time.sleep(0.15)
+    assert ''.join(chunk.text for chunk in log) == 'QRZ? CQ CQ de KM4YRI'  # not stalled by the abandoned iterator
+
+
+def test_rxpump_fan_out(fldigi, fldigi_sim):
+    log = fldigi.rxpump.subscribe(timeout=0.5)
+    ui = fldigi.rxpump.subscribe(maxsize=1, policy='drop_oldest')
+    for text in [b'CQ ', b'CQ ', b'de KM4YRI']:
+        fldigi_sim.inject_rx(text)
+        time.sleep(0.15)
+    assert ''.join(chunk.text for chunk in log) == 'CQ CQ de KM4YRI'  # all of it
+    assert ui.get(timeout=0).text.endswith('de KM4YRI')  # only the latest
+    assert ui.stats()['delivered'] - ui.stats()['dropped'] == 1
+    ui.close()
+    assert fldigi.rxpump.subscribers == 0
+    time.sleep(0.2)  # for the pump thread to stop
+    assert fldigi_sim.calls['rx.get_data'] == fldigi.rxpump.stats()['polls']  # one poller for both
+
+
+def test_rx_context(fldigi, fldigi_sim):
+    with fldigi.text.iter_rx(timeout=0.5) as rx:
+        fldigi_sim.inject_rx(b'CQ ')
+        first = next(rx)
+        fldigi_sim.inject_rx(b'CQ ')
+        second = next(rx)
+        fldigi.modem.carrier = 1234  # drops the cached context
+        fldigi_sim.inject_rx(b'de KM4YRI')
+        third = next(rx)
+    assert first.context.modem == fldigi.modem.name
+    assert first.context.frequency == fldigi.rig.frequency
+    assert second.context.carrier == first.context.carrier != 1234
+    assert third.context.carrier == 1234
+    assert fldigi_sim.calls['modem.get_carrier'] == 2  # per context, not per chunk
+
+
+def test_binary_round_trip(fldigi, fldigi_sim):
+    payload = bytes(range(256)) * 64
+    fldigi.text.add_tx(memoryview(payload)[0:1000])
+    assert bytes(fldigi_sim.tx_buffer) == payload[0:1000]
+    fldigi_sim.inject_rx(payload[0:10000])
+    assert fldigi.text.read_rx_bytes(4000) == payload[0:4000]
+    fldigi_sim.inject_rx(payload[10000:])
+    assert fldigi.text.read_rx_bytes(len(payload) - 4000, timeout=2) == payload[4000:]  # 6000 of them left over
+    assert fldigi.text.read_rx_bytes(1, timeout=0.2) == b''
+
+
+def test_aiter_rx(fldigi_sim):
+    import asyncio
+    import pyfldigi
+
+    async def main():
+        async with pyfldigi.AsyncClient(port=fldigi_sim.port) as fldigi:
+            fldigi_sim.inject_rx(b'de KM4YRI')
+            async with fldigi.text.aiter_rx(timeout=0.5) as rx:
+                async for chunk in rx:
+                    return chunk
+
+    chunk = asyncio.new_event_loop().run_until_complete(main())
+    assert chunk.text == 'de KM4YRI'
@@ -0,0 +1,33 @@
+import unittest
+from pyfldigi.client.stats import RpcStats, method_name
+
+
+class RpcStatsTest(unittest.TestCase):
+
+    def test_record(self):
+        stats = RpcStats(enabled=True)
+        for i in range(0, 99):
+            stats.record('rig.get_frequency', 0.001, 100, 150)
+        stats.record('rig.get_frequency', 0.3, 100, 150, error=True)
+        s = stats.snapshot()['rig.get_frequency']
+        self.assertEqual(s['calls'], 100)
+        self.assertEqual(s['errors'], 1)
+        self.assertEqual(s['bytes_in'], 15000)
+        self.assertLessEqual(s['p50'], 0.001)
+        self.assertGreater(s['p99'], 0.0005)
+        self.assertLessEqual(s['p99'], s['max'])
+        self.assertEqual(sum(s['histogram']), 100)
+
+    def test_reset(self):
+        stats = RpcStats(enabled=True)
+        stats.record('main.rx', 0.001, 10, 10)
+        stats.reset()
+        self.assertEqual(stats.snapshot(), {})
+
+    def test_method_name(self):
+        body = b"<?xml version='1.0'?>\n<methodCall>\n<methodName>main.get_trx_status</methodName>\n<params>\n</params>\n</methodCall>\n"
+        self.assertEqual(method_name(body), 'main.get_trx_status')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import time
+import unittest
+import threading
+from pyfldigi.client.txmonitor import STATES, _History
+from pyfldigi.client.throttle import split_text, DutyCycleBudget
+from pyfldigi.client.txqueue import TxQueue
+
+
+class SplitTextTest(unittest.TestCase):
+
+    def test_word_boundary(self):
+        self.assertEqual(split_text('hello world foo', 12), ('hello world ', 'foo'))
+        self.assertEqual(split_text('hello world foo', 11), ('hello ', 'world foo'))
+        self.assertEqual(split_text('hello', 10), ('hello', ''))
+
+    def test_long_word(self):
+        self.assertEqual(split_text(b'helloworld foo', 5), (b'hello', b'world foo'))
+
+    def test_multibyte(self):
+        self.assertEqual(split_text('héllo wörld', 8), ('héllo ', 'wörld'))  # 'héllo ' is 7 bytes
+        self.assertEqual(split_text('héllo wörld', 6), ('héllo', ' wörld'))  # no room for the space
+        self.assertEqual(split_text('ééééé', 5), ('éé', 'ééé'))  # never half a character
+        head, tail = split_text('73 de Jürgen, Zürich ' * 4, 30)
+        self.assertLessEqual(len(head.encode('utf-8')), 30)
+
+
+class DutyCycleBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = time.time()
+        self.history = _History()
+        self.history.states.clear()
+        self.history.states.append(self.now - 3600, STATES.index('RX'), 0.0)
+        # 20 s of TX, that just ended
+        self.history.update_state('TX', t=self.now - 20)
+        self.history.update_state('RX', t=self.now)
+        self.budget = DutyCycleBudget(self.history, max_duty_cycle=50, sample_period=60)  # 30 s per minute
+
+    def test_airtime(self):
+        # Right away, the whole 20 s is still in the window: 10 s more fits.  From 40 s on, none of it is.
+        self.assertAlmostEqual(self.budget.airtime(now=self.now), 10.0, delta=0.01)
+        self.assertAlmostEqual(self.budget.airtime(start=self.now + 40, now=self.now), 30.0, delta=0.01)
+
+    def test_earliest_start(self):
+        self.assertAlmostEqual(self.budget.earliest_start(10, now=self.now), self.now, delta=0.01)
+        # 25 s needs all but 5 s of the old TX out of the window that ends when it does
+        self.assertAlmostEqual(self.budget.earliest_start(25, now=self.now), self.now + 30, delta=0.01)
+        self.assertIsNone(self.budget.earliest_start(31, now=self.now))
+
+
+class _Monitor(object):
+
+    def __init__(self, history):
+        self.history = history
+        self.max_duty_cycle = 10  # 6 s per minute
+        self.duty_cycle_period = 60
+        self.max_xmit_time = 120
+        self.max_length = 10000
+        self.rate = type('Rate', (), {'measured': True, 'char_rate': 10.0})()
+
+    def get_xmit_timeout(self):
+        return 1.5
+
+
+class CycleBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = time.time()
+        history = _History()
+        history.states.clear()
+        history.states.append(self.now - 3600, STATES.index('RX'), 0.0)
+        # 6 s of TX, that just ended: the window is full
+        history.update_state('TX', t=self.now - 6)
+        history.update_state('RX', t=self.now)
+        self.queue = TxQueue(type('Client', (), {'txmonitor': _Monitor(history)})())
+        self.waits = []
+        self.queue._wait = lambda seconds: self.waits.append(seconds) is not None  # i.e. False: stop waiting
+        self.queue._thread = threading.current_thread()  # so put() doesn't start the queue's thread
+
+    def test_waits_when_window_is_full(self):
+        self.queue.put('x' * 200)
+        self.assertEqual(self.queue._cycle_budget(), (0, 0))
+        # min_cycle_time (5 s) + the tail (1.5 s) don't fit in 6 s: capped at 4.5 s, which needs the old TX gone
+        self.assertAlmostEqual(self.waits[0], 60 - 6, delta=0.5)
+
+    def test_limit_below_tail(self):
+        self.queue.clientObj.txmonitor.max_duty_cycle = 2  # 1.2 s per minute, less than the tail
+        with self.assertRaises(ValueError):
+            self.queue._cycle_budget()
+
+
+if __name__ == '__main__':
+    unittest.main()
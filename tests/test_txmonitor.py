@@ -0,0 +1,56 @@
+import time
+import unittest
+from pyfldigi.client.txmonitor import STATES, _History, _State, _TxData
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def state_at(state, start_time):
+    s = _State(state)
+    s.start_time = start_time
+    return s
+
+
+class HistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = time.time()
+        self.history = _History()
+        self.history.states.clear()
+        self.history.states.append(self.now - 3600, STATES.index('RX'), 0.0)
+        # 1 hour ago: RX, then 30 s of TX every 10 minutes, and TX for the last 15 seconds
+        for minutes in [50, 40, 30, 20, 10]:
+            self.history.update_state(state_at('TX', self.now - minutes * 60))
+            self.history.update_state(state_at('RX', self.now - minutes * 60 + 30))
+        self.history.update_state(state_at('TX', self.now - 15))
+
+    def test_duty_cycle_windows(self):
+        self.assertAlmostEqual(self.history.get_duty_cycle(60), 25.0, delta=0.5)
+        self.assertAlmostEqual(self.history.get_duty_cycle(600), (30 + 15) / 6.0, delta=0.5)
+        self.assertAlmostEqual(self.history.get_duty_cycle(3600), (5 * 30 + 15) / 36.0, delta=0.5)
+
+    def test_bounded(self):
+        history = _History(max_states=8, max_txdata=4)
+        for i in range(0, 100):
+            history.update_state(_State('TX' if i % 2 else 'RX'))
+            history.append_txdata(_TxData(b'x'))
+        self.assertEqual(len(history.states), 8)
+        self.assertEqual(len(history.txdata_history), 4)
+        self.assertEqual(history.get_state(), 'TX')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        history = _History(max_states=8)
+        for i in range(0, 11):  # wraps around the ring
+            history.update_state('TX' if i % 2 else 'RX', t=self.now + i)
+        timeline = history.to_numpy()
+        self.assertEqual(list(timeline['state_start']), [self.now + i for i in range(3, 11)])
+        self.assertEqual(list(timeline['state']), [STATES.index('TX' if i % 2 else 'RX') for i in range(3, 11)])
+        self.assertFalse(timeline['state'].flags['OWNDATA'])  # a view, not a copy
+
+
+if __name__ == '__main__':
+    unittest.main()